@@ -4,6 +4,19 @@ const nextConfig: NextConfig = {
   transpilePackages: ['@clawntown/shared'],
   // Use separate build directory for validation builds (doesn't interfere with dev server)
   distDir: process.env.BUILD_DIR || '.next',
+  // Published assets (scripts/asset-pipeline/publish.py) are content-hashed, so they never change
+  async headers() {
+    return [
+      {
+        source: '/hashed/:path*',
+        headers: [{ key: 'Cache-Control', value: 'public, max-age=31536000, immutable' }],
+      },
+      {
+        source: '/asset-manifest.json',
+        headers: [{ key: 'Cache-Control', value: 'public, max-age=0, must-revalidate' }],
+      },
+    ];
+  },
 };
 
 export default nextConfig;
@@ -17,8 +17,7 @@ Usage:
 import os
 import sys
 import argparse
-import subprocess
-import tempfile
+import atexit
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -26,6 +25,16 @@ from dotenv import load_dotenv
 env_path = Path(__file__).parent.parent.parent.parent.parent / ".env.local"
 load_dotenv(env_path)
 
+# Shared Blender helpers live with the main asset pipeline
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "scripts" / "asset-pipeline"))
+import api_limits  # noqa: E402
+import run_report  # noqa: E402
+from artifacts import Artifact  # noqa: E402
+from asset_registry import checkpoint_renderer, registry  # noqa: E402
+from blender_backend import BACKENDS, SubprocessBackend, get_backend  # noqa: E402
+from blender_utils import (FRAME_BUDGET_SNIPPET, prepare_frames_dir, render_fingerprint,  # noqa: E402
+                           restore_resolution)
+
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 CANDIDATES_DIR = SCRIPT_DIR.parent.parent / "public" / "assets" / "citizens" / "candidates"
@@ -33,8 +42,13 @@ OUTPUT_DIR = SCRIPT_DIR.parent.parent / "public" / "assets" / "citizens"
 WORK_DIR = OUTPUT_DIR / "work"
 
 
-def step1_remove_background(input_path: Path, output_path: Path) -> Path:
-    """Remove background using fal.ai birefnet."""
+def step1_remove_background(source, output_path: Path = None) -> Artifact:
+    """
+    Remove background using fal.ai birefnet.
+
+    source is a path or Artifact; the cutout comes back in memory and is
+    only written to output_path if one is given.
+    """
     print(f"\n{'='*60}")
     print("STEP 1: Remove Background")
     print("="*60)
@@ -52,32 +66,35 @@ def step1_remove_background(input_path: Path, output_path: Path) -> Path:
 
     os.environ["FAL_KEY"] = fal_key
 
-    image_url = fal_client.upload_file(str(input_path))
+    source = Artifact.of(source)
+    image_url = source.upload()
     print(f"Uploaded to: {image_url}")
 
-    result = fal_client.subscribe(
+    result = api_limits.call(
+        "birefnet", fal_client.subscribe,
         "fal-ai/birefnet",
         arguments={"image_url": image_url},
         with_logs=True,
     )
 
     if result and "image" in result and "url" in result["image"]:
-        import httpx
-        response = httpx.get(result["image"]["url"])
-        with open(output_path, "wb") as f:
-            f.write(response.content)
-        print(f"Saved to: {output_path}")
-        return output_path
+        cutout = Artifact.download(result["image"]["url"], "clean.png", sources=source.lineage)
+        if output_path:
+            cutout.save(output_path)
+            print(f"Saved to: {output_path}")
+            registry().register(output_path, "cutout", parents=source.lineage, params={"endpoint": "fal-ai/birefnet"})
+        return cutout
     else:
         print(f"ERROR: Unexpected response: {result}")
         sys.exit(1)
 
 
-def step1b_fill_holes_for_3d(input_path: Path, output_path: Path) -> Path:
+def step1b_fill_holes_for_3d(cutout, output_path: Path = None) -> Artifact:
     """
     Composite transparent image onto solid gray background for 3D conversion.
     This fills any holes (like white elements that birefnet incorrectly removed)
-    so the 3D model doesn't have gaps.
+    so the 3D model doesn't have gaps. Returns the composite in memory
+    (written to output_path only if given).
     """
     print(f"\n{'='*60}")
     print("STEP 1b: Fill Holes for 3D Conversion")
@@ -89,7 +106,8 @@ def step1b_fill_holes_for_3d(input_path: Path, output_path: Path) -> Path:
         print("ERROR: Pillow not installed")
         sys.exit(1)
 
-    img = Image.open(input_path).convert("RGBA")
+    cutout = Artifact.of(cutout)
+    img = cutout.image.convert("RGBA")
 
     # Use a neutral gray background - not white (would blend with white objects)
     # and not too dark (would affect the 3D model coloring)
@@ -99,18 +117,31 @@ def step1b_fill_holes_for_3d(input_path: Path, output_path: Path) -> Path:
     # Composite: character on gray background
     composite = Image.alpha_composite(background, img)
 
-    # Save as PNG (keep RGB, no transparency needed for 3D conversion)
-    composite.convert("RGB").save(output_path, "PNG")
-    print(f"Saved composite for 3D: {output_path}")
-    return output_path
+    # Keep RGB, no transparency needed for 3D conversion
+    filled = Artifact.from_image(composite.convert("RGB"), "filled_for_3d.png", sources=cutout.lineage)
+    if output_path:
+        filled.save(output_path)
+        print(f"Saved composite for 3D: {output_path}")
+        registry().register(output_path, "composite", parents=cutout.lineage)
+    return filled
+
 
+def step2_convert_to_3d(image, output_path: Path, strict: bool = False) -> Path:
+    """
+    Convert to 3D model using Tripo3D v2.5 (image is a path or Artifact, uploaded from memory).
 
-def step2_convert_to_3d(image_path: Path, output_path: Path) -> Path:
-    """Convert to 3D model using Tripo3D v2.5."""
+    An image that looks the same as an earlier input reuses that model
+    (see model_reuse) unless strict.
+    """
     print(f"\n{'='*60}")
     print("STEP 2: Convert to 3D (Tripo3D)")
     print("="*60)
 
+    from model_reuse import record_model, reuse_model
+
+    if reuse_model(image, output_path, "tripo3d/tripo/v2.5/image-to-3d", strict):
+        return output_path
+
     try:
         import fal_client
     except ImportError:
@@ -120,22 +151,24 @@ def step2_convert_to_3d(image_path: Path, output_path: Path) -> Path:
     fal_key = os.getenv("FAL_KEY")
     os.environ["FAL_KEY"] = fal_key
 
-    image_url = fal_client.upload_file(str(image_path))
+    image = Artifact.of(image)
+    image_url = image.upload()
     print(f"Uploaded: {image_url}")
 
     # Use Tripo3D for consistent quality
-    result = fal_client.subscribe(
+    result = api_limits.call(
+        "tripo3d", fal_client.subscribe,
         "tripo3d/tripo/v2.5/image-to-3d",
         arguments={"image_url": image_url},
         with_logs=True,
     )
 
     if result and "model_mesh" in result and "url" in result["model_mesh"]:
-        import httpx
-        response = httpx.get(result["model_mesh"]["url"])
-        with open(output_path, "wb") as f:
-            f.write(response.content)
+        Artifact.download(result["model_mesh"]["url"]).save(output_path)
         print(f"Saved 3D model to: {output_path}")
+        registry().register(output_path, "model", parents=image.lineage,
+                            params={"endpoint": "tripo3d/tripo/v2.5/image-to-3d"})
+        record_model(image, output_path, "tripo3d/tripo/v2.5/image-to-3d")
         return output_path
     else:
         print(f"ERROR: Unexpected response: {result}")
@@ -143,13 +176,14 @@ def step2_convert_to_3d(image_path: Path, output_path: Path) -> Path:
         sys.exit(1)
 
 
-def step3_render_spinning(model_path: Path, output_dir: Path, num_frames: int = 36) -> list:
+def step3_render_spinning(model_path: Path, output_dir: Path, num_frames: int = 36, frame_budget: float = 0.0,
+                          frame_timeout: float = 120.0, backend=None) -> list:
     """Render spinning frames using Blender - same setup as council members."""
     print(f"\n{'='*60}")
     print("STEP 3: Render Spinning Frames")
     print("="*60)
 
-    blender_script = '''
+    blender_script = FRAME_BUDGET_SNIPPET + '''
 import bpy
 import sys
 import math
@@ -160,6 +194,7 @@ argv = argv[argv.index("--") + 1:]
 model_path = argv[0]
 output_dir = argv[1]
 num_frames = int(argv[2])
+frame_budget = float(argv[3]) if len(argv) > 3 else 0.0
 
 bpy.ops.object.select_all(action='SELECT')
 bpy.ops.object.delete()
@@ -230,44 +265,36 @@ scene.render.film_transparent = True
 scene.render.image_settings.file_format = 'PNG'
 scene.render.image_settings.color_mode = 'RGBA'
 
+budget = FrameBudget(scene, frame_budget)
+
 for i in range(num_frames):
     angle = (i / num_frames) * 2 * math.pi
     pivot.rotation_euler = (0, 0, angle)
     frame_path = f"{output_dir}/frame_{i:03d}.png"
-    scene.render.filepath = frame_path
-    bpy.ops.render.render(write_still=True)
-    print(f"Rendered frame {i+1}/{num_frames}")
+    budget.render_frame(i, num_frames, frame_path)
 
+budget.summary()
 print("Done!")
 '''
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-        f.write(blender_script)
-        script_path = f.name
-
+    # Finished frames of an interrupted run are kept and skipped
     frames_dir = output_dir / "frames"
-    frames_dir.mkdir(parents=True, exist_ok=True)
+    prepare_frames_dir(frames_dir, render_fingerprint(blender_script, model_path, num_frames, frame_budget))
 
-    try:
-        blender_exe = "/Applications/Blender.app/Contents/MacOS/Blender"
-        if not os.path.exists(blender_exe):
-            blender_exe = "blender"
-
-        cmd = [blender_exe, "--background", "--python", script_path,
-               "--", str(model_path), str(frames_dir), str(num_frames)]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-        print(result.stdout[-2000:] if len(result.stdout) > 2000 else result.stdout)
-        if result.returncode != 0:
-            print(f"Blender error: {result.stderr}")
-            sys.exit(1)
-    finally:
-        os.unlink(script_path)
+    backend = backend or SubprocessBackend()
+    rendered = backend.run_script(blender_script, [model_path, frames_dir, num_frames, frame_budget], frame_timeout)
+    if rendered is None:
+        sys.exit(1)
+    run_report.current().add_frames(f"spin {Path(model_path).parent.name}", rendered.times)
 
-    return sorted(frames_dir.glob("frame_*.png"))
+    frames = sorted(frames_dir.glob("frame_*.png"))
+    if frame_budget:
+        restore_resolution(frames, (128, 128))
+    return frames
 
 
-def step4_create_gif(frame_paths: list, output_path: Path, duration: int = 50) -> Path:
-    """Create animated GIF from frames with proper transparency handling."""
+def step4_create_gif(frame_paths: list, output_path: Path, duration: int = 50, crop: bool = True) -> Path:
+    """Create animated GIF from frames, cropped and delta-encoded by image_utils.encode_spin_gif."""
     print(f"\n{'='*60}")
     print("STEP 4: Create GIF")
     print("="*60)
@@ -277,56 +304,45 @@ def step4_create_gif(frame_paths: list, output_path: Path, duration: int = 50) -
     except ImportError:
         print("ERROR: Pillow not installed. Run: pip install Pillow")
         sys.exit(1)
+    from image_utils import encode_spin_gif
 
-    processed_frames = []
+    frames = []
     for f in frame_paths:
-        img = Image.open(f).convert("RGBA")
-
-        # Create a new image with transparent background
-        # Convert alpha to 1-bit (fully transparent or fully opaque)
-        alpha = img.split()[3]
-        # Threshold: pixels with alpha > 128 are opaque, others transparent
-        mask = alpha.point(lambda x: 255 if x > 128 else 0)
-
-        # Create palette image with transparency
-        # Use a unique color for transparency that's unlikely to appear in the image
-        transparent_color = (0, 0, 0)
-
-        # Composite onto a solid background first to remove semi-transparency
-        background = Image.new("RGBA", img.size, transparent_color + (255,))
-        composite = Image.alpha_composite(background, img)
-
-        # Convert to palette mode
-        p_img = composite.convert("RGB").convert("P", palette=Image.ADAPTIVE, colors=255)
-
-        # Set transparency for pixels that were transparent in original
-        # Find the palette index closest to our transparent color
-        p_img.paste(0, mask=Image.eval(mask, lambda x: 255 - x))
-
-        processed_frames.append(p_img)
-
-    processed_frames[0].save(
-        output_path,
-        save_all=True,
-        append_images=processed_frames[1:],
-        duration=duration,
-        loop=0,
-        disposal=2,
-        transparency=0,
-    )
-    print(f"Saved GIF to: {output_path}")
+        with Image.open(f) as img:
+            frames.append(img.convert("RGBA"))
+
+    stats = encode_spin_gif(frames, output_path, duration, crop)
+    print(f"Saved GIF to: {output_path} ({stats['size'][0]}x{stats['size'][1]}, crop {stats['crop']}, "
+          f"{stats['bytes'] / 1024:.0f} KB)")
     return output_path
 
 
-def create_static_avatar(input_path: Path, output_path: Path, size: int = 128) -> Path:
-    """Create static avatar at specified size."""
+def step4b_create_spritesheet(frame_paths: list, sheet_path: Path, duration: int = 50) -> Path:
+    """Pack frames into a spritesheet plus a JSON atlas (one texture upload per avatar)."""
+    from PIL import Image
+    from image_utils import write_spritesheet
+
+    frames = []
+    for f in frame_paths:
+        with Image.open(f) as img:
+            frames.append(img.convert("RGBA"))
+
+    atlas = write_spritesheet(frames, sheet_path, duration)
+    print(f"Saved spritesheet to: {sheet_path} ({atlas['meta']['size']['w']}x{atlas['meta']['size']['h']}) "
+          f"+ {sheet_path.with_suffix('.json').name}")
+    return sheet_path
+
+
+def create_static_avatar(source, output_path: Path, size: int = 128) -> Path:
+    """Create static avatar at specified size (source is a path or an in-memory Artifact)."""
     try:
         from PIL import Image
     except ImportError:
         print("ERROR: Pillow not installed")
         sys.exit(1)
 
-    img = Image.open(input_path)
+    source = Artifact.of(source)
+    img = source.image.copy()
     img.thumbnail((size, size), Image.LANCZOS)
 
     result = Image.new('RGBA', (size, size), (0, 0, 0, 0))
@@ -336,11 +352,20 @@ def create_static_avatar(input_path: Path, output_path: Path, size: int = 128) -
 
     result.save(output_path, 'PNG')
     print(f"Saved static avatar to: {output_path}")
+    registry().register(output_path, "static", parents=source.lineage, params={"size": size})
     return output_path
 
 
-def process_avatar(avatar_id: str, skip_existing: bool = False):
-    """Process a single citizen avatar through the full pipeline."""
+def process_avatar(avatar_id: str, skip_existing: bool = False, frame_budget: float = 0.0, spritesheet: str = None,
+                   gif: bool = True, frame_timeout: float = 120.0, backend=None, keep_intermediates: bool = False,
+                   strict: bool = False):
+    """
+    Process a single citizen avatar through the full pipeline.
+
+    The cutout stays in memory between steps unless keep_intermediates
+    writes it to the work directory's clean.png. strict always converts to
+    3D instead of reusing a look-alike's model.
+    """
     print(f"\n{'#'*60}")
     print(f"Processing: {avatar_id}")
     print("#"*60)
@@ -358,36 +383,49 @@ def process_avatar(avatar_id: str, skip_existing: bool = False):
     output_name = avatar_id.replace("citizen_lobster_", "citizen_").replace("citizen_crab_", "citizen_crab_")
     static_path = OUTPUT_DIR / f"{output_name}.png"
     gif_path = OUTPUT_DIR / f"{output_name}_spin.gif"
+    sheet_path = gif_path.with_suffix(f".{spritesheet}") if spritesheet else None
 
     if not input_path.exists():
         print(f"ERROR: Input not found: {input_path}")
         return False
 
-    if skip_existing and gif_path.exists():
+    if skip_existing and (gif_path if gif else sheet_path).exists():
         print(f"Skipping {avatar_id} - already exists")
         return True
 
     try:
         # Step 1: Remove background
-        step1_remove_background(input_path, clean_path)
+        cutout = step1_remove_background(input_path, clean_path if keep_intermediates else None)
 
         # Step 2: Create static avatar
-        create_static_avatar(clean_path, static_path, 128)
+        create_static_avatar(cutout, static_path, 128)
 
         # Step 3: Convert to 3D
-        step2_convert_to_3d(clean_path, model_path)
+        step2_convert_to_3d(cutout, model_path, strict)
 
         # Step 4: Render spinning frames
-        frames = step3_render_spinning(model_path, work_avatar_dir, 36)
+        frames = step3_render_spinning(model_path, work_avatar_dir, 36, frame_budget, frame_timeout, backend)
+        from render_qa import check_spin
+
+        check_spin(frames, f"{avatar_id}_spin")
 
-        # Step 5: Create GIF
-        step4_create_gif(frames, gif_path, 50)
+        # Step 5: Create GIF and/or spritesheet
+        if gif:
+            step4_create_gif(frames, gif_path, 50)
+        if sheet_path:
+            step4b_create_spritesheet(frames, sheet_path, 50)
+        registry().register_many([gif_path if gif else None, sheet_path], parents=[model_path],
+                                 renderer=checkpoint_renderer("blender-citizen-spin", work_avatar_dir / "frames"),
+                                 params={"frames": len(frames)})
 
         print(f"\n{'='*60}")
         print(f"COMPLETE: {avatar_id}")
         print("="*60)
         print(f"Static: {static_path}")
-        print(f"Spinning: {gif_path}")
+        if gif:
+            print(f"Spinning: {gif_path}")
+        if sheet_path:
+            print(f"Spritesheet: {sheet_path}")
         return True
 
     except Exception as e:
@@ -405,8 +443,27 @@ def main():
                         help="Skip avatars that already have GIFs")
     parser.add_argument("--list", action="store_true",
                         help="List all candidate avatars")
+    parser.add_argument("--frame-budget", type=float, default=0.0,
+                        help="Target seconds per spin frame; lowers samples/resolution after the first frame")
+    parser.add_argument("--frame-timeout", type=float, default=120.0,
+                        help="Restart Blender if no spin frame finishes within this many seconds (finished frames are kept)")
+    parser.add_argument("--backend", choices=BACKENDS, default="subprocess",
+                        help="Render with the Blender binary per avatar, or in one warm process via the bpy module")
+    parser.add_argument("--spritesheet", choices=["webp", "png"],
+                        help="Also pack each spin into a spritesheet + JSON atlas (<name>_spin.webp/.json)")
+    parser.add_argument("--no-gif", action="store_true", help="With --spritesheet, skip the GIF")
+    parser.add_argument("--strict", action="store_true",
+                        help="Always convert to 3D, even if an earlier input looked the same (see model_reuse.py)")
+    parser.add_argument("--keep-intermediates", action="store_true",
+                        help="Also write work/<avatar>/clean.png (otherwise passed between steps in memory)")
+
+    parser.add_argument("--run-report", type=str, metavar="PATH",
+                        help="Write a JSON run report (first-frame vs. steady-state frame times) to PATH")
 
     args = parser.parse_args()
+    atexit.register(run_report.finish, args.run_report)
+    if args.no_gif and not args.spritesheet:
+        parser.error("--no-gif requires --spritesheet")
 
     # Ensure directories exist
     WORK_DIR.mkdir(parents=True, exist_ok=True)
@@ -421,21 +478,30 @@ def main():
             print(f"  {c}")
         return
 
-    if args.avatar:
-        if args.avatar not in candidates:
-            print(f"ERROR: Unknown avatar '{args.avatar}'")
-            print("Available:", candidates)
-            sys.exit(1)
-        process_avatar(args.avatar, args.skip_existing)
-    else:
+    if args.avatar and args.avatar not in candidates:
+        print(f"ERROR: Unknown avatar '{args.avatar}'")
+        print("Available:", candidates)
+        sys.exit(1)
+
+    # One backend for the whole run, so the bpy worker stays warm between avatars
+    backend = get_backend(args.backend)
+    try:
+        if args.avatar:
+            process_avatar(args.avatar, args.skip_existing, args.frame_budget, args.spritesheet, not args.no_gif,
+                           args.frame_timeout, backend, args.keep_intermediates, args.strict)
+            return
+
         # Process all
         success = 0
         failed = 0
         for avatar_id in candidates:
-            if process_avatar(avatar_id, args.skip_existing):
+            if process_avatar(avatar_id, args.skip_existing, args.frame_budget, args.spritesheet, not args.no_gif,
+                              args.frame_timeout, backend, args.keep_intermediates, args.strict):
                 success += 1
             else:
                 failed += 1
+    finally:
+        backend.close()
 
         print("\n" + "="*60)
         print("CITIZEN AVATAR PIPELINE COMPLETE")
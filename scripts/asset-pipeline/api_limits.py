@@ -0,0 +1,204 @@
+"""
+Rate limits and longest-job-first scheduling for remote API calls.
+
+Every remote call goes through call(endpoint, fn, ...), which
+
+- takes a token from the endpoint's token bucket (its request quota),
+- holds one of the endpoint's concurrency slots while it runs, and
+- waits for a shared in-flight slot (API_MAX_INFLIGHT, default 8). When
+  callers queue for those slots, the one with the longest expected
+  duration goes first: Tripo3D conversions start before birefnet, birefnet
+  before Gemini, and retries drop behind fresh calls. Long jobs starting
+  early is what shortens a batch's makespan.
+
+Rate-limit errors (HTTP 429 / RESOURCE_EXHAUSTED) are retried with
+backoff. Per-endpoint calls, waits, 429s and utilization (busy time over
+the endpoint's concurrency x active time) go to the run report's "api"
+section.
+
+Limits are conservative defaults; override them per endpoint with JSON in
+API_LIMITS, e.g. API_LIMITS='{"gemini": {"rate": 0.5, "concurrency": 8}}'.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import run_report
+
+
+@dataclass
+class Limit:
+    rate: float          # sustained requests per second
+    burst: int           # bucket size
+    concurrency: int     # calls in flight at once
+    expected: float      # typical call duration in seconds (scheduling weight)
+
+
+LIMITS = {
+    "gemini": Limit(rate=10 / 60, burst=2, concurrency=4, expected=25.0),
+    "fal_upload": Limit(rate=5.0, burst=10, concurrency=8, expected=2.0),
+    "birefnet": Limit(rate=1.0, burst=4, concurrency=4, expected=10.0),
+    "tripo3d": Limit(rate=10 / 60, burst=2, concurrency=2, expected=120.0),
+}
+for _name, _overrides in json.loads(os.getenv("API_LIMITS", "{}")).items():
+    LIMITS[_name] = Limit(**{**LIMITS[_name].__dict__, **_overrides}) if _name in LIMITS else Limit(**_overrides)
+
+MAX_INFLIGHT = int(os.getenv("API_MAX_INFLIGHT", "8"))
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token; returns the seconds spent waiting for it."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def penalize(self, seconds: float) -> None:
+        """Drain the bucket so no call starts for `seconds` (after a 429)."""
+        with self._lock:
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class LongestFirstScheduler:
+    """Shared in-flight slots, granted to fresh calls before retries, longest expected job first."""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.inflight = 0
+        self._waiting = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, expected: float, retry: bool = False):
+        entry = (retry, -expected, next(self._order))
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            while self.inflight >= self.slots or self._waiting[0] != entry:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self.inflight += 1
+            # The next waiter may also fit
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.inflight -= 1
+                self._cond.notify_all()
+
+
+class Endpoint:
+    """Token bucket, concurrency slots and usage counters of one API endpoint."""
+
+    def __init__(self, name: str, limit: Limit):
+        self.name = name
+        self.limit = limit
+        self.bucket = TokenBucket(limit.rate, limit.burst)
+        self.semaphore = threading.BoundedSemaphore(limit.concurrency)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+        self.wait = 0.0
+        self.busy = 0.0
+        self.first = None
+        self.last = None
+
+    def record(self, started: float, finished: float, waited: float, error: bool = False,
+               throttled: bool = False) -> None:
+        with self._lock:
+            self.calls += 1
+            self.errors += error
+            self.throttled += throttled
+            self.wait += waited
+            self.busy += finished - started
+            self.first = started if self.first is None else min(self.first, started)
+            self.last = finished if self.last is None else max(self.last, finished)
+        run_report.current().add("api", self.name, self.stats())
+
+    def stats(self) -> dict:
+        active = (self.last - self.first) if self.first is not None else 0.0
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "throttled_429": self.throttled,
+            "wait_seconds": round(self.wait, 2),
+            "busy_seconds": round(self.busy, 2),
+            "mean_seconds": round(self.busy / self.calls, 2) if self.calls else None,
+            "utilization": round(self.busy / (active * self.limit.concurrency), 3) if active else None,
+            "limit": {"rate_per_min": round(self.limit.rate * 60, 2), "concurrency": self.limit.concurrency},
+        }
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+scheduler = LongestFirstScheduler(MAX_INFLIGHT)
+
+
+def endpoint(name: str) -> Endpoint:
+    with _endpoints_lock:
+        if name not in _endpoints:
+            if name not in LIMITS:
+                raise ValueError(f"Unknown API endpoint: {name} (expected one of {', '.join(LIMITS)})")
+            _endpoints[name] = Endpoint(name, LIMITS[name])
+        return _endpoints[name]
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """HTTP 429 from fal/httpx, or Gemini's RESOURCE_EXHAUSTED."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    response = getattr(error, "response", None)
+    status = status or getattr(response, "status_code", None)
+    return status == 429 or "429" in str(error) or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def call(name: str, fn, *args, retries: int = 4, **kwargs):
+    """Run fn(*args, **kwargs) as a call to endpoint `name`, within its limits."""
+    ep = endpoint(name)
+    for attempt in range(retries + 1):
+        queued = time.monotonic()
+        # Endpoint slot and token first, so waiting on one quota never holds a
+        # shared slot; retries queue behind fresh calls
+        with ep.semaphore:
+            ep.bucket.acquire()
+            with scheduler.slot(ep.limit.expected, retry=attempt > 0):
+                waited = time.monotonic() - queued
+                started = time.monotonic()
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    throttled = is_rate_limited(e)
+                    ep.record(started, time.monotonic(), waited, error=not throttled, throttled=throttled)
+                    if not throttled or attempt == retries:
+                        raise
+                else:
+                    ep.record(started, time.monotonic(), waited)
+                    return result
+        backoff = min(60.0, 2.0 ** attempt * max(1.0, 1 / ep.limit.rate))
+        print(f"{name}: rate limited (429), retrying in {backoff:.0f}s ({attempt + 1}/{retries})")
+        ep.bucket.penalize(backoff)
@@ -0,0 +1,105 @@
+"""
+In-memory artifacts passed between pipeline steps.
+
+A step that used to write `clean.png` for the next step to read back now
+returns an Artifact holding the downloaded bytes and/or the decoded image.
+The next steps use the same decoded image (no second decode), upload the
+bytes straight from memory, and nothing touches disk unless a step is
+given an output path (a declared output, or --keep-intermediates).
+
+    cutout = Artifact.download(url)          # bytes only
+    cutout.image                             # decoded once, on first use
+    filled = Artifact.from_image(composite)  # encoded to PNG once, on first use
+    url = filled.upload()                    # fal upload from the buffer
+    filled.save(path)                        # only for declared outputs
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+
+import api_limits
+
+
+class Artifact:
+    """Image bytes and/or the decoded image, converted lazily and at most once each."""
+
+    def __init__(self, data: bytes = None, image=None, name: str = "artifact.png", path: Path = None,
+                 sources: list = ()):
+        if data is None and image is None and path is None:
+            raise ValueError("Artifact needs bytes, an image or a path")
+        self._data = data
+        self._image = image
+        self.name = name
+        self.path = Path(path) if path is not None else None
+        # Files on disk this was made from, for the asset registry while it only lives in memory
+        self.sources = list(sources)
+
+    @classmethod
+    def of(cls, source) -> "Artifact":
+        """Wrap a path (read lazily) unless source is already an Artifact."""
+        if isinstance(source, Artifact):
+            return source
+        return cls(name=Path(source).name, path=source)
+
+    @classmethod
+    def from_image(cls, image, name: str = "artifact.png", sources: list = ()) -> "Artifact":
+        return cls(image=image, name=name, sources=sources)
+
+    @classmethod
+    def download(cls, url: str, name: str = "artifact.png", sources: list = ()) -> "Artifact":
+        import httpx
+
+        response = httpx.get(url)
+        response.raise_for_status()
+        return cls(data=response.content, name=name, sources=sources)
+
+    @property
+    def lineage(self) -> list:
+        """Registry parents for outputs made from this: its file once saved, else its sources."""
+        return [self.path] if self.path is not None else self.sources
+
+    @property
+    def data(self) -> bytes:
+        """Encoded bytes (PNG when built from an image), read or encoded on first use."""
+        if self._data is None:
+            if self.path is not None and self._image is None:
+                self._data = self.path.read_bytes()
+            else:
+                buffer = io.BytesIO()
+                self._image.save(buffer, "PNG")
+                self._data = buffer.getvalue()
+        return self._data
+
+    @property
+    def image(self):
+        """Decoded PIL image, decoded on first use (treat as read-only; copy before editing)."""
+        if self._image is None:
+            from PIL import Image
+
+            self._image = Image.open(io.BytesIO(self.data))
+            self._image.load()
+        return self._image
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.data).hexdigest()
+
+    def upload(self, content_type: str = "image/png") -> str:
+        """Upload the bytes to fal storage without a temp file; returns the URL."""
+        import fal_client
+
+        return api_limits.call("fal_upload", fal_client.upload, self.data, content_type)
+
+    def save(self, path: Path) -> Path:
+        """Write the bytes to path atomically (no re-encode of downloaded data)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.data)
+        os.replace(temp_path, path)
+        self.path = path
+        return path
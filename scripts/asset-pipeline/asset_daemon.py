@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Local asset-generation daemon.
+
+A long-running service that wraps the pipeline steps behind an HTTP job
+API, so the game engine (or anyone) can request assets on demand and
+generation throughput is managed in one place instead of per shell:
+
+    POST   /jobs        {"type": "citizen_spin", "params": {...}, "priority": "interactive"}
+    GET    /jobs/<id>   job status (queued, running, done, failed, cancelled)
+    GET    /jobs        all known jobs
+    DELETE /jobs/<id>   cancel a queued job
+    GET    /health      queue depth and workers
+
+Jobs run in priority order ("interactive" before "normal" before "bulk",
+or any integer, lower first). A running job is never interrupted; instead
+bulk isometric requests for a glob or manifest are split into one job per
+model, so an interactive request waits for at most one model. Submitting
+a job identical to one that is still queued or running returns the
+existing job (raising its priority if needed) instead of doing the work
+twice. Each worker thread owns one Blender backend for its whole life, so
+with --backend bpy the Blender instances stay warm between jobs, and all
+of them share the warmed shader cache (see blender_utils).
+
+Usage:
+    python asset_daemon.py --port 8765 --workers 2 --backend bpy
+    curl -X POST localhost:8765/jobs -d '{"type": "council_member",
+         "params": {"member_id": "mayor_clawrence", "rerender_only": true}, "priority": "interactive"}'
+"""
+
+import argparse
+import hashlib
+import heapq
+import importlib.util
+import itertools
+import json
+import threading
+import time
+import traceback
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from blender_backend import BACKENDS, get_backend
+
+PRIORITIES = {"interactive": 0, "normal": 5, "bulk": 10}
+MAX_FINISHED_JOBS = 500
+
+
+def _load_citizen_spins():
+    """generate-citizen-spins.py is not importable by name (hyphens)."""
+    path = Path(__file__).parent.parent.parent / "apps" / "web" / "scripts" / "avatar-gen" / "generate-citizen-spins.py"
+    spec = importlib.util.spec_from_file_location("generate_citizen_spins", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Job handlers: (params, backend) -> result dict. They call the same step
+# functions as the CLIs; failures raise (or sys.exit, which is caught).
+
+def run_isometric(params: dict, backend) -> dict:
+    from pipeline import load_render_jobs, render_isometric_batch, sprite_paths
+
+    output_dir = Path(params["output_dir"]) if params.get("output_dir") else None
+    jobs = load_render_jobs(params["model"], output_dir, params.get("name"), params.get("orientation"),
+                            params.get("lighting") == "soft")
+    for job in jobs:
+        job["resolution"] = params.get("resolution", 512)
+    render_isometric_batch(jobs, frame_budget=params.get("frame_budget", 0.0), backend=backend)
+    return {"sprites": [str(path) for job in jobs for path in sprite_paths(job)]}
+
+
+def run_council_member(params: dict, backend) -> dict:
+    from generate_council_avatars import generate_member
+
+    output_dir = Path(params.get("output_dir", "./output/council"))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    member_id = params["member_id"]
+    generate_member(member_id, output_dir, params.get("skip_generate", False), params.get("rerender_only", False),
+                    params.get("frame_budget", 0.0), None, params.get("spritesheet"), params.get("gif", True),
+                    params.get("frame_timeout", 120.0), backend)
+    return {"static": str(output_dir / f"{member_id}.png"), "spin": str(output_dir / f"{member_id}_spin.gif")}
+
+
+def run_citizen_spin(params: dict, backend) -> dict:
+    citizens = _load_citizen_spins()
+    citizens.WORK_DIR.mkdir(parents=True, exist_ok=True)
+    citizens.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    avatar_id = params["avatar_id"]
+    ok = citizens.process_avatar(avatar_id, params.get("skip_existing", False), params.get("frame_budget", 0.0),
+                                 params.get("spritesheet"), params.get("gif", True),
+                                 params.get("frame_timeout", 120.0), backend)
+    if not ok:
+        raise RuntimeError(f"Citizen avatar {avatar_id} failed (see daemon log)")
+    output_name = avatar_id.replace("citizen_lobster_", "citizen_")
+    return {"static": str(citizens.OUTPUT_DIR / f"{output_name}.png"),
+            "spin": str(citizens.OUTPUT_DIR / f"{output_name}_spin.gif")}
+
+
+def run_tile(params: dict, backend) -> dict:
+    from pipeline import generate_tile, process_tile
+
+    output_dir = Path(params.get("output_dir", "./output"))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    name = params["name"]
+    if params.get("texture"):
+        texture_path = Path(params["texture"])
+    else:
+        texture_path = generate_tile(params["prompt"], output_dir / f"{name}.png")
+    outputs = process_tile(texture_path, output_dir, name, tuple(params.get("variants", ("iso", "cube"))),
+                           params.get("seam_threshold", 1.5), params.get("fix_seams", False))
+    return {variant: str(path) for variant, path in outputs.items()}
+
+
+def run_preview(params: dict, backend) -> dict:
+    from pipeline import load_render_jobs
+    from preview import preview_jobs
+
+    output_dir = Path(params.get("output_dir", "./output"))
+    jobs = load_render_jobs(params["model"], output_dir)
+    sheet_path = output_dir / "contact_sheet.png"
+    previews = preview_jobs(jobs, params.get("size", 128), params.get("frames", 1), sheet_path)
+    if not previews:
+        raise RuntimeError(f"No models matched {params['model']}" if not jobs else "None of the matched models could be previewed")
+    return {"previews": [str(path) for path in previews], "contact_sheet": str(sheet_path)}
+
+
+# type -> (handler, required params)
+JOB_TYPES = {
+    "isometric": (run_isometric, ("model",)),
+    "council_member": (run_council_member, ("member_id",)),
+    "citizen_spin": (run_citizen_spin, ("avatar_id",)),
+    "tile": (run_tile, ("name",)),
+    "preview": (run_preview, ("model",)),
+}
+
+
+def parse_priority(value) -> int:
+    if value is None:
+        return PRIORITIES["normal"]
+    if isinstance(value, str):
+        if value not in PRIORITIES:
+            raise ValueError(f"Unknown priority {value!r} (expected one of {', '.join(PRIORITIES)} or an integer)")
+        return PRIORITIES[value]
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError("priority must be a name or an integer")
+    return value
+
+
+def job_key(job_type: str, params: dict) -> str:
+    """Identity of a request for dedupe: the type plus canonical params."""
+    canonical = json.dumps({"type": job_type, "params": params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _timestamp(value: float):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(value)) if value else None
+
+
+class Job:
+    def __init__(self, job_type: str, params: dict, priority: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.type = job_type
+        self.params = params
+        self.priority = priority
+        self.key = job_key(job_type, params)
+        self.status = "queued"
+        self.requests = 1
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+
+    def to_dict(self, position: int = None) -> dict:
+        data = {
+            "id": self.id,
+            "type": self.type,
+            "params": self.params,
+            "priority": self.priority,
+            "status": self.status,
+            "requests": self.requests,
+            "submitted": _timestamp(self.submitted),
+            "started": _timestamp(self.started),
+            "finished": _timestamp(self.finished),
+        }
+        if position is not None:
+            data["position"] = position
+        if self.started:
+            data["seconds"] = round((self.finished or time.time()) - self.started, 2)
+        if self.result is not None:
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class JobQueue:
+    """Priority queue of jobs with dedupe of identical in-flight requests."""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._jobs = {}
+        self._in_flight = {}  # job key -> queued/running job
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def submit(self, job_type: str, params: dict, priority: int) -> tuple:
+        """Queue a job; returns (job, deduped). A duplicate returns the in-flight job."""
+        with self._cond:
+            key = job_key(job_type, params)
+            existing = self._in_flight.get(key)
+            if existing is not None:
+                existing.requests += 1
+                if existing.status == "queued" and priority < existing.priority:
+                    # Re-push at the new priority; the old heap entry is skipped when popped
+                    existing.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._counter), existing.id))
+                    self._cond.notify()
+                return existing, True
+
+            job = Job(job_type, params, priority)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+            heapq.heappush(self._heap, (priority, next(self._counter), job.id))
+            self._prune()
+            self._cond.notify()
+            return job, False
+
+    def next_job(self):
+        """Block until a job is available; returns None once the queue is closed."""
+        with self._cond:
+            while True:
+                while self._heap and not self._closed:
+                    priority, _, job_id = heapq.heappop(self._heap)
+                    job = self._jobs.get(job_id)
+                    if job is None or job.status != "queued" or job.priority != priority:
+                        continue
+                    job.status = "running"
+                    job.started = time.time()
+                    return job
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+    def finish(self, job: Job, result: dict = None, error: str = None) -> None:
+        with self._cond:
+            job.finished = time.time()
+            job.status = "failed" if error else "done"
+            job.result = result
+            job.error = error
+            self._in_flight.pop(job.key, None)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job; running jobs cannot be cancelled."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return False
+            job.status = "cancelled"
+            job.finished = time.time()
+            self._in_flight.pop(job.key, None)
+            return True
+
+    def status(self, job_id: str):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return job.to_dict(self._position(job))
+
+    def all_status(self) -> list:
+        with self._cond:
+            return [job.to_dict(self._position(job)) for job in self._jobs.values()]
+
+    def counts(self) -> dict:
+        with self._cond:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _position(self, job: Job):
+        """0-based place in line for a queued job."""
+        if job.status != "queued":
+            return None
+        ahead = [j for j in self._jobs.values() if j.status == "queued" and
+                 (j.priority, j.submitted) < (job.priority, job.submitted)]
+        return len(ahead)
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in sorted(finished, key=lambda j: j.finished)[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+
+class AssetDaemon:
+    """Job queue plus worker threads, each holding one warm Blender backend."""
+
+    def __init__(self, workers: int = 1, backend: str = "subprocess"):
+        self.queue = JobQueue()
+        self.backend_name = backend
+        self.threads = [threading.Thread(target=self._worker, args=(index,), daemon=True)
+                        for index in range(max(1, workers))]
+
+    def start(self) -> None:
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self.queue.close()
+        for thread in self.threads:
+            thread.join()
+
+    def submit(self, request: dict) -> list:
+        """Validate a POST /jobs body and queue it; returns [(job, deduped)]."""
+        job_type = request.get("type")
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type {job_type!r} (expected one of {', '.join(JOB_TYPES)})")
+        params = request.get("params") or {}
+        if not isinstance(params, dict):
+            raise ValueError("params must be an object")
+        missing = [name for name in JOB_TYPES[job_type][1] if name not in params]
+        if missing:
+            raise ValueError(f"{job_type} jobs need params: {', '.join(missing)}")
+        priority = parse_priority(request.get("priority"))
+
+        if job_type == "isometric":
+            # One job per model, so interactive work can slot in between models
+            from pipeline import load_render_jobs
+
+            output_dir = Path(params["output_dir"]) if params.get("output_dir") else None
+            models = load_render_jobs(params["model"], output_dir, params.get("name"), params.get("orientation"),
+                                      params.get("lighting") == "soft")
+            if len(models) > 1:
+                return [self.queue.submit(job_type, {
+                    **params,
+                    "model": model["model_path"],
+                    "output_dir": str(Path(model["output_path"]).parent),
+                    "name": Path(model["output_path"]).name[:-len("_sprite.png")],
+                    "lighting": model["lighting"],
+                    "orientation": model["orientation"],
+                }, priority) for model in models]
+        return [self.queue.submit(job_type, params, priority)]
+
+    def _worker(self, index: int) -> None:
+        backend = get_backend(self.backend_name)
+        backend.start()
+        try:
+            while True:
+                job = self.queue.next_job()
+                if job is None:
+                    return
+                print(f"[worker {index}] {job.type} {job.id} (priority {job.priority}) started")
+                handler = JOB_TYPES[job.type][0]
+                try:
+                    result = handler(job.params, backend)
+                    self.queue.finish(job, result=result)
+                except SystemExit as e:
+                    self.queue.finish(job, error=f"Step exited with code {e.code}")
+                except Exception as e:
+                    traceback.print_exc()
+                    self.queue.finish(job, error=f"{type(e).__name__}: {e}")
+                print(f"[worker {index}] {job.type} {job.id} {job.status}")
+        finally:
+            backend.close()
+
+
+def make_handler(daemon: AssetDaemon):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body) -> None:
+            data = json.dumps(body, indent=2).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _job_id(self):
+            parts = self.path.strip("/").split("/")
+            return parts[1] if len(parts) == 2 and parts[0] == "jobs" else None
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/health":
+                self._send(200, {"workers": len(daemon.threads), "backend": daemon.backend_name,
+                                 "jobs": daemon.queue.counts()})
+            elif self.path.rstrip("/") == "/jobs":
+                self._send(200, {"jobs": daemon.queue.all_status()})
+            elif self._job_id():
+                status = daemon.queue.status(self._job_id())
+                self._send(200 if status else 404, status or {"error": "unknown job"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                submitted = daemon.submit(request)
+            except (ValueError, AttributeError, OSError) as e:
+                self._send(400, {"error": str(e)})
+                return
+            self._send(202, {"jobs": [dict(job.to_dict(), deduped=deduped) for job, deduped in submitted]})
+
+        def do_DELETE(self):
+            job_id = self._job_id()
+            if job_id and daemon.queue.cancel(job_id):
+                self._send(200, daemon.queue.status(job_id))
+            else:
+                self._send(409, {"error": "only queued jobs can be cancelled"})
+
+        def log_message(self, format, *args):
+            # Status polling would drown out the render logs
+            if self.command != "GET":
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local asset-generation daemon (HTTP job API)")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=1, help="Jobs run in parallel (one Blender each)")
+    parser.add_argument("--backend", choices=BACKENDS, default="subprocess",
+                        help="Blender backend per worker; bpy keeps Blender warm between jobs")
+    args = parser.parse_args()
+
+    daemon = AssetDaemon(args.workers, args.backend)
+    daemon.start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(daemon))
+    print(f"Asset daemon on http://{args.host}:{args.port} ({args.workers} worker(s), {args.backend} backend)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down after running jobs finish...")
+    finally:
+        server.server_close()
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
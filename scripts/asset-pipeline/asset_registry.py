@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+SQLite registry of generated assets and their lineage.
+
+Every pipeline step that writes an artifact records it here: content
+hash, size, kind, the parameters and renderer that produced it, how long
+it took, and the hashes of the files it was made from (concept -> GLB ->
+sprite -> scale variant). Questions that used to need a full-tree scan
+or a re-render become indexed queries:
+
+    python asset_registry.py stale             # sprites rendered by an older renderer/lighting
+    python asset_registry.py outdated          # artifacts whose parents have been regenerated
+    python asset_registry.py large --min-kb 200
+    python asset_registry.py lineage apps/web/public/assets/buildings/core/town_hall_sprite_0.png
+    python asset_registry.py scan ../../apps/web/public/assets   # index files made before the registry
+
+Paths are stored relative to the repository root. A renderer id is
+"<name>@<hash of the script that renders>", so changing e.g. the
+isometric lighting energies changes the id of every sprite made after it.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+REGISTRY_DB = Path(os.getenv("ASSET_REGISTRY_DB", Path(__file__).resolve().parent / "asset_registry.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    params TEXT,
+    renderer TEXT,
+    seconds REAL,
+    created REAL NOT NULL,
+    current INTEGER NOT NULL DEFAULT 1,
+    UNIQUE (path, hash)
+);
+CREATE INDEX IF NOT EXISTS artifacts_path ON artifacts (path, current);
+CREATE INDEX IF NOT EXISTS artifacts_hash ON artifacts (hash);
+CREATE INDEX IF NOT EXISTS artifacts_kind ON artifacts (kind, renderer) WHERE current = 1;
+CREATE INDEX IF NOT EXISTS artifacts_size ON artifacts (size) WHERE current = 1;
+CREATE TABLE IF NOT EXISTS lineage (
+    child TEXT NOT NULL,
+    parent TEXT NOT NULL,
+    PRIMARY KEY (child, parent)
+);
+CREATE INDEX IF NOT EXISTS lineage_parent ON lineage (parent);
+CREATE TABLE IF NOT EXISTS conversions (
+    phash TEXT NOT NULL,
+    converter TEXT NOT NULL,
+    model TEXT NOT NULL,
+    model_hash TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (phash, converter, model)
+);
+"""
+
+# Filename patterns -> kind, for scan and for callers that do not say
+KIND_SUFFIXES = [
+    ("_concept.png", "concept"),
+    ("_iso.png", "tile_iso"),
+    ("_cube.png", "tile_cube"),
+    ("_tile.png", "tile"),
+    ("_spin.gif", "spin"),
+    ("_spin.webp", "spritesheet"),
+    ("_spin.png", "spritesheet"),
+    ("_preview.png", "preview"),
+    (".glb", "model"),
+    (".gif", "animation"),
+]
+
+_hash_cache = {}
+_lock = threading.Lock()
+
+
+def repo_relative(path) -> str:
+    """Path relative to the repository root (POSIX), or absolute if outside it."""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def content_hash(path) -> str:
+    """SHA-256 of a file, cached by (path, size, mtime) so large GLBs are hashed once."""
+    path = Path(path)
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if key not in _hash_cache:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _hash_cache[key] = digest.hexdigest()
+    return _hash_cache[key]
+
+
+def renderer_id(name: str, script: str) -> str:
+    """Version a renderer by the script it runs, e.g. "blender-isometric@1a2b3c4d5e6f"."""
+    return f"{name}@{hashlib.sha256(script.encode()).hexdigest()[:12]}"
+
+
+def _parent_hash(parent):
+    """Hash of a parent given as a path, or the hash itself; None if the file is gone."""
+    if parent is None:
+        return None
+    if isinstance(parent, str) and len(parent) == 64 and not Path(parent).exists():
+        return parent
+    return content_hash(parent) if Path(parent).exists() else None
+
+
+def checkpoint_renderer(name: str, frames_dir) -> str:
+    """Renderer id of a spin render, from the fingerprint prepare_frames_dir() left with its frames."""
+    checkpoint_path = Path(frames_dir) / ".checkpoint.json"
+    if not checkpoint_path.exists():
+        return None
+    return f"{name}@{json.loads(checkpoint_path.read_text())['script'][:12]}"
+
+
+def guess_kind(path) -> str:
+    name = Path(path).name
+    if "_sprite_" in name:
+        return "sprite"
+    for suffix, kind in KIND_SUFFIXES:
+        if name.endswith(suffix):
+            return kind
+    return "image" if name.endswith((".png", ".webp", ".jpg")) else "other"
+
+
+class Registry:
+    def __init__(self, db_path: Path = None):
+        self.db_path = Path(db_path or REGISTRY_DB)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=60.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def register(self, path, kind: str = None, parents=(), params: dict = None, renderer: str = None,
+                 seconds: float = None) -> str:
+        """
+        Record an artifact that was just written; returns its hash.
+
+        parents are the files (paths) or hashes it was made from. The
+        previous version at the same path stays in the table with current=0.
+        """
+        path = Path(path)
+        digest = content_hash(path)
+        parent_hashes = [h for h in map(_parent_hash, parents) if h]
+        relative = repo_relative(path)
+        with _lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE artifacts SET current = 0 WHERE path = ? AND hash != ?", (relative, digest))
+            conn.execute(
+                "INSERT INTO artifacts (path, hash, kind, size, params, renderer, seconds, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(path, hash) DO UPDATE SET current = 1, "
+                "kind = excluded.kind, params = COALESCE(excluded.params, params), "
+                "renderer = COALESCE(excluded.renderer, renderer), seconds = COALESCE(excluded.seconds, seconds), "
+                "created = excluded.created",
+                (relative, digest, kind or guess_kind(path), path.stat().st_size,
+                 json.dumps(params, sort_keys=True, default=str) if params is not None else None,
+                 renderer, round(seconds, 3) if seconds is not None else None, time.time()))
+            conn.executemany("INSERT OR IGNORE INTO lineage (child, parent) VALUES (?, ?)",
+                             [(digest, parent) for parent in parent_hashes if parent != digest])
+            conn.execute("COMMIT")
+        return digest
+
+    def register_many(self, paths, kind: str = None, **kwargs) -> list:
+        """register() every path that exists (e.g. optional GIF/spritesheet outputs)."""
+        return [self.register(path, kind, **kwargs) for path in paths if path and Path(path).exists()]
+
+    def stale(self, current_renderers: dict) -> list:
+        """Current artifacts made by an older version of a renderer ({name: current id})."""
+        rows = []
+        with self._connect() as conn:
+            for name, current_id in current_renderers.items():
+                rows += conn.execute(
+                    "SELECT * FROM artifacts WHERE current = 1 AND renderer LIKE ? AND renderer != ? ORDER BY path",
+                    (f"{name}@%", current_id)).fetchall()
+        return rows
+
+    def outdated(self) -> list:
+        """Current artifacts with a parent that is no longer the current content of any path."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT DISTINCT a.* FROM artifacts a JOIN lineage l ON l.child = a.hash "
+                "WHERE a.current = 1 AND NOT EXISTS "
+                "(SELECT 1 FROM artifacts p WHERE p.hash = l.parent AND p.current = 1) ORDER BY a.path").fetchall()
+
+    def larger_than(self, size: int, kind: str = None) -> list:
+        with self._connect() as conn:
+            if kind:
+                return conn.execute("SELECT * FROM artifacts WHERE current = 1 AND size > ? AND kind = ? "
+                                    "ORDER BY size DESC", (size, kind)).fetchall()
+            return conn.execute("SELECT * FROM artifacts WHERE current = 1 AND size > ? ORDER BY size DESC",
+                                (size,)).fetchall()
+
+    def lineage(self, path, descendants: bool = False) -> list:
+        """Ancestors (or descendants) of a path's current version, nearest first."""
+        join = "l.parent = t.hash" if descendants else "l.child = t.hash"
+        step = "l.child" if descendants else "l.parent"
+        with self._connect() as conn:
+            return conn.execute(
+                f"WITH RECURSIVE tree(hash, depth) AS ("
+                f"  SELECT hash, 0 FROM artifacts WHERE path = ? AND current = 1"
+                f"  UNION SELECT {step}, depth + 1 FROM lineage l JOIN tree t ON {join} WHERE depth < 20"
+                f") SELECT a.*, MIN(t.depth) AS depth FROM tree t JOIN artifacts a ON a.hash = t.hash "
+                f"WHERE t.depth > 0 GROUP BY a.id ORDER BY depth, a.path",
+                (repo_relative(path),)).fetchall()
+
+    def record_conversion(self, phash: int, converter: str, model_path) -> None:
+        """Remember that an input with this perceptual hash was converted into model_path."""
+        with _lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO conversions (phash, converter, model, model_hash, created) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         (f"{phash:016x}", converter, repo_relative(model_path), content_hash(model_path), time.time()))
+
+    def similar_conversions(self, phash: int, converter: str, max_distance: int) -> list:
+        """
+        (distance, model path) of earlier conversions whose input hashed within
+        max_distance bits of phash, nearest first. Models that were deleted or
+        overwritten since are skipped. The index is small (one row per
+        conversion), so the Hamming distances are computed here, not in SQL.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT phash, model, model_hash FROM conversions WHERE converter = ?",
+                                (converter,)).fetchall()
+        matches = []
+        for row in rows:
+            distance = bin(int(row["phash"], 16) ^ phash).count("1")
+            model = Path(row["model"]) if Path(row["model"]).is_absolute() else REPO_ROOT / row["model"]
+            if distance <= max_distance and model.exists() and content_hash(model) == row["model_hash"]:
+                matches.append((distance, model))
+        return sorted(matches)
+
+    def scan(self, root: Path) -> int:
+        """Index files that are not registered yet (hash, size, kind from the name; no lineage)."""
+        added = 0
+        with self._connect() as conn:
+            known = {(row["path"], row["hash"]) for row in conn.execute("SELECT path, hash FROM artifacts")}
+        for path in sorted(Path(root).rglob("*")):
+            if not path.is_file() or path.name.startswith(".") or "/frames/" in path.as_posix():
+                continue
+            if (repo_relative(path), content_hash(path)) not in known:
+                self.register(path)
+                added += 1
+        return added
+
+
+_registry = None
+
+
+def registry() -> Registry:
+    """Process-wide registry at ASSET_REGISTRY_DB."""
+    global _registry
+    with _lock:
+        if _registry is None:
+            _registry = Registry()
+    return _registry
+
+
+def current_renderers() -> dict:
+    """{name: id} of the versioned renderers as the code stands now (sprite lighting lives in pipeline.py)."""
+    from pipeline import ISOMETRIC_RENDERER
+
+    return {ISOMETRIC_RENDERER.split("@")[0]: ISOMETRIC_RENDERER}
+
+
+def _print_rows(rows, columns=("path", "kind", "size", "renderer")) -> None:
+    for row in rows:
+        print("  ".join(f"{row[c]}" for c in columns))
+    print(f"({len(rows)} artifact(s))")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the asset registry")
+    parser.add_argument("--db", type=str, help=f"Registry database (default {REGISTRY_DB})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stale", help="Artifacts rendered by an older renderer version (e.g. before a lighting change)")
+    sub.add_parser("outdated", help="Artifacts whose source files have been regenerated since")
+    p = sub.add_parser("large", help="Artifacts above a size")
+    p.add_argument("--min-kb", type=float, default=200)
+    p.add_argument("--kind", type=str)
+    p = sub.add_parser("lineage", help="What a file was made from (or, with --dependents, what was made from it)")
+    p.add_argument("path")
+    p.add_argument("--dependents", action="store_true")
+    p = sub.add_parser("scan", help="Index existing files under a directory")
+    p.add_argument("root", nargs="?", default=str(REPO_ROOT / "apps" / "web" / "public" / "assets"))
+    args = parser.parse_args()
+
+    reg = Registry(Path(args.db)) if args.db else registry()
+    if args.command == "stale":
+        _print_rows(reg.stale(current_renderers()))
+    elif args.command == "outdated":
+        _print_rows(reg.outdated())
+    elif args.command == "large":
+        _print_rows(reg.larger_than(int(args.min_kb * 1024), args.kind))
+    elif args.command == "lineage":
+        _print_rows(reg.lineage(args.path, args.dependents), ("depth", "path", "kind", "renderer", "params"))
+    elif args.command == "scan":
+        print(f"Indexed {reg.scan(Path(args.root))} new file(s) in {reg.db_path}")
+
+
+if __name__ == "__main__":
+    main()
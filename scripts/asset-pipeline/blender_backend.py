@@ -0,0 +1,228 @@
+"""
+Render backends for the embedded Blender scripts.
+
+Both backends run the same script text with the same arguments and return
+the frames it rendered as a FrameArrays mapping (path -> RGBA uint8 array):
+
+- "subprocess" launches the Blender binary for every run (the default).
+- "bpy" imports Blender as a Python module (`pip install bpy`) in one
+  persistent worker process, so repeated runs skip Blender start-up and
+  frames come back as arrays without the caller reopening PNGs. Shaders
+  compiled by its first render stay loaded, so it skips the warm-up job.
+
+The bpy worker lives in a child process because bpy keeps global state and
+cannot be interrupted from another thread; a stalled render is handled by
+terminating the worker and starting a fresh one, like run_blender() does.
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import traceback
+from collections.abc import Mapping
+
+import numpy as np
+from PIL import Image
+
+from blender_utils import FrameProgress, find_blender, run_blender, shader_cache_env, warm_shader_cache
+
+BACKENDS = ("subprocess", "bpy")
+
+
+class FrameArrays(Mapping):
+    """
+    Frames written by a render run, decoded to RGBA arrays on first access.
+
+    times holds the render time of each frame this run actually rendered
+    (skipped frames excluded), first frame first, for the run report.
+    """
+
+    def __init__(self, paths: list, arrays: dict = None, times: list = None):
+        self.paths = list(dict.fromkeys(paths))
+        self.times = list(times or [])
+        self._arrays = dict(arrays or {})
+
+    def __getitem__(self, path):
+        if path not in self.paths:
+            raise KeyError(path)
+        if path not in self._arrays:
+            with Image.open(path) as img:
+                self._arrays[path] = np.asarray(img.convert("RGBA"))
+        return self._arrays[path]
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+
+class SubprocessBackend:
+    """Run each script in a fresh `blender --background` process (sharing the shader cache)."""
+
+    name = "subprocess"
+
+    def run_script(self, script: str, args: list, frame_timeout: float = 120.0,
+                   startup_timeout: float = 300.0, retries: int = 1):
+        """Run a Blender script; returns its FrameArrays, or None if Blender failed."""
+        warm_shader_cache()
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
+            f.write(script)
+            script_path = f.name
+
+        progress = FrameProgress()
+        cmd = [find_blender(), "--background", "--python", script_path, "--", *[str(a) for a in args]]
+        try:
+            ok = run_blender(cmd, frame_timeout, startup_timeout, retries, progress)
+        finally:
+            os.unlink(script_path)
+        return FrameArrays(progress.paths, times=progress.times) if ok else None
+
+    def start(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+def _bpy_worker(conn):
+    """Persistent worker: execute scripts with the bpy module and stream results back."""
+    # Before bpy creates its GPU context, so the driver uses the shared cache
+    os.environ.update(shader_cache_env())
+    try:
+        import bpy
+    except ImportError:
+        conn.send(("line", "ERROR: bpy module not available (pip install bpy, matching Python version)"))
+        conn.send(("done", 1))
+        return
+
+    def capture(path):
+        # Only 8-bit frames: float light passes (EXR) are read from disk by
+        # the script itself and would not survive a uint8 conversion
+        if not path.lower().endswith(".png"):
+            return
+        # Render Result has no pixel buffer in background mode, so read back
+        # the frame that was just written while it is still in the OS cache
+        image = bpy.data.images.load(path, check_existing=False)
+        try:
+            width, height = image.size
+            pixels = np.empty(width * height * 4, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+        finally:
+            bpy.data.images.remove(image)
+        array = (np.clip(np.flipud(pixels.reshape(height, width, 4)), 0.0, 1.0) * 255 + 0.5).astype(np.uint8)
+        conn.send(("frame", (path, array)))
+
+    conn.send(("ready", bpy.app.version_string))
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        script, args = task
+        bpy.ops.wm.read_factory_settings(use_empty=True)
+        sys.argv = ["bpy", "--", *args]
+        scope = {
+            "__name__": "__main__",
+            "FRAME_REPORT": lambda line: conn.send(("line", line)),
+            "FRAME_CAPTURE": capture,
+        }
+        code = 0
+        try:
+            exec(compile(script, "<blender script>", "exec"), scope)
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            for line in traceback.format_exc().splitlines():
+                conn.send(("line", f"ERROR: {line}"))
+            code = 1
+        conn.send(("done", code))
+
+
+class BpyBackend:
+    """Run scripts in a warm worker process that imports Blender as the bpy module."""
+
+    name = "bpy"
+
+    def __init__(self):
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+
+    def start(self, startup_timeout: float = 300.0) -> bool:
+        """Start the worker ahead of the first script (run_script starts it on demand)."""
+        return self._process is not None or self._start(startup_timeout)
+
+    def _start(self, startup_timeout: float) -> bool:
+        self._conn, child = self._context.Pipe()
+        self._process = self._context.Process(target=_bpy_worker, args=(child,), daemon=True)
+        self._process.start()
+        child.close()
+        if not self._conn.poll(startup_timeout):
+            print(f"ERROR: bpy worker did not start within {startup_timeout:.0f}s")
+            self.close()
+            return False
+        kind, value = self._conn.recv()
+        if kind != "ready":
+            print(value)
+            self.close()
+            return False
+        print(f"bpy worker ready (Blender {value})")
+        return True
+
+    def run_script(self, script: str, args: list, frame_timeout: float = 120.0,
+                   startup_timeout: float = 300.0, retries: int = 1):
+        """Run a Blender script in the worker; returns its FrameArrays, or None on failure."""
+        progress = FrameProgress()
+        arrays = {}
+        for attempt in range(retries + 1):
+            if attempt:
+                print(f"Restarting bpy worker (attempt {attempt + 1}/{retries + 1}); finished frames are kept")
+            if self._process is None and not self._start(startup_timeout):
+                return None
+
+            self._conn.send((script, [str(a) for a in args]))
+            # Scene setup counts as start-up, after that each frame must finish in time
+            timeout = startup_timeout
+            while True:
+                if not self._conn.poll(timeout):
+                    print(f"STALL: no frame finished in {timeout:.0f}s, killing bpy worker")
+                    self.close()
+                    break
+                kind, value = self._conn.recv()
+                if kind == "line":
+                    if progress.handle(value):
+                        timeout = frame_timeout
+                elif kind == "frame":
+                    arrays[value[0]] = value[1]
+                elif kind == "done":
+                    if value != 0:
+                        print(f"ERROR: Blender script exited with code {value}")
+                        return None
+                    return FrameArrays(progress.paths, arrays, progress.times)
+        return None
+
+    def close(self):
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            try:
+                self._conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(5)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+        self._conn.close()
+        self._process = None
+        self._conn = None
+
+
+def get_backend(name: str = "subprocess"):
+    """Backend instance for --backend; call close() when done."""
+    if name == "bpy":
+        return BpyBackend()
+    if name == "subprocess":
+        return SubprocessBackend()
+    raise ValueError(f"Unknown render backend: {name} (expected one of {', '.join(BACKENDS)})")
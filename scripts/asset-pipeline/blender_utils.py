@@ -0,0 +1,593 @@
+"""
+Shared Blender helpers for the asset pipeline scripts.
+
+Used by pipeline.py, generate_council_avatars.py, generate_sigil.py and the
+citizen avatar scripts in apps/web/scripts/avatar-gen.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+
+# Where GPU drivers and Blender keep compiled shaders/kernels. Pointing every
+# Blender process at one directory lets the EEVEE material shaders compiled
+# by one run (or by warm_shader_cache()) be reused by all later runs and
+# workers instead of being rebuilt on each launch's first frame.
+SHADER_CACHE_DIR = Path(os.getenv("BLENDER_SHADER_CACHE_DIR", Path.home() / ".cache" / "clawntawn" / "blender"))
+
+
+def shader_cache_env(cache_dir: Path = None) -> dict:
+    """Environment variables that redirect shader/kernel caches into cache_dir."""
+    cache_dir = Path(cache_dir or SHADER_CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return {
+        # Mesa (Intel/AMD/llvmpipe) GL shader cache
+        "MESA_SHADER_CACHE_DIR": str(cache_dir / "mesa"),
+        "MESA_SHADER_CACHE_MAX_SIZE": "4G",
+        # NVIDIA GL shader cache, kept across driver cleanups
+        "__GL_SHADER_DISK_CACHE": "1",
+        "__GL_SHADER_DISK_CACHE_PATH": str(cache_dir / "nvidia"),
+        "__GL_SHADER_DISK_CACHE_SKIP_CLEANUP": "1",
+        # CUDA/OptiX JIT kernels and Blender's own cache dir (Cycles kernels, Vulkan pipelines)
+        "CUDA_CACHE_PATH": str(cache_dir / "cuda"),
+        "XDG_CACHE_HOME": str(cache_dir / "xdg"),
+    }
+
+
+def blender_env(cache_dir: Path = None) -> dict:
+    """os.environ plus the shared shader cache, for launching Blender."""
+    return {**os.environ, **shader_cache_env(cache_dir)}
+
+
+def find_blender() -> str:
+    """Find the Blender executable (macOS app bundle or `blender` on PATH)."""
+    blender_paths = [
+        "/Applications/Blender.app/Contents/MacOS/Blender",  # macOS
+        "blender",  # Linux/Windows (if in PATH)
+    ]
+    for path in blender_paths:
+        if os.path.exists(path) or path == "blender":
+            return path
+
+    print("ERROR: Blender not found. Install from https://blender.org")
+    sys.exit(1)
+
+
+# Blender-side frame budget controller. Prepended to the Blender scripts so
+# every renderer (isometric sprites, avatar spins, sigil spin) shares it.
+FRAME_BUDGET_SNIPPET = '''
+import bpy
+import math
+import os
+import time
+
+MIN_SAMPLES = 4
+MIN_RESOLUTION_PERCENTAGE = 50
+
+
+def report(line):
+    """Send a progress line to the backend running this script (stdout for a Blender process)."""
+    callback = globals().get("FRAME_REPORT")
+    if callback is not None:
+        callback(line)
+    else:
+        print(line, flush=True)
+
+
+class FrameBudget:
+    """
+    Keep per-frame render time under a budget (seconds) on CPU-only boxes.
+
+    The first frame renders at full quality and is timed. The rest of the
+    batch gets its sample count scaled to fit the budget; if that is not
+    enough, render resolution drops too and the pipeline upscales the
+    frames back to the target size afterwards. A budget of 0 disables it.
+    """
+
+    def __init__(self, scene, budget):
+        self.scene = scene
+        self.budget = budget
+        self.calibrated = False
+        self.times = []
+        if budget and scene.render.engine == 'CYCLES':
+            # Denoising cleans up the low sample counts the budget may pick
+            scene.cycles.use_denoising = True
+
+    def _get_samples(self):
+        if self.scene.render.engine == 'CYCLES':
+            return self.scene.cycles.samples
+        return self.scene.eevee.taa_render_samples
+
+    def _set_samples(self, samples):
+        if self.scene.render.engine == 'CYCLES':
+            self.scene.cycles.samples = samples
+        else:
+            self.scene.eevee.taa_render_samples = samples
+
+    def render(self, filepath):
+        """Render one still to filepath, calibrating after the first frame."""
+        # Write under a temporary name and rename, so an interrupted run
+        # never leaves a truncated frame behind for the resume check
+        root, ext = os.path.splitext(filepath)
+        partial_path = f"{root}.partial{ext}"
+        self.scene.render.filepath = partial_path
+        start = time.time()
+        bpy.ops.render.render(write_still=True)
+        os.replace(partial_path, filepath)
+        elapsed = time.time() - start
+        # In-process (bpy module) runs hand the frame back as an array
+        capture = globals().get("FRAME_CAPTURE")
+        if capture is not None:
+            capture(filepath)
+        self.times.append(elapsed)
+        if self.budget and not self.calibrated:
+            self.calibrated = True
+            self._calibrate(elapsed)
+        return elapsed
+
+    def render_frame(self, index, total, filepath):
+        """
+        Render frame index of total unless a previous run already did.
+
+        Reports FRAME_DONE/FRAME_SKIP lines that the backends turn into
+        progress and use for their stall watchdog.
+        """
+        if os.path.exists(filepath):
+            report(f"FRAME_SKIP {index + 1}/{total} {filepath}")
+            return None
+        elapsed = self.render(filepath)
+        report(f"FRAME_DONE {index + 1}/{total} {elapsed:.2f} {filepath}")
+        return elapsed
+
+    def _calibrate(self, elapsed):
+        samples = self._get_samples()
+        # 10% headroom for per-frame overhead that does not scale with samples
+        ratio = 0.9 * self.budget / elapsed
+        if ratio >= 1.0:
+            print(f"FRAME_BUDGET first frame {elapsed:.2f}s fits {self.budget:.2f}s budget, keeping {samples} samples")
+            return
+
+        # Render time scales roughly with samples x pixels: cut samples
+        # first, then resolution for whatever is left over
+        new_samples = max(MIN_SAMPLES, int(samples * ratio))
+        remaining = ratio * samples / new_samples
+        percentage = 100
+        if remaining < 1.0:
+            percentage = max(MIN_RESOLUTION_PERCENTAGE, int(100 * math.sqrt(remaining)))
+
+        self._set_samples(new_samples)
+        self.scene.render.resolution_percentage = percentage
+        print(f"FRAME_BUDGET first frame {elapsed:.2f}s over {self.budget:.2f}s budget: "
+              f"samples {samples} -> {new_samples}, resolution {percentage}%")
+
+    def summary(self):
+        if not self.times:
+            return
+        rest = self.times[1:]
+        mean_rest = sum(rest) / len(rest) if rest else 0.0
+        report(f"FRAME_BUDGET frames={len(self.times)} first={self.times[0]:.2f}s "
+               f"mean_rest={mean_rest:.2f}s total={sum(self.times):.2f}s")
+        # Parsed by parse_frame_times() for the run report
+        report("FRAME_TIMES " + ",".join(f"{t:.3f}" for t in self.times))
+'''
+
+
+def parse_frame_times(output: str) -> list:
+    """Per-frame render times from the FRAME_TIMES line of FrameBudget.summary()."""
+    for line in output.splitlines():
+        if line.startswith("FRAME_TIMES "):
+            return [float(t) for t in line.split(maxsplit=1)[1].split(",") if t]
+    return []
+
+
+def parse_frame_seconds(output: str) -> dict:
+    """{frame path: render seconds} from the FRAME_DONE lines of FrameBudget.render_frame()."""
+    seconds = {}
+    for line in output.splitlines():
+        if line.startswith("FRAME_DONE "):
+            parts = line.split(maxsplit=3)
+            if len(parts) == 4:
+                seconds[parts[3]] = float(parts[2])
+    return seconds
+
+
+def restore_resolution(frame_paths: list, size: tuple) -> int:
+    """
+    Upscale frames that a frame budget rendered below the target size.
+
+    Returns the number of frames that were resized.
+    """
+    from PIL import Image
+
+    resized = 0
+    for frame_path in frame_paths:
+        frame_path = Path(frame_path)
+        if not frame_path.exists():
+            continue
+        with Image.open(frame_path) as img:
+            if img.size == tuple(size):
+                continue
+            upscaled = img.convert("RGBA").resize(size, Image.LANCZOS)
+        upscaled.save(frame_path, "PNG")
+        resized += 1
+
+    if resized:
+        print(f"Upscaled {resized} reduced-resolution frame(s) to {size[0]}x{size[1]}")
+    return resized
+
+
+# Blender-side border-region setup for split-frame rendering. Prepended
+# after FRAME_BUDGET_SNIPPET by renderers that support --split-frame.
+REGION_SNIPPET = '''
+
+def apply_region(scene, region):
+    """
+    Render only a border region of the frame, cropped to its own size.
+
+    region is [min_x, max_x, min_y, max_y] as fractions of the frame (y up,
+    as Blender expects), or None for the whole frame.
+    """
+    if not region:
+        scene.render.use_border = False
+        scene.render.use_crop_to_border = False
+        return
+    scene.render.use_border = True
+    scene.render.use_crop_to_border = True
+    scene.render.border_min_x, scene.render.border_max_x = region[0], region[1]
+    scene.render.border_min_y, scene.render.border_max_y = region[2], region[3]
+'''
+
+
+def split_regions(width: int, height: int, parts: int, overlap: int = 16) -> list:
+    """
+    Split a frame into horizontal strips for split-frame rendering.
+
+    Each strip is rendered `overlap` pixels taller on both sides so that
+    screen-space effects (bloom, AO, soft shadows) see the same neighbourhood
+    as in a full-frame render, and the overlap is cropped off when stitching.
+    Returns dicts with "border" (the Blender border for apply_region),
+    "size" (expected tile size), "keep" (box to keep, tile coordinates) and
+    "offset" (where the kept box goes in the full frame).
+    """
+    parts = max(1, min(parts, height))
+    regions = []
+    for index in range(parts):
+        top = height * index // parts
+        bottom = height * (index + 1) // parts
+        render_top = max(0, top - overlap)
+        render_bottom = min(height, bottom + overlap)
+
+        # Blender borders are fractions measured from the bottom edge. A
+        # quarter-pixel bias makes them land on the intended pixel whether
+        # Blender rounds or truncates.
+        def fraction(pixels: int, total: int) -> float:
+            return 1.0 if pixels >= total else (pixels + 0.25) / total
+
+        regions.append({
+            "border": [0.0, 1.0, fraction(height - render_bottom, height), fraction(height - render_top, height)],
+            "size": (width, render_bottom - render_top),
+            "keep": (0, top - render_top, width, bottom - render_top),
+            "offset": (0, top),
+        })
+    return regions
+
+
+def stitch_regions(tile_paths: list, regions: list, size: tuple):
+    """Assemble split-frame tiles (see split_regions) into one RGBA image."""
+    from PIL import Image
+
+    frame = Image.new("RGBA", size)
+    for tile_path, region in zip(tile_paths, regions):
+        with Image.open(tile_path) as tile:
+            if tile.size != tuple(region["size"]):
+                raise ValueError(f"Region tile {tile_path} is {tile.size[0]}x{tile.size[1]}, "
+                                 f"expected {region['size'][0]}x{region['size'][1]}")
+            frame.paste(tile.convert("RGBA").crop(region["keep"]), region["offset"])
+    return frame
+
+
+def prepare_frames_dir(frames_dir: Path, fingerprint: dict, pattern: str = "frame_*.png") -> int:
+    """
+    Keep finished frames from an interrupted run so it can resume.
+
+    Frames are only reused when fingerprint (script, model, settings) matches
+    the run that rendered them; otherwise the directory is cleared. Frames
+    that do not decode fully are deleted. Returns the number kept.
+    """
+    from PIL import Image
+
+    frames_dir = Path(frames_dir)
+    frames_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = frames_dir / ".checkpoint.json"
+    previous = json.loads(checkpoint_path.read_text()) if checkpoint_path.exists() else None
+
+    for partial in frames_dir.glob("*.partial.*"):
+        partial.unlink()
+
+    # Older --scales runs left @<scale>x variants here and replaced the
+    # masters with downsampled frames, so nothing in such a directory is a master
+    legacy_variants = list(frames_dir.glob("*@*x.png"))
+    for variant in legacy_variants:
+        variant.unlink()
+
+    kept = 0
+    for frame_path in sorted(frames_dir.glob(pattern)):
+        if previous != fingerprint or legacy_variants:
+            frame_path.unlink()
+            continue
+        try:
+            with Image.open(frame_path) as img:
+                img.load()
+            kept += 1
+        except OSError:
+            print(f"Discarding unreadable frame: {frame_path}")
+            frame_path.unlink()
+
+    checkpoint_path.write_text(json.dumps(fingerprint, sort_keys=True))
+    if kept:
+        print(f"Resuming: {kept} frame(s) already rendered in {frames_dir}")
+    return kept
+
+
+def render_fingerprint(script: str, model_path: Path, *settings) -> dict:
+    """Identify a spin render (Blender script, model contents, settings) for prepare_frames_dir()."""
+    digest = hashlib.sha256(Path(model_path).read_bytes()).hexdigest()
+    return {
+        "script": hashlib.sha256(script.encode()).hexdigest(),
+        "model": digest,
+        "settings": [str(value) for value in settings],
+    }
+
+
+class FrameProgress:
+    """Turns FRAME_DONE/FRAME_SKIP report lines into progress output with an ETA."""
+
+    def __init__(self):
+        self.times = []
+        self.paths = []
+
+    def handle(self, line: str) -> bool:
+        """Print progress for a report line; returns True if it marks a finished frame."""
+        if not line.startswith(("FRAME_DONE", "FRAME_SKIP")):
+            if line.startswith("FRAME_BUDGET") or "Error" in line or "ERROR" in line:
+                print(line, flush=True)
+            return False
+
+        parts = line.split(maxsplit=3 if line.startswith("FRAME_DONE") else 2)
+        done, total = (int(v) for v in parts[1].split("/"))
+        self.paths.append(parts[-1])
+        if parts[0] == "FRAME_SKIP":
+            print(f"  frame {done}/{total} (already rendered)")
+            return True
+        self.times.append(float(parts[2]))
+        eta = sum(self.times) / len(self.times) * (total - done)
+        print(f"  frame {done}/{total} ({self.times[-1]:.1f}s) ETA {eta:.0f}s", flush=True)
+        return True
+
+
+def run_blender(cmd: list, frame_timeout: float = 120.0, startup_timeout: float = 300.0, retries: int = 1,
+                progress: FrameProgress = None, cache_dir: Path = None) -> bool:
+    """
+    Run a Blender frame render, streaming progress and watching for stalls.
+
+    Output is read line by line: FRAME_DONE/FRAME_SKIP lines (see
+    FrameBudget.render_frame) are shown as progress with an ETA by
+    FrameProgress, and FRAME_BUDGET and error lines are passed through. If no frame finishes
+    within frame_timeout seconds (startup_timeout for the first one, which
+    includes the model import), Blender is killed and restarted up to
+    retries times; finished frames are skipped on restart. cache_dir
+    overrides the shader cache Blender uses (see blender_env). Returns True
+    on success.
+    """
+    for attempt in range(retries + 1):
+        if attempt:
+            print(f"Restarting Blender (attempt {attempt + 1}/{retries + 1}); finished frames are kept")
+        returncode, stalled, tail = _run_blender_once(cmd, frame_timeout, startup_timeout,
+                                                      progress or FrameProgress(), cache_dir)
+        if returncode == 0:
+            return True
+        if not stalled:
+            print(f"Blender exited with code {returncode}. Last output:")
+            print("\n".join(tail))
+            return False
+    print("Blender stalled on every attempt. Last output:")
+    print("\n".join(tail))
+    return False
+
+
+def _run_blender_once(cmd: list, frame_timeout: float, startup_timeout: float, progress: FrameProgress,
+                      cache_dir: Path = None) -> tuple:
+    """Run Blender once; returns (returncode, stalled, last output lines)."""
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1,
+                               env=blender_env(cache_dir))
+    lines = queue.Queue()
+
+    def reader():
+        for line in process.stdout:
+            lines.put(line.rstrip("\n"))
+        lines.put(None)
+
+    threading.Thread(target=reader, daemon=True).start()
+
+    tail = deque(maxlen=40)
+    last_progress = time.time()
+    timeout = startup_timeout
+    while True:
+        try:
+            line = lines.get(timeout=1.0)
+        except queue.Empty:
+            if time.time() - last_progress > timeout:
+                print(f"STALL: no frame finished in {timeout:.0f}s, killing Blender")
+                process.kill()
+                process.wait()
+                return process.returncode, True, list(tail)
+            continue
+        if line is None:
+            break
+
+        tail.append(line)
+        if progress.handle(line):
+            last_progress = time.time()
+            timeout = frame_timeout
+
+    return process.wait(), False, list(tail)
+
+
+# Warm-up scene for the shader cache: the pipeline's lights, world and film
+# settings plus one object per material layout the glTF importer builds for
+# Tripo3D models, so their EEVEE shaders are compiled before real renders.
+WARMUP_SCRIPT = FRAME_BUDGET_SNIPPET + '''
+import sys
+
+argv = sys.argv
+argv = argv[argv.index("--") + 1:]
+output_dir = argv[0]
+
+bpy.ops.object.select_all(action='SELECT')
+bpy.ops.object.delete()
+
+scene = bpy.context.scene
+scene.render.resolution_x = 64
+scene.render.resolution_y = 64
+scene.render.film_transparent = True
+
+world = bpy.data.worlds.new("World") if scene.world is None else scene.world
+scene.world = world
+world.use_nodes = True
+world.node_tree.nodes["Background"].inputs["Strength"].default_value = 0.8
+
+for energy, rotation in ((8.0, (0.8, 0, 0.5)), (2.5, (1.0, 0, 3.6))):
+    bpy.ops.object.light_add(type='SUN', rotation=rotation)
+    bpy.context.object.data.energy = energy
+
+bpy.ops.object.camera_add(location=(10, -10, 10), rotation=(math.radians(60), 0, math.radians(45)))
+scene.camera = bpy.context.object
+scene.camera.data.type = 'ORTHO'
+scene.camera.data.ortho_scale = 12
+
+
+def texture(nodes, name, non_color=False):
+    node = nodes.new('ShaderNodeTexImage')
+    node.image = bpy.data.images.new(name, 4, 4, alpha=True)
+    if non_color:
+        node.image.colorspace_settings.name = 'Non-Color'
+    return node
+
+
+def gltf_material(name, base_color=True, metallic_roughness=False, normal=False, emission=False, blend=False):
+    """Principled BSDF wired the way io_import_scene_gltf2 wires glTF PBR materials."""
+    mat = bpy.data.materials.new(name)
+    mat.use_nodes = True
+    nodes, links = mat.node_tree.nodes, mat.node_tree.links
+    bsdf = nodes["Principled BSDF"]
+    if base_color:
+        tex = texture(nodes, name + "_base")
+        links.new(tex.outputs["Color"], bsdf.inputs["Base Color"])
+        if blend:
+            links.new(tex.outputs["Alpha"], bsdf.inputs["Alpha"])
+    if metallic_roughness:
+        tex = texture(nodes, name + "_mr", non_color=True)
+        separate = nodes.new('ShaderNodeSeparateColor')
+        links.new(tex.outputs["Color"], separate.inputs["Color"])
+        links.new(separate.outputs["Green"], bsdf.inputs["Roughness"])
+        links.new(separate.outputs["Blue"], bsdf.inputs["Metallic"])
+    if normal:
+        tex = texture(nodes, name + "_normal", non_color=True)
+        normal_map = nodes.new('ShaderNodeNormalMap')
+        links.new(tex.outputs["Color"], normal_map.inputs["Color"])
+        links.new(normal_map.outputs["Normal"], bsdf.inputs["Normal"])
+    if emission:
+        tex = texture(nodes, name + "_emissive")
+        links.new(tex.outputs["Color"], bsdf.inputs["Emission Color"])
+        bsdf.inputs["Emission Strength"].default_value = 1.0
+    if blend and hasattr(mat, "surface_render_method"):
+        mat.surface_render_method = 'BLENDED'
+    return mat
+
+
+materials = [
+    gltf_material("factors_only", base_color=False),
+    gltf_material("base_color"),
+    gltf_material("pbr", metallic_roughness=True),
+    gltf_material("pbr_normal", metallic_roughness=True, normal=True),
+    gltf_material("pbr_emissive", metallic_roughness=True, normal=True, emission=True),
+    gltf_material("alpha_blend", blend=True),
+]
+for index, mat in enumerate(materials):
+    bpy.ops.mesh.primitive_uv_sphere_add(radius=0.8, location=(2 * (index % 3) - 2, 2 * (index // 3) - 1, 0))
+    bpy.context.object.data.materials.append(mat)
+
+budget = FrameBudget(scene, 0.0)
+budget.render_frame(0, 1, os.path.join(output_dir, "warmup.png"))
+budget.summary()
+'''
+
+
+_warmup_lock = threading.Lock()
+_warmup_attempted = set()
+
+
+def warm_shader_cache(cache_dir: Path = None, force: bool = False) -> bool:
+    """
+    Pre-compile the standard material shaders into the shared cache once.
+
+    Skipped when the cache was already warmed with this warm-up scene and
+    Blender binary (a stamp file in the cache dir) unless force is set, and
+    attempted at most once per process. Parallel callers wait for the one
+    warm-up. The timing goes into the run report. Returns True if it ran.
+    """
+    cache_dir = Path(cache_dir or SHADER_CACHE_DIR)
+    with _warmup_lock:
+        if cache_dir in _warmup_attempted and not force:
+            return False
+        _warmup_attempted.add(cache_dir)
+        return _warm_shader_cache(cache_dir, force)
+
+
+def _warm_shader_cache(cache_dir: Path, force: bool) -> bool:
+    import run_report
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    blender_exe = find_blender()
+    resolved = shutil.which(blender_exe) or blender_exe
+    stamp = {
+        "script": hashlib.sha256(WARMUP_SCRIPT.encode()).hexdigest(),
+        "blender": resolved,
+        "blender_mtime": os.path.getmtime(resolved) if os.path.exists(resolved) else None,
+    }
+    stamp_path = cache_dir / "warmup.json"
+    report = run_report.current()
+    if not force and stamp_path.exists() and json.loads(stamp_path.read_text()) == stamp:
+        report.set("shader_cache", {"dir": str(cache_dir), "warmed_up": False})
+        return False
+
+    print(f"Warming Blender shader cache in {cache_dir}...")
+    start = time.time()
+    with tempfile.TemporaryDirectory() as work_dir:
+        script_path = Path(work_dir) / "warmup.py"
+        script_path.write_text(WARMUP_SCRIPT)
+        try:
+            # Compile into the cache the stamp describes, not the default one
+            ok = run_blender([blender_exe, "--background", "--python", str(script_path), "--", work_dir],
+                             frame_timeout=600.0, cache_dir=cache_dir)
+        except OSError as e:
+            print(f"Could not start Blender for the warm-up: {e}")
+            ok = False
+    elapsed = time.time() - start
+    report.set("shader_cache", {"dir": str(cache_dir), "warmed_up": ok, "seconds": round(elapsed, 2)})
+    if ok:
+        stamp_path.write_text(json.dumps(stamp, sort_keys=True))
+        print(f"Shader cache warm ({elapsed:.1f}s)")
+    else:
+        print("WARNING: shader cache warm-up failed; renders will compile shaders on their first frame")
+    return ok
@@ -0,0 +1,2 @@
+# test_shadow.py is a Blender script (blender --background --python test_shadow.py), not a pytest module
+collect_ignore = ["test_shadow.py"]
@@ -0,0 +1,82 @@
+"""
+Content-addressed store for pipeline outputs.
+
+Files are stored once under their SHA-256 (objects/ab/cdef...), so
+identical outputs from different runs or machines share one copy and a
+digest is enough to fetch a file anywhere the store is mounted. Writes
+go to a temp file and are renamed into place, so concurrent writers on a
+shared filesystem never expose half-written objects.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+STORE_DIR = Path(os.getenv("ASSET_STORE_DIR", Path.home() / ".cache" / "clawntawn" / "store"))
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ContentStore:
+    def __init__(self, root: Path = None):
+        self.root = Path(root or STORE_DIR)
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def has(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def put(self, path: Path) -> str:
+        """Add a file (no-op if the content is already stored); returns its digest."""
+        def copy(f):
+            with open(path, "rb") as src:
+                shutil.copyfileobj(src, f)
+
+        return self._write(file_digest(path), copy)
+
+    def put_bytes(self, data: bytes) -> str:
+        """Add in-memory content; returns its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        return self._write(digest, lambda f: f.write(data))
+
+    def get(self, digest: str, destination: Path) -> Path:
+        """Copy a stored object to destination (atomically); returns destination."""
+        source = self.path(digest)
+        if not source.exists():
+            raise KeyError(f"{digest} is not in the store at {self.root}")
+        destination = Path(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=destination.parent, prefix=f".{destination.name}.")
+        with os.fdopen(fd, "wb") as f, open(source, "rb") as src:
+            shutil.copyfileobj(src, f)
+        os.replace(temp_path, destination)
+        return destination
+
+    def read_bytes(self, digest: str) -> bytes:
+        return self.path(digest).read_bytes()
+
+    def _write(self, digest: str, write) -> str:
+        target = self.path(digest)
+        if target.exists():
+            return digest
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(temp_path, target)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return digest
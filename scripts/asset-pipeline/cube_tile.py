@@ -0,0 +1,199 @@
+"""
+Analytic cube-tile renderer (NumPy/Pillow, no Blender).
+
+render_cube_tile() in pipeline.py draws a half-height textured box from a
+fixed isometric orthographic camera lit by two suns and a dim world. From
+that camera only three faces are visible, and each one is an affine warp
+of the texture times a constant Lambert shade, so the same `_cube.png` can
+be produced directly in milliseconds. Framing, face UV orientation and
+lighting mirror the Blender scene; Blender remains available as fallback.
+"""
+
+import math
+
+import numpy as np
+from PIL import Image
+
+from relight import VIEW_TRANSFORMS
+
+RESOLUTION = 512
+ORTHO_SCALE = 3.5       # camera.data.ortho_scale in the Blender scene
+HALF_HEIGHT = 0.5       # cube scaled to (1, 1, 0.5)
+
+# (energy, rotation_euler in degrees) of the Blender tile suns
+SUNS = [
+    (4.0, (45, -15, 30)),    # main sun
+    (1.5, (60, 15, -150)),   # fill
+]
+AMBIENT = 0.4 * 0.050876    # world strength x default world colour
+
+# Camera looks from the (+1, +1, +1) corner at the origin (isometric)
+_RIGHT = np.array([-1.0, 1.0, 0.0]) / math.sqrt(2)
+_UP = np.array([-1.0, -1.0, 2.0]) / math.sqrt(6)
+
+# Visible faces as (origin, u edge, v edge, normal) in world space. UVs
+# follow the loop order of Blender's primitive cube with the pipeline's
+# per-loop (0,0), (1,0), (1,1), (0,1) assignment.
+_FACES = {
+    "top": ((1.0, 1.0, HALF_HEIGHT), (-2.0, 0.0, 0.0), (0.0, -2.0, 0.0), (0.0, 0.0, 1.0)),
+    "right": ((-1.0, 1.0, -HALF_HEIGHT), (0.0, 0.0, 2 * HALF_HEIGHT), (2.0, 0.0, 0.0), (0.0, 1.0, 0.0)),
+    "left": ((1.0, 1.0, -HALF_HEIGHT), (0.0, 0.0, 2 * HALF_HEIGHT), (0.0, -2.0, 0.0), (1.0, 0.0, 0.0)),
+}
+
+
+def sun_direction(rotation_deg: tuple) -> np.ndarray:
+    """Unit vector towards a Blender sun with the given XYZ Euler rotation."""
+    rx, ry, rz = (math.radians(a) for a in rotation_deg)
+    rot_x = np.array([[1, 0, 0], [0, math.cos(rx), -math.sin(rx)], [0, math.sin(rx), math.cos(rx)]])
+    rot_y = np.array([[math.cos(ry), 0, math.sin(ry)], [0, 1, 0], [-math.sin(ry), 0, math.cos(ry)]])
+    rot_z = np.array([[math.cos(rz), -math.sin(rz), 0], [math.sin(rz), math.cos(rz), 0], [0, 0, 1]])
+    return rot_z @ rot_y @ rot_x @ np.array([0.0, 0.0, 1.0])
+
+
+def face_shades() -> dict:
+    """Lambert irradiance (linear) reaching each visible face."""
+    shades = {}
+    for name, (_, _, _, normal) in _FACES.items():
+        normal = np.array(normal)
+        direct = sum(energy * max(0.0, float(normal @ sun_direction(rotation))) for energy, rotation in SUNS)
+        shades[name] = AMBIENT + direct / math.pi
+    return shades
+
+
+def _to_pixels(point) -> np.ndarray:
+    """World point -> (x, y) pixel coordinates of the 512x512 render."""
+    point = np.asarray(point, dtype=np.float64)
+    scale = RESOLUTION / ORTHO_SCALE
+    return np.array([RESOLUTION / 2 + (point @ _RIGHT) * scale, RESOLUTION / 2 - (point @ _UP) * scale])
+
+
+def _srgb_to_linear(values: np.ndarray) -> np.ndarray:
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def _sample(texture: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Bilinear texture lookup with repeat wrapping; v=0 is the bottom row."""
+    height, width = texture.shape[:2]
+    x = u * width - 0.5
+    y = (1.0 - v) * height - 0.5
+    x0 = np.floor(x).astype(np.int64)
+    y0 = np.floor(y).astype(np.int64)
+    fx = (x - x0)[:, None]
+    fy = (y - y0)[:, None]
+    x0, x1 = x0 % width, (x0 + 1) % width
+    y0, y1 = y0 % height, (y0 + 1) % height
+    top = texture[y0, x0] * (1 - fx) + texture[y0, x1] * fx
+    bottom = texture[y1, x0] * (1 - fx) + texture[y1, x1] * fx
+    return top * (1 - fy) + bottom * fy
+
+
+def render_cube_tile_numpy(texture: Image.Image, supersample: int = 2, view_transform: str = "agx") -> Image.Image:
+    """Render the 512x512 `_cube.png` for a texture without Blender."""
+    size = RESOLUTION * supersample
+    texture = texture.convert("RGB")
+    shades = face_shades()
+
+    rgb = np.zeros((size, size, 3), dtype=np.float32)
+    alpha = np.zeros((size, size), dtype=np.float32)
+
+    for name, (origin, edge_u, edge_v, _) in _FACES.items():
+        origin = np.array(origin)
+        p0 = _to_pixels(origin)
+        a = _to_pixels(origin + np.array(edge_u)) - p0
+        b = _to_pixels(origin + np.array(edge_v)) - p0
+
+        # Prefilter ("mipmap") the texture to the face's on-screen footprint
+        # so the bilinear lookup below does not alias
+        face_w = max(8, int(np.linalg.norm(a) * supersample))  # texture u -> columns
+        face_h = max(8, int(np.linalg.norm(b) * supersample))  # texture v -> rows
+        face_texture = _srgb_to_linear(
+            np.asarray(texture.resize((face_w, face_h), Image.BOX), dtype=np.float32) / 255.0
+        )
+
+        # Only visit supersamples inside the face's bounding box
+        corners = np.array([p0, p0 + a, p0 + b, p0 + a + b]) * supersample
+        x_lo, y_lo = np.clip(np.floor(corners.min(axis=0)).astype(int), 0, size)
+        x_hi, y_hi = np.clip(np.ceil(corners.max(axis=0)).astype(int) + 1, 0, size)
+        px, py = np.meshgrid((np.arange(x_lo, x_hi) + 0.5) / supersample,
+                             (np.arange(y_lo, y_hi) + 0.5) / supersample)
+
+        # Solve pixel = p0 + u * a + v * b for (u, v)
+        inverse = np.linalg.inv(np.column_stack([a, b]))
+        u = inverse[0, 0] * (px - p0[0]) + inverse[0, 1] * (py - p0[1])
+        v = inverse[1, 0] * (px - p0[0]) + inverse[1, 1] * (py - p0[1])
+        region_alpha = alpha[y_lo:y_hi, x_lo:x_hi]
+        inside = (u >= 0) & (u <= 1) & (v >= 0) & (v <= 1) & (region_alpha == 0)
+
+        region_rgb = rgb[y_lo:y_hi, x_lo:x_hi]
+        region_rgb[inside] = _sample(face_texture, u[inside], v[inside]) * shades[name]
+        region_alpha[inside] = 1.0
+
+    # Box-filter the supersamples back down (premultiplied, so edges stay clean)
+    def downsample(values: np.ndarray) -> np.ndarray:
+        values = values.reshape(RESOLUTION, supersample, RESOLUTION, supersample, -1)
+        return values.mean(axis=(1, 3))
+
+    rgb = downsample(rgb)
+    alpha = downsample(alpha[..., None])[..., 0]
+    covered = alpha > 0
+    rgb[covered] /= alpha[covered][:, None]
+
+    display = VIEW_TRANSFORMS[view_transform](rgb)
+    rgba = np.dstack([display, alpha])
+    return Image.fromarray((np.clip(rgba, 0, 1) * 255 + 0.5).astype(np.uint8), "RGBA")
+
+
+def compare_images(image_a: Image.Image, image_b: Image.Image) -> dict:
+    """Pixel diff between two RGBA renders (0-255 scale)."""
+    a = np.asarray(image_a.convert("RGBA"), dtype=np.float32)
+    b = np.asarray(image_b.convert("RGBA"), dtype=np.float32)
+    diff = np.abs(a - b)
+    return {
+        "mean": float(diff.mean()),
+        "rgb_mean": float(diff[..., :3].mean()),
+        "alpha_mean": float(diff[..., 3].mean()),
+        "max": float(diff.max()),
+    }
+
+
+def main():
+    """Pixel-diff the NumPy renderer against existing Blender `_cube.png` references."""
+    import argparse
+    import sys
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Check the NumPy cube-tile renderer against Blender renders")
+    parser.add_argument("--tiles-dir", type=str, default="../../apps/web/public/assets/tiles",
+                        help="Directory with <name>.png textures and Blender <name>_cube.png references")
+    parser.add_argument("--tolerance", type=float, default=6.0,
+                        help="Max mean absolute RGBA difference (0-255) per tile")
+    parser.add_argument("--save-dir", type=str, help="Also write the NumPy renders here for inspection")
+    args = parser.parse_args()
+
+    tiles_dir = Path(args.tiles_dir)
+    references = sorted(tiles_dir.glob("*_cube.png"))
+    if not references:
+        print(f"ERROR: No *_cube.png references in {tiles_dir}")
+        sys.exit(1)
+
+    failed = 0
+    for reference_path in references:
+        texture_path = reference_path.with_name(reference_path.name.replace("_cube.png", ".png"))
+        if not texture_path.exists():
+            continue
+        with Image.open(texture_path) as texture, Image.open(reference_path) as reference:
+            rendered = render_cube_tile_numpy(texture)
+            diff = compare_images(rendered, reference)
+        if args.save_dir:
+            Path(args.save_dir).mkdir(parents=True, exist_ok=True)
+            rendered.save(Path(args.save_dir) / reference_path.name, "PNG")
+        status = "OK" if diff["mean"] <= args.tolerance else "FAIL"
+        failed += status == "FAIL"
+        print(f"{status:4} {texture_path.stem}: mean {diff['mean']:.2f} "
+              f"(rgb {diff['rgb_mean']:.2f}, alpha {diff['alpha_mean']:.2f}, max {diff['max']:.0f})")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
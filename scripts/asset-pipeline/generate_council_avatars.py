@@ -13,17 +13,24 @@ Generates avatar portraits for all 7 council members:
 Usage:
     python generate_council_avatars.py --output-dir ./output/council
     python generate_council_avatars.py --member mayor_clawrence
+    python generate_council_avatars.py --member mayor_clawrence --variants 4  # Pick a portrait first
 """
 
 import os
 import sys
 import argparse
+import atexit
 import base64
-import subprocess
-import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
+import api_limits
+import run_report
+from artifacts import Artifact
+from asset_registry import checkpoint_renderer, registry
+from blender_backend import BACKENDS, SubprocessBackend, get_backend
+from blender_utils import FRAME_BUDGET_SNIPPET, prepare_frames_dir, render_fingerprint, restore_resolution
+
 # Load environment variables from project root
 env_path = Path(__file__).parent.parent.parent / ".env.local"
 load_dotenv(env_path)
@@ -164,7 +171,8 @@ def step1_generate_portrait(member_id: str, output_path: Path) -> Path:
     prompt = COUNCIL_MEMBERS[member_id]["prompt"]
     print(f"Generating portrait for {COUNCIL_MEMBERS[member_id]['name']}...")
 
-    response = client.models.generate_content(
+    response = api_limits.call(
+        "gemini", client.models.generate_content,
         model="gemini-3-pro-image-preview",
         contents=prompt,
         config={
@@ -178,14 +186,21 @@ def step1_generate_portrait(member_id: str, output_path: Path) -> Path:
             with open(output_path, "wb") as f:
                 f.write(base64.b64decode(image_data) if isinstance(image_data, str) else image_data)
             print(f"Saved portrait to: {output_path}")
+            registry().register(output_path, "concept",
+                                params={"member": member_id, "model": "gemini-3-pro-image-preview"})
             return output_path
 
     print("ERROR: No image in response")
     sys.exit(1)
 
 
-def step2_remove_background(input_path: Path, output_path: Path) -> Path:
-    """Remove background using fal.ai."""
+def step2_remove_background(source, output_path: Path = None) -> Artifact:
+    """
+    Remove background using fal.ai.
+
+    source is a path or Artifact; the cutout comes back in memory and is
+    only written to output_path if one is given.
+    """
     print(f"\n{'='*60}")
     print("STEP 2: Remove Background")
     print("="*60)
@@ -203,32 +218,35 @@ def step2_remove_background(input_path: Path, output_path: Path) -> Path:
 
     os.environ["FAL_KEY"] = fal_key
 
-    image_url = fal_client.upload_file(str(input_path))
+    source = Artifact.of(source)
+    image_url = source.upload()
     print(f"Uploaded to: {image_url}")
 
-    result = fal_client.subscribe(
+    result = api_limits.call(
+        "birefnet", fal_client.subscribe,
         "fal-ai/birefnet",
         arguments={"image_url": image_url},
         with_logs=True,
     )
 
     if result and "image" in result and "url" in result["image"]:
-        import httpx
-        response = httpx.get(result["image"]["url"])
-        with open(output_path, "wb") as f:
-            f.write(response.content)
-        print(f"Saved to: {output_path}")
-        return output_path
+        cutout = Artifact.download(result["image"]["url"], "clean.png", sources=source.lineage)
+        if output_path:
+            cutout.save(output_path)
+            print(f"Saved to: {output_path}")
+            registry().register(output_path, "cutout", parents=source.lineage, params={"endpoint": "fal-ai/birefnet"})
+        return cutout
     else:
         print(f"ERROR: Unexpected response: {result}")
         sys.exit(1)
 
 
-def step2b_fill_holes_for_3d(input_path: Path, output_path: Path) -> Path:
+def step2b_fill_holes_for_3d(cutout, output_path: Path = None) -> Artifact:
     """
     Composite transparent image onto solid gray background for 3D conversion.
     This fills any holes (like white chef hats that birefnet incorrectly removed)
-    so the 3D model doesn't have gaps.
+    so the 3D model doesn't have gaps. Returns the composite in memory
+    (written to output_path only if given).
     """
     print(f"\n{'='*60}")
     print("STEP 2b: Fill Holes for 3D Conversion")
@@ -240,7 +258,8 @@ def step2b_fill_holes_for_3d(input_path: Path, output_path: Path) -> Path:
         print("ERROR: Pillow not installed")
         sys.exit(1)
 
-    img = Image.open(input_path).convert("RGBA")
+    cutout = Artifact.of(cutout)
+    img = cutout.image.convert("RGBA")
 
     # Use a neutral gray background - not white (would blend with white objects)
     # and not too dark (would affect the 3D model coloring)
@@ -250,18 +269,31 @@ def step2b_fill_holes_for_3d(input_path: Path, output_path: Path) -> Path:
     # Composite: character on gray background
     composite = Image.alpha_composite(background, img)
 
-    # Save as PNG (keep RGB, no transparency needed for 3D conversion)
-    composite.convert("RGB").save(output_path, "PNG")
-    print(f"Saved composite for 3D: {output_path}")
-    return output_path
+    # Keep RGB, no transparency needed for 3D conversion
+    filled = Artifact.from_image(composite.convert("RGB"), "filled_for_3d.png", sources=cutout.lineage)
+    if output_path:
+        filled.save(output_path)
+        print(f"Saved composite for 3D: {output_path}")
+        registry().register(output_path, "composite", parents=cutout.lineage)
+    return filled
+
 
+def step3_convert_to_3d(image, output_path: Path, strict: bool = False) -> Path:
+    """
+    Convert to 3D model using Tripo3D v2.5 (image is a path or Artifact, uploaded from memory).
 
-def step3_convert_to_3d(image_path: Path, output_path: Path) -> Path:
-    """Convert to 3D model using Tripo3D v2.5."""
+    An image that looks the same as an earlier input reuses that model
+    (see model_reuse) unless strict.
+    """
     print(f"\n{'='*60}")
     print("STEP 3: Convert to 3D (Tripo3D)")
     print("="*60)
 
+    from model_reuse import record_model, reuse_model
+
+    if reuse_model(image, output_path, "tripo3d/tripo/v2.5/image-to-3d", strict):
+        return output_path
+
     try:
         import fal_client
     except ImportError:
@@ -271,22 +303,24 @@ def step3_convert_to_3d(image_path: Path, output_path: Path) -> Path:
     fal_key = os.getenv("FAL_KEY")
     os.environ["FAL_KEY"] = fal_key
 
-    image_url = fal_client.upload_file(str(image_path))
+    image = Artifact.of(image)
+    image_url = image.upload()
     print(f"Uploaded: {image_url}")
 
     # Use Tripo3D for consistent quality
-    result = fal_client.subscribe(
+    result = api_limits.call(
+        "tripo3d", fal_client.subscribe,
         "tripo3d/tripo/v2.5/image-to-3d",
         arguments={"image_url": image_url},
         with_logs=True,
     )
 
     if result and "model_mesh" in result and "url" in result["model_mesh"]:
-        import httpx
-        response = httpx.get(result["model_mesh"]["url"])
-        with open(output_path, "wb") as f:
-            f.write(response.content)
+        Artifact.download(result["model_mesh"]["url"]).save(output_path)
         print(f"Saved 3D model to: {output_path}")
+        registry().register(output_path, "model", parents=image.lineage,
+                            params={"endpoint": "tripo3d/tripo/v2.5/image-to-3d"})
+        record_model(image, output_path, "tripo3d/tripo/v2.5/image-to-3d")
         return output_path
     else:
         print(f"ERROR: Unexpected response: {result}")
@@ -294,13 +328,20 @@ def step3_convert_to_3d(image_path: Path, output_path: Path) -> Path:
         sys.exit(1)
 
 
-def step4_render_spinning(model_path: Path, output_dir: Path, num_frames: int = 36) -> list:
-    """Render spinning frames using Blender."""
+def step4_render_spinning(model_path: Path, output_dir: Path, num_frames: int = 36, frame_budget: float = 0.0,
+                          resolution: int = 128, frame_timeout: float = 120.0, backend=None) -> list:
+    """
+    Render spinning frames using Blender.
+
+    Frames finished by an interrupted run of the same model and script are
+    kept, and Blender is restarted if no frame finishes in frame_timeout.
+    backend is a blender_backend backend (a fresh Blender process by default).
+    """
     print(f"\n{'='*60}")
     print("STEP 4: Render Spinning Frames")
     print("="*60)
 
-    blender_script = '''
+    blender_script = FRAME_BUDGET_SNIPPET + '''
 import bpy
 import sys
 import math
@@ -311,6 +352,8 @@ argv = argv[argv.index("--") + 1:]
 model_path = argv[0]
 output_dir = argv[1]
 num_frames = int(argv[2])
+frame_budget = float(argv[3]) if len(argv) > 3 else 0.0
+resolution = int(argv[4]) if len(argv) > 4 else 128
 
 bpy.ops.object.select_all(action='SELECT')
 bpy.ops.object.delete()
@@ -375,50 +418,63 @@ if bg:
     bg.inputs['Strength'].default_value = 1.0
 
 scene = bpy.context.scene
-scene.render.resolution_x = 128
-scene.render.resolution_y = 128
+scene.render.resolution_x = resolution
+scene.render.resolution_y = resolution
 scene.render.film_transparent = True
 scene.render.image_settings.file_format = 'PNG'
 scene.render.image_settings.color_mode = 'RGBA'
 
+budget = FrameBudget(scene, frame_budget)
+
 for i in range(num_frames):
     angle = (i / num_frames) * 2 * math.pi
     pivot.rotation_euler = (0, 0, angle)
     frame_path = f"{output_dir}/frame_{i:03d}.png"
-    scene.render.filepath = frame_path
-    bpy.ops.render.render(write_still=True)
-    print(f"Rendered frame {i+1}/{num_frames}")
+    budget.render_frame(i, num_frames, frame_path)
 
+budget.summary()
 print("Done!")
 '''
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-        f.write(blender_script)
-        script_path = f.name
-
     frames_dir = output_dir / "frames"
-    frames_dir.mkdir(parents=True, exist_ok=True)
+    prepare_frames_dir(frames_dir, render_fingerprint(blender_script, model_path, num_frames, frame_budget,
+                                                      resolution))
 
-    try:
-        blender_exe = "/Applications/Blender.app/Contents/MacOS/Blender"
-        if not os.path.exists(blender_exe):
-            blender_exe = "blender"
-
-        cmd = [blender_exe, "--background", "--python", script_path,
-               "--", str(model_path), str(frames_dir), str(num_frames)]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-        print(result.stdout[-2000:] if len(result.stdout) > 2000 else result.stdout)
-        if result.returncode != 0:
-            print(f"Blender error: {result.stderr}")
-            sys.exit(1)
-    finally:
-        os.unlink(script_path)
+    backend = backend or SubprocessBackend()
+    rendered = backend.run_script(blender_script, [model_path, frames_dir, num_frames, frame_budget, resolution],
+                                  frame_timeout)
+    if rendered is None:
+        sys.exit(1)
+    run_report.current().add_frames(f"spin {Path(model_path).parent.name}", rendered.times)
 
-    return sorted(frames_dir.glob("frame_*.png"))
+    frames = sorted(frames_dir.glob("frame_[0-9][0-9][0-9].png"))
+    if frame_budget:
+        restore_resolution(frames, (resolution, resolution))
+    return frames
 
 
-def step5_create_gif(frame_paths: list, output_path: Path, duration: int = 50) -> Path:
-    """Create animated GIF from frames with proper transparency handling."""
+def step4b_scale_frames(frames: list, gif_path: Path, scales: tuple, base_size: int = 128) -> dict:
+    """
+    Derive every scale of the spin from master frames rendered at the
+    largest scale. The variants go to a frames_scaled/ directory next to
+    frames/, so the checkpointed frames stay masters for the next run.
+    Returns {scale: (frame paths, gif path)}.
+    """
+    from image_utils import scale_path, write_scale_variants
+
+    scaled_dir = Path(frames[0]).parent.with_name("frames_scaled") if frames else None
+    per_frame = [write_scale_variants(frame, base_size, scales, scaled_dir) for frame in frames]
+    return {scale: ([variants[scale] for variants in per_frame], scale_path(gif_path, scale)) for scale in scales}
+
+
+def step5_create_gif(frame_paths: list, output_path: Path, duration: int = 50, crop: bool = True) -> Path:
+    """
+    Create animated GIF from frames with proper transparency handling.
+
+    Frames are cropped to their union alpha bounding box (crop=False keeps
+    the render size) and stored as inter-frame deltas, see
+    image_utils.encode_spin_gif.
+    """
     print(f"\n{'='*60}")
     print("STEP 5: Create GIF")
     print("="*60)
@@ -428,56 +484,29 @@ def step5_create_gif(frame_paths: list, output_path: Path, duration: int = 50) -
     except ImportError:
         print("ERROR: Pillow not installed")
         sys.exit(1)
+    from image_utils import encode_spin_gif
 
-    processed_frames = []
+    frames = []
     for f in frame_paths:
-        img = Image.open(f).convert("RGBA")
-
-        # Create a new image with transparent background
-        # Convert alpha to 1-bit (fully transparent or fully opaque)
-        alpha = img.split()[3]
-        # Threshold: pixels with alpha > 128 are opaque, others transparent
-        mask = alpha.point(lambda x: 255 if x > 128 else 0)
-
-        # Create palette image with transparency
-        # Use a unique color for transparency that's unlikely to appear in the image
-        transparent_color = (0, 0, 0)
-
-        # Composite onto a solid background first to remove semi-transparency
-        background = Image.new("RGBA", img.size, transparent_color + (255,))
-        composite = Image.alpha_composite(background, img)
-
-        # Convert to palette mode
-        p_img = composite.convert("RGB").convert("P", palette=Image.ADAPTIVE, colors=255)
-
-        # Set transparency for pixels that were transparent in original
-        # Find the palette index closest to our transparent color
-        p_img.paste(0, mask=Image.eval(mask, lambda x: 255 - x))
-
-        processed_frames.append(p_img)
-
-    processed_frames[0].save(
-        output_path,
-        save_all=True,
-        append_images=processed_frames[1:],
-        duration=duration,
-        loop=0,
-        disposal=2,
-        transparency=0,
-    )
-    print(f"Saved GIF to: {output_path}")
+        with Image.open(f) as img:
+            frames.append(img.convert("RGBA"))
+
+    stats = encode_spin_gif(frames, output_path, duration, crop)
+    print(f"Saved GIF to: {output_path} ({stats['size'][0]}x{stats['size'][1]}, crop {stats['crop']}, "
+          f"{stats['bytes'] / 1024:.0f} KB)")
     return output_path
 
 
-def create_static_avatar(input_path: Path, output_path: Path, size: int = 128) -> Path:
-    """Create static avatar at specified size."""
+def create_static_avatar(source, output_path: Path, size: int = 128) -> Path:
+    """Create static avatar at specified size (source is a path or an in-memory Artifact)."""
     try:
         from PIL import Image
     except ImportError:
         print("ERROR: Pillow not installed")
         sys.exit(1)
 
-    img = Image.open(input_path)
+    source = Artifact.of(source)
+    img = source.image.copy()
     img.thumbnail((size, size), Image.LANCZOS)
 
     result = Image.new('RGBA', (size, size), (0, 0, 0, 0))
@@ -487,11 +516,83 @@ def create_static_avatar(input_path: Path, output_path: Path, size: int = 128) -
 
     result.save(output_path, 'PNG')
     print(f"Saved static avatar to: {output_path}")
+    registry().register(output_path, "static", parents=source.lineage, params={"size": size})
     return output_path
 
 
-def generate_member(member_id: str, output_dir: Path, skip_generate: bool = False, rerender_only: bool = False):
-    """Generate all assets for a council member."""
+def step5b_create_spritesheet(frame_paths: list, sheet_path: Path, duration: int = 50) -> Path:
+    """Pack frames into a spritesheet (.webp/.png) plus a <name>.json atlas for Phaser/CSS playback."""
+    from PIL import Image
+    from image_utils import write_spritesheet
+
+    frames = []
+    for f in frame_paths:
+        with Image.open(f) as img:
+            frames.append(img.convert("RGBA"))
+
+    atlas = write_spritesheet(frames, sheet_path, duration)
+    meta = atlas["meta"]
+    print(f"Saved spritesheet to: {sheet_path} ({meta['size']['w']}x{meta['size']['h']}, "
+          f"{meta['columns']}x{meta['rows']} frames) + {sheet_path.with_suffix('.json').name}")
+    return sheet_path
+
+
+def create_spin_outputs(frames: list, gif_path: Path, scales: tuple = None, spritesheet: str = None,
+                        gif: bool = True, model_path: Path = None) -> None:
+    """
+    Create the spin GIF and/or spritesheet (spritesheet = "webp" or "png").
+
+    With scales there is one of each per scale plus a scales.json entry.
+    Outputs are registered as made from model_path. The frames are checked
+    for framing problems first (see render_qa; flagged in the run report).
+    """
+    import render_qa
+    from image_utils import scale_path, update_scale_manifest
+
+    render_qa.check_spin(frames, gif_path.stem)
+
+    sheet_path = gif_path.with_suffix(f".{spritesheet}") if spritesheet else None
+    if scales:
+        per_scale = step4b_scale_frames(frames, gif_path, scales)
+    else:
+        per_scale = {1.0: (frames, gif_path)}
+
+    gifs, sheets = {}, {}
+    for scale, (scale_frames, scale_gif) in per_scale.items():
+        if gif:
+            gifs[scale] = step5_create_gif(scale_frames, scale_gif, 50)
+        if sheet_path:
+            sheets[scale] = step5b_create_spritesheet(scale_frames, scale_path(sheet_path, scale), 50)
+
+    renderer = checkpoint_renderer("blender-council-spin", Path(frames[0]).parent) if frames else None
+    for kind, outputs in (("spin", gifs), ("spritesheet", sheets)):
+        for scale, path in outputs.items():
+            registry().register(path, kind, parents=[model_path], renderer=renderer,
+                                params={"frames": len(frames), "scale": scale})
+
+    if scales:
+        outputs = {}
+        if gifs:
+            outputs[gif_path.name] = gifs
+        if sheets:
+            outputs[sheet_path.name] = sheets
+        update_scale_manifest(gif_path.parent / "scales.json", outputs)
+
+
+def generate_member(member_id: str, output_dir: Path, skip_generate: bool = False, rerender_only: bool = False,
+                    frame_budget: float = 0.0, scales: tuple = None, spritesheet: str = None, gif: bool = True,
+                    frame_timeout: float = 120.0, backend=None, keep_intermediates: bool = False,
+                    strict: bool = False):
+    """
+    Generate all assets for a council member.
+
+    With scales (e.g. (0.5, 1, 2)) the spin is rendered once at the largest
+    scale and every size is downsampled from it, with @<scale>x suffixes.
+    spritesheet ("webp" or "png") also packs the spin into a sheet + atlas.
+    The cutout and gray composite stay in memory between steps unless
+    keep_intermediates writes them to clean.png / filled_for_3d.png.
+    strict always converts to 3D instead of reusing a look-alike's model.
+    """
     member_dir = output_dir / member_id
     member_dir.mkdir(parents=True, exist_ok=True)
 
@@ -501,6 +602,7 @@ def generate_member(member_id: str, output_dir: Path, skip_generate: bool = Fals
     model_path = member_dir / "model.glb"
     static_path = output_dir / f"{member_id}.png"
     gif_path = output_dir / f"{member_id}_spin.gif"
+    resolution = round(128 * max(scales)) if scales else 128
 
     if rerender_only:
         # Only re-render frames and create GIF from existing model
@@ -508,8 +610,8 @@ def generate_member(member_id: str, output_dir: Path, skip_generate: bool = Fals
             print(f"ERROR: No model found at {model_path}")
             sys.exit(1)
         print(f"Re-rendering {member_id} with brighter lighting...")
-        frames = step4_render_spinning(model_path, member_dir, 36)
-        step5_create_gif(frames, gif_path, 50)
+        frames = step4_render_spinning(model_path, member_dir, 36, frame_budget, resolution, frame_timeout, backend)
+        create_spin_outputs(frames, gif_path, scales, spritesheet, gif, model_path)
         print(f"COMPLETE: {member_id} -> {gif_path}")
         return
 
@@ -520,22 +622,30 @@ def generate_member(member_id: str, output_dir: Path, skip_generate: bool = Fals
         step1_generate_portrait(member_id, concept_path)
 
     # Step 2: Remove background
-    step2_remove_background(concept_path, clean_path)
+    cutout = step2_remove_background(concept_path, clean_path if keep_intermediates else None)
 
     # Step 2b: Fill holes for 3D (composite on gray background)
-    step2b_fill_holes_for_3d(clean_path, filled_path)
+    filled = step2b_fill_holes_for_3d(cutout, filled_path if keep_intermediates else None)
 
     # Step 3: Create static avatar (uses transparent version)
-    create_static_avatar(clean_path, static_path, 128)
+    if scales:
+        from image_utils import scale_path, update_scale_manifest
+
+        statics = {scale: scale_path(static_path, scale) for scale in scales}
+        for scale, path in statics.items():
+            create_static_avatar(cutout, path, round(128 * scale))
+        update_scale_manifest(output_dir / "scales.json", {static_path.name: statics})
+    else:
+        create_static_avatar(cutout, static_path, 128)
 
     # Step 4: Convert to 3D (uses filled version to avoid holes)
-    step3_convert_to_3d(filled_path, model_path)
+    step3_convert_to_3d(filled, model_path, strict)
 
     # Step 5: Render spinning frames
-    frames = step4_render_spinning(model_path, member_dir, 36)
+    frames = step4_render_spinning(model_path, member_dir, 36, frame_budget, resolution, frame_timeout, backend)
 
-    # Step 6: Create GIF
-    step5_create_gif(frames, gif_path, 50)
+    # Step 6: Create GIF and/or spritesheet (one per scale with --scales)
+    create_spin_outputs(frames, gif_path, scales, spritesheet, gif, model_path)
 
     print(f"\n{'='*60}")
     print(f"COMPLETE: {member_id}")
@@ -552,12 +662,43 @@ def main():
                         help="Generate only this member (e.g., mayor_clawrence)")
     parser.add_argument("--skip-generate", action="store_true",
                         help="Skip generation, use existing concept images")
+    parser.add_argument("--variants", type=int, default=1, metavar="N",
+                        help="Generate N portraits per member concurrently plus a contact sheet, then stop")
     parser.add_argument("--rerender-only", action="store_true",
                         help="Only re-render GIFs from existing 3D models (faster)")
     parser.add_argument("--list", action="store_true",
                         help="List all council members")
+    parser.add_argument("--frame-budget", type=float, default=0.0,
+                        help="Target seconds per spin frame; lowers samples/resolution after the first frame")
+    parser.add_argument("--frame-timeout", type=float, default=120.0,
+                        help="Restart Blender if no spin frame finishes within this many seconds (finished frames are kept)")
+    parser.add_argument("--backend", choices=BACKENDS, default="subprocess",
+                        help="Render with the Blender binary per run, or in one warm process via the bpy module")
+    parser.add_argument("--spritesheet", choices=["webp", "png"],
+                        help="Also pack each spin into a spritesheet + JSON atlas (<member>_spin.webp/.json)")
+    parser.add_argument("--no-gif", action="store_true", help="With --spritesheet, skip the GIF")
+    parser.add_argument("--scales", type=str,
+                        help="Comma-separated avatar scales, e.g. 0.5,1,2: render once at the largest and "
+                             "downsample the rest (@<scale>x suffixes, listed in scales.json)")
+    parser.add_argument("--strict", action="store_true",
+                        help="Always convert to 3D, even if an earlier input looked the same (see model_reuse.py)")
+    parser.add_argument("--keep-intermediates", action="store_true",
+                        help="Also write clean.png and filled_for_3d.png (otherwise passed between steps in memory)")
+
+    parser.add_argument("--run-report", type=str, metavar="PATH",
+                        help="Write a JSON run report (first-frame vs. steady-state frame times) to PATH")
 
     args = parser.parse_args()
+    atexit.register(run_report.finish, args.run_report)
+    if args.no_gif and not args.spritesheet:
+        parser.error("--no-gif requires --spritesheet")
+    if args.scales:
+        from image_utils import parse_scales
+
+        try:
+            args.scales = parse_scales(args.scales)
+        except ValueError as e:
+            parser.error(str(e))
 
     if args.list:
         print("Council Members:")
@@ -568,23 +709,41 @@ def main():
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    if args.member:
-        if args.member not in COUNCIL_MEMBERS:
-            print(f"ERROR: Unknown member '{args.member}'")
-            print("Available:", list(COUNCIL_MEMBERS.keys()))
-            sys.exit(1)
-        generate_member(args.member, output_dir, args.skip_generate, args.rerender_only)
-    else:
-        # Generate all members
-        for member_id in COUNCIL_MEMBERS:
-            generate_member(member_id, output_dir, args.skip_generate, args.rerender_only)
+    if args.member and args.member not in COUNCIL_MEMBERS:
+        print(f"ERROR: Unknown member '{args.member}'")
+        print("Available:", list(COUNCIL_MEMBERS.keys()))
+        sys.exit(1)
+
+    if args.variants > 1:
+        from variants import generate_variants
+
+        for member_id in [args.member] if args.member else COUNCIL_MEMBERS:
+            member_dir = output_dir / member_id
+            generate_variants(lambda path: step1_generate_portrait(member_id, path), member_dir / "concept.png",
+                              args.variants)
+        print("\nCopy the chosen concept_v<N>.png to concept.png in each member directory, then run with "
+              "--skip-generate")
+        return
+
+    # One backend for the whole run, so the bpy worker stays warm between members
+    backend = get_backend(args.backend)
+    try:
+        for member_id in [args.member] if args.member else COUNCIL_MEMBERS:
+            generate_member(member_id, output_dir, args.skip_generate, args.rerender_only, args.frame_budget,
+                            args.scales, args.spritesheet, not args.no_gif, args.frame_timeout, backend,
+                            args.keep_intermediates, args.strict)
+    finally:
+        backend.close()
 
     print("\n" + "="*60)
     print("ALL COUNCIL AVATARS COMPLETE")
     print("="*60)
     print(f"\nCopy to web app:")
     print(f"  cp {output_dir}/*.png apps/web/public/assets/council/")
-    print(f"  cp {output_dir}/*_spin.gif apps/web/public/assets/council/")
+    if not args.no_gif:
+        print(f"  cp {output_dir}/*_spin.gif apps/web/public/assets/council/")
+    if args.spritesheet:
+        print(f"  cp {output_dir}/*_spin.{args.spritesheet} {output_dir}/*_spin.json apps/web/public/assets/council/")
 
 
 if __name__ == "__main__":
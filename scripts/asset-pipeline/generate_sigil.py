@@ -9,17 +9,27 @@ Generates:
 
 Usage:
     python generate_sigil.py --output-dir ./output/sigil
+    python generate_sigil.py --variants 4  # Pick a concept first
 """
 
 import os
 import sys
 import argparse
+import atexit
 import base64
-import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 
+import api_limits
+import run_report
+from artifacts import Artifact
+from asset_registry import checkpoint_renderer, registry
+from blender_backend import BACKENDS, SubprocessBackend, get_backend
+from blender_utils import (FRAME_BUDGET_SNIPPET, REGION_SNIPPET, prepare_frames_dir, render_fingerprint,
+                           restore_resolution, split_regions, stitch_regions)
+
 # Load environment variables from project root
 env_path = Path(__file__).parent.parent.parent / ".env.local"
 load_dotenv(env_path)
@@ -64,7 +74,8 @@ Design requirements:
 
     print("Generating sigil...")
 
-    response = client.models.generate_content(
+    response = api_limits.call(
+        "gemini", client.models.generate_content,
         model="gemini-3-pro-image-preview",
         contents=prompt,
         config={
@@ -79,18 +90,29 @@ Design requirements:
             with open(output_path, "wb") as f:
                 f.write(base64.b64decode(image_data) if isinstance(image_data, str) else image_data)
             print(f"Saved sigil to: {output_path}")
+            registry().register(output_path, "concept", params={"model": "gemini-3-pro-image-preview"})
             return output_path
 
     print("ERROR: No image in response")
     sys.exit(1)
 
 
-def convert_to_3d(image_path: Path, output_path: Path) -> Path:
-    """Convert 2D sigil to 3D model using Tripo3D via fal.ai."""
+def convert_to_3d(image, output_path: Path, strict: bool = False) -> Path:
+    """
+    Convert 2D sigil to 3D model using Tripo3D via fal.ai (image is a path or Artifact).
+
+    An image that looks the same as an earlier input reuses that model
+    (see model_reuse) unless strict.
+    """
     print("\n" + "=" * 60)
     print("Converting to 3D Model (Tripo3D via fal.ai)")
     print("=" * 60)
 
+    from model_reuse import record_model, reuse_model
+
+    if reuse_model(image, output_path, "tripo3d/tripo/v2.5/image-to-3d", strict):
+        return output_path
+
     try:
         import fal_client
     except ImportError:
@@ -104,15 +126,17 @@ def convert_to_3d(image_path: Path, output_path: Path) -> Path:
 
     os.environ["FAL_KEY"] = fal_key
 
-    print(f"Input image: {image_path}")
+    image = Artifact.of(image)
+    print(f"Input image: {image.path or image.name}")
     print("Uploading and converting to 3D...")
 
-    # Upload the image
-    image_url = fal_client.upload_file(str(image_path))
+    # Upload the image from memory
+    image_url = image.upload()
     print(f"Uploaded to: {image_url}")
 
     # Call Tripo3D v2.5
-    result = fal_client.subscribe(
+    result = api_limits.call(
+        "tripo3d", fal_client.subscribe,
         "tripo3d/tripo/v2.5/image-to-3d",
         arguments={
             "image_url": image_url,
@@ -127,24 +151,34 @@ def convert_to_3d(image_path: Path, output_path: Path) -> Path:
         model_url = result["model_mesh"]["url"]
         print(f"Downloading model from: {model_url}")
 
-        import httpx
-        response = httpx.get(model_url)
-        with open(output_path, "wb") as f:
-            f.write(response.content)
+        Artifact.download(model_url).save(output_path)
         print(f"Saved 3D model to: {output_path}")
+        registry().register(output_path, "model", parents=image.lineage,
+                            params={"endpoint": "tripo3d/tripo/v2.5/image-to-3d"})
+        record_model(image, output_path, "tripo3d/tripo/v2.5/image-to-3d")
         return output_path
     else:
         print(f"ERROR: Unexpected response format: {result}")
         sys.exit(1)
 
 
-def render_spinning_sigil(model_path: Path, output_dir: Path, num_frames: int = 36) -> list:
-    """Render multiple frames of the 3D sigil model spinning using Blender."""
+def render_spinning_sigil(model_path: Path, output_dir: Path, num_frames: int = 36, frame_budget: float = 0.0,
+                          resolution: int = 256, region: list = None, frame_timeout: float = 120.0,
+                          backend=None) -> list:
+    """
+    Render multiple frames of the 3D sigil model spinning using Blender.
+
+    With region (a Blender border, see blender_utils.split_regions) only
+    that strip of each frame is rendered, for split-frame hero renders.
+    Frames from an interrupted run of the same render are reused, and
+    Blender is restarted if no frame finishes within frame_timeout.
+    backend is a blender_backend backend (a fresh Blender process by default).
+    """
     print("\n" + "=" * 60)
     print("Render Spinning Frames (Blender)")
     print("=" * 60)
 
-    blender_script = '''
+    blender_script = FRAME_BUDGET_SNIPPET + REGION_SNIPPET + '''
 import bpy
 import sys
 import math
@@ -156,6 +190,9 @@ argv = argv[argv.index("--") + 1:]
 model_path = argv[0]
 output_dir = argv[1]
 num_frames = int(argv[2])
+frame_budget = float(argv[3]) if len(argv) > 3 else 0.0
+resolution = int(argv[4]) if len(argv) > 4 else 256
+region = [float(v) for v in argv[5].split(",")] if len(argv) > 5 and argv[5] != "-" else None
 
 # Clear default scene
 bpy.ops.object.select_all(action='SELECT')
@@ -243,65 +280,80 @@ if bg:
 
 # Render settings
 scene = bpy.context.scene
-scene.render.resolution_x = 256
-scene.render.resolution_y = 256
+scene.render.resolution_x = resolution
+scene.render.resolution_y = resolution
 scene.render.film_transparent = True
 scene.render.image_settings.file_format = 'PNG'
 scene.render.image_settings.color_mode = 'RGBA'
+apply_region(scene, region)
 
 # Render spinning frames - model rotates around vertical (Z) axis
+budget = FrameBudget(scene, frame_budget)
+
 for i in range(num_frames):
     angle = (i / num_frames) * 2 * math.pi
     pivot.rotation_euler = (0, 0, angle)
 
     frame_path = f"{output_dir}/frame_{i:03d}.png"
-    scene.render.filepath = frame_path
-    bpy.ops.render.render(write_still=True)
-    print(f"Rendered frame {i+1}/{num_frames}")
+    budget.render_frame(i, num_frames, frame_path)
 
+budget.summary()
 print("Done rendering frames!")
 '''
 
-    # Write the Blender script
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-        f.write(blender_script)
-        script_path = f.name
-
     frames_dir = output_dir / "frames"
-    frames_dir.mkdir(parents=True, exist_ok=True)
+    prepare_frames_dir(frames_dir, render_fingerprint(blender_script, model_path, num_frames, frame_budget,
+                                                      resolution, region))
 
     print(f"Model: {model_path}")
     print(f"Frames dir: {frames_dir}")
     print(f"Num frames: {num_frames}")
 
-    try:
-        blender_exe = "/Applications/Blender.app/Contents/MacOS/Blender"
-        if not os.path.exists(blender_exe):
-            blender_exe = "blender"
-
-        cmd = [
-            blender_exe,
-            "--background",
-            "--python", script_path,
-            "--", str(model_path), str(frames_dir), str(num_frames)
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-        print(result.stdout)
-        if result.returncode != 0:
-            print(f"Blender stderr: {result.stderr}")
-            sys.exit(1)
-
-    finally:
-        os.unlink(script_path)
+    backend = backend or SubprocessBackend()
+    rendered = backend.run_script(blender_script, [
+        model_path, frames_dir, num_frames, frame_budget, resolution,
+        ",".join(str(v) for v in region) if region else "-"
+    ], frame_timeout)
+    if rendered is None:
+        sys.exit(1)
+    label = f"sigil region {region}" if region else "sigil spin"
+    run_report.current().add_frames(label, rendered.times)
 
     # Return list of frame paths
     frames = sorted(frames_dir.glob("frame_*.png"))
+    if frame_budget:
+        restore_resolution(frames, (resolution, resolution))
     print(f"Rendered {len(frames)} frames")
     return frames
 
 
-def create_gif(frame_paths: list, output_path: Path, duration: int = 50) -> Path:
-    """Combine frames into an animated GIF."""
+def render_sigil_hero(model_path: Path, output_path: Path, resolution: int = 2048, parts: int = 4) -> Path:
+    """
+    Render one large front-facing sigil frame, split across Blender processes.
+
+    Each process renders one horizontal strip of the frame and the strips
+    are stitched back together (see blender_utils.split_regions).
+    """
+    regions = split_regions(resolution, resolution, parts)
+    print(f"Split-frame hero render: {resolution}x{resolution} in {len(regions)} strips")
+
+    with tempfile.TemporaryDirectory() as tiles_dir:
+        def render_part(index: int) -> Path:
+            part_dir = Path(tiles_dir) / f"part{index}"
+            return render_spinning_sigil(model_path, part_dir, 1, 0.0, resolution, regions[index]["border"],
+                                         frame_timeout=900.0)[0]
+
+        with ThreadPoolExecutor(max_workers=len(regions)) as pool:
+            tiles = list(pool.map(render_part, range(len(regions))))
+        stitch_regions(tiles, regions, (resolution, resolution)).save(output_path, "PNG")
+
+    print(f"Saved hero render to: {output_path}")
+    registry().register(output_path, "hero", parents=[model_path], params={"resolution": resolution, "parts": parts})
+    return output_path
+
+
+def create_gif(frame_paths: list, output_path: Path, duration: int = 50, crop: bool = True) -> Path:
+    """Combine frames into an animated GIF, cropped to the spinning sigil (crop=False keeps 256x256)."""
     print("\n" + "=" * 60)
     print("STEP 6: Create Animated GIF")
     print("=" * 60)
@@ -311,25 +363,26 @@ def create_gif(frame_paths: list, output_path: Path, duration: int = 50) -> Path
     except ImportError:
         print("ERROR: Pillow not installed. Run: pip install Pillow")
         sys.exit(1)
+    from image_utils import encode_spin_gif
 
-    frames = [Image.open(f) for f in frame_paths]
-
-    # Save as GIF
-    frames[0].save(
-        output_path,
-        save_all=True,
-        append_images=frames[1:],
-        duration=duration,  # ms per frame
-        loop=0,  # infinite loop
-        disposal=2,  # clear frame before next
-    )
+    frames = []
+    for f in frame_paths:
+        with Image.open(f) as img:
+            frames.append(img.convert("RGBA"))
 
-    print(f"Saved GIF to: {output_path}")
+    stats = encode_spin_gif(frames, output_path, duration, crop)
+    print(f"Saved GIF to: {output_path} ({stats['size'][0]}x{stats['size'][1]}, crop {stats['crop']}, "
+          f"{stats['bytes'] / 1024:.0f} KB)")
     return output_path
 
 
-def remove_background(input_path: Path, output_path: Path) -> Path:
-    """Remove background from image using fal.ai's background removal model."""
+def remove_background(input_path: Path, output_path: Path) -> Artifact:
+    """
+    Remove background from image using fal.ai's background removal model.
+
+    Writes output_path and also returns the cutout in memory, so the
+    static sizes and the 3D upload reuse it without reading it back.
+    """
     print("\n" + "=" * 60)
     print("Removing Background (fal.ai)")
     print("=" * 60)
@@ -351,11 +404,12 @@ def remove_background(input_path: Path, output_path: Path) -> Path:
     print("Uploading and removing background...")
 
     # Upload the image
-    image_url = fal_client.upload_file(str(input_path))
+    image_url = Artifact.of(input_path).upload()
     print(f"Uploaded to: {image_url}")
 
     # Call background removal model
-    result = fal_client.subscribe(
+    result = api_limits.call(
+        "birefnet", fal_client.subscribe,
         "fal-ai/birefnet",  # High-quality background removal
         arguments={
             "image_url": image_url,
@@ -370,19 +424,18 @@ def remove_background(input_path: Path, output_path: Path) -> Path:
         result_url = result["image"]["url"]
         print(f"Downloading from: {result_url}")
 
-        import httpx
-        response = httpx.get(result_url)
-        with open(output_path, "wb") as f:
-            f.write(response.content)
+        cutout = Artifact.download(result_url, Path(output_path).name)
+        cutout.save(output_path)
         print(f"Saved background-removed sigil to: {output_path}")
-        return output_path
+        registry().register(output_path, "cutout", parents=[input_path], params={"endpoint": "fal-ai/birefnet"})
+        return cutout
     else:
         print(f"ERROR: Unexpected response format: {result}")
         sys.exit(1)
 
 
-def create_static_sigil(sigil_path: Path, output_path: Path, size: int = 256) -> Path:
-    """Create a clean static version of the sigil at specified size."""
+def create_static_sigil(sigil, output_path: Path, size: int = 256) -> Path:
+    """Create a clean static version of the sigil at specified size (sigil is a path or Artifact)."""
     print("\n" + "=" * 60)
     print("Creating Static Sigil")
     print("=" * 60)
@@ -393,7 +446,8 @@ def create_static_sigil(sigil_path: Path, output_path: Path, size: int = 256) ->
         print("ERROR: Pillow not installed. Run: pip install Pillow")
         sys.exit(1)
 
-    img = Image.open(sigil_path)
+    sigil = Artifact.of(sigil)
+    img = sigil.image.copy()
 
     # Resize to target size, maintaining aspect ratio
     img.thumbnail((size, size), Image.LANCZOS)
@@ -408,6 +462,7 @@ def create_static_sigil(sigil_path: Path, output_path: Path, size: int = 256) ->
 
     result.save(output_path, 'PNG')
     print(f"Saved static sigil to: {output_path}")
+    registry().register(output_path, "static", parents=sigil.lineage, params={"size": size})
     return output_path
 
 
@@ -415,9 +470,27 @@ def main():
     parser = argparse.ArgumentParser(description="Sigil Generation for Clawntawn")
     parser.add_argument("--output-dir", type=str, default="./output/sigil", help="Output directory")
     parser.add_argument("--skip-generate", action="store_true", help="Skip generation, use existing sigil_concept.png")
+    parser.add_argument("--variants", type=int, default=1, metavar="N",
+                        help="Generate N sigil concepts concurrently plus a contact sheet, then stop")
     parser.add_argument("--frames", type=int, default=36, help="Number of frames for spinning animation")
+    parser.add_argument("--frame-budget", type=float, default=0.0,
+                        help="Target seconds per spin frame; lowers samples/resolution after the first frame")
+    parser.add_argument("--frame-timeout", type=float, default=120.0,
+                        help="Restart Blender if no spin frame finishes within this many seconds (finished frames are kept)")
+    parser.add_argument("--backend", choices=BACKENDS, default="subprocess",
+                        help="Render the spin with the Blender binary, or in-process via the bpy module")
+    parser.add_argument("--strict", action="store_true",
+                        help="Always convert to 3D, even if an earlier input looked the same (see model_reuse.py)")
+    parser.add_argument("--hero", type=int, metavar="RESOLUTION",
+                        help="Also render a single large front-facing frame (e.g. 2048) for marketing")
+    parser.add_argument("--split-frame", type=int, default=4, metavar="N",
+                        help="With --hero, split the frame into N strips rendered by parallel Blender processes")
+
+    parser.add_argument("--run-report", type=str, metavar="PATH",
+                        help="Write a JSON run report (first-frame vs. steady-state frame times) to PATH")
 
     args = parser.parse_args()
+    atexit.register(run_report.finish, args.run_report)
 
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -427,29 +500,53 @@ def main():
     model_path = output_dir / "sigil.glb"
 
     # Step 1: Generate sigil concept
+    if args.variants > 1:
+        from variants import generate_variants
+
+        generate_variants(generate_sigil_concept, concept_path, args.variants)
+        print(f"\nCopy the chosen sigil_concept_v<N>.png to {concept_path}, then run with --skip-generate")
+        return
     if args.skip_generate and concept_path.exists():
         print(f"Using existing sigil: {concept_path}")
     else:
         generate_sigil_concept(concept_path)
 
     # Step 2: Remove background
-    remove_background(concept_path, clean_path)
+    clean = remove_background(concept_path, clean_path)
 
     # Step 3: Create static versions at different sizes (from clean version)
-    create_static_sigil(clean_path, output_dir / "sigil_256.png", 256)
-    create_static_sigil(clean_path, output_dir / "sigil_128.png", 128)
-    create_static_sigil(clean_path, output_dir / "sigil_64.png", 64)
-    create_static_sigil(clean_path, output_dir / "sigil_32.png", 32)
+    create_static_sigil(clean, output_dir / "sigil_256.png", 256)
+    create_static_sigil(clean, output_dir / "sigil_128.png", 128)
+    create_static_sigil(clean, output_dir / "sigil_64.png", 64)
+    create_static_sigil(clean, output_dir / "sigil_32.png", 32)
 
     # Step 4: Convert to 3D model
-    convert_to_3d(clean_path, model_path)
+    convert_to_3d(clean, model_path, args.strict)
 
     # Step 5: Render spinning frames from 3D model
-    frames = render_spinning_sigil(model_path, output_dir, args.frames)
+    backend = get_backend(args.backend)
+    try:
+        frames = render_spinning_sigil(model_path, output_dir, args.frames, args.frame_budget,
+                                       frame_timeout=args.frame_timeout, backend=backend)
+    finally:
+        backend.close()
+
+    # Step 5b: Flag clipped, tiny or empty frames in the run report
+    from render_qa import check_spin
+
+    check_spin(frames, "sigil_spin")
 
     # Step 6: Create GIF
     gif_path = output_dir / "sigil_spin.gif"
     create_gif(frames, gif_path, duration=50)
+    registry().register(gif_path, "spin", parents=[model_path], params={"frames": len(frames)},
+                        renderer=checkpoint_renderer("blender-sigil-spin", output_dir / "frames"))
+
+    # Optional: large hero render, split across processes
+    hero_path = None
+    if args.hero:
+        hero_path = output_dir / f"sigil_hero_{args.hero}.png"
+        render_sigil_hero(model_path, hero_path, args.hero, args.split_frame)
 
     print("\n" + "=" * 60)
     print("SIGIL GENERATION COMPLETE")
@@ -460,6 +557,8 @@ def main():
     print(f"Static 64:   {output_dir / 'sigil_64.png'}")
     print(f"Static 32:   {output_dir / 'sigil_32.png'}")
     print(f"Spinning:    {gif_path}")
+    if hero_path:
+        print(f"Hero:        {hero_path}")
     print("\nCopy to web app:")
     print(f"  cp {output_dir}/sigil_*.png apps/web/public/assets/ui/")
     print(f"  cp {gif_path} apps/web/public/assets/ui/")
@@ -0,0 +1,426 @@
+"""
+Vectorized (NumPy) image checks and fixes for generated assets.
+"""
+
+import struct
+
+import numpy as np
+from PIL import Image
+
+
+def seam_score(img: Image.Image) -> dict:
+    """
+    Measure how well a texture tiles: edge-wrap difference vs. interior.
+
+    For each axis, the mean absolute difference between the last and first
+    row/column is divided by the mean difference between neighbouring
+    rows/columns inside the texture. A seamless tile scores ~1.0; visible
+    seams score well above that. Returns {"x": ..., "y": ..., "score": max}.
+    """
+    pixels = np.asarray(img.convert("RGB"), dtype=np.float32)
+
+    def axis_ratio(axis: int) -> float:
+        interior = np.abs(np.diff(pixels, axis=axis)).mean()
+        wrap = np.abs(np.take(pixels, -1, axis=axis) - np.take(pixels, 0, axis=axis)).mean()
+        return float(wrap / max(interior, 1e-6))
+
+    x_ratio = axis_ratio(1)
+    y_ratio = axis_ratio(0)
+    return {"x": x_ratio, "y": y_ratio, "score": max(x_ratio, y_ratio)}
+
+
+def fix_seams(img: Image.Image, blend: float = 0.25) -> Image.Image:
+    """
+    Make a texture tile seamlessly with offset-and-blend.
+
+    Each axis is handled separately: the texture is rolled by half its size
+    (moving the seam to the middle) and blended with the original using a
+    ramp that favours the rolled copy near the edges and the original in the
+    centre. blend is the ramp width as a fraction of the texture size.
+    """
+    mode = img.mode if img.mode in ("RGB", "RGBA") else "RGBA"
+    pixels = np.asarray(img.convert(mode), dtype=np.float32)
+
+    for axis in (1, 0):
+        size = pixels.shape[axis]
+        rolled = np.roll(pixels, size // 2, axis=axis)
+        # Distance to the nearest edge, ramped to 1 over the blend width
+        dist = np.minimum(np.arange(size), np.arange(size)[::-1]).astype(np.float32)
+        weight = np.clip(dist / max(blend * size, 1.0), 0.0, 1.0)
+        shape = [1, 1, 1]
+        shape[axis] = size
+        weight = weight.reshape(shape)
+        pixels = weight * pixels + (1.0 - weight) * rolled
+
+    return Image.fromarray(np.clip(pixels + 0.5, 0, 255).astype(np.uint8), mode)
+
+
+def _area_weights(in_size: int, out_size: int) -> np.ndarray:
+    """(out_size, in_size) matrix averaging the input pixels under each output pixel."""
+    edges = np.arange(out_size + 1) * (in_size / out_size)
+    starts, ends = edges[:-1, None], edges[1:, None]
+    pixels = np.arange(in_size)[None, :]
+    overlap = np.clip(np.minimum(ends, pixels + 1) - np.maximum(starts, pixels), 0.0, None)
+    return (overlap / overlap.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def downsample(img: Image.Image, size: tuple) -> Image.Image:
+    """
+    Shrink an RGBA render to size with gamma-correct, premultiplied averaging.
+
+    Colours are averaged as linear light and weighted by alpha, so edges
+    neither darken (sRGB averaging) nor pick up the colour of transparent
+    pixels (straight-alpha averaging). Each output pixel is the exact area
+    average of the input pixels it covers, applied as two matrix products.
+    """
+    pixels = np.asarray(img.convert("RGBA"), dtype=np.float32) / 255.0
+    srgb, alpha = pixels[..., :3], pixels[..., 3:]
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+    premultiplied = np.concatenate([linear * alpha, alpha], axis=2)
+
+    rows = _area_weights(pixels.shape[0], size[1])
+    cols = _area_weights(pixels.shape[1], size[0])
+    result = np.einsum("yh,hwc,xw->yxc", rows, premultiplied, cols, optimize=True)
+
+    alpha = result[..., 3:]
+    linear = np.divide(result[..., :3], alpha, out=np.zeros_like(result[..., :3]), where=alpha > 0)
+    linear = np.clip(linear, 0.0, 1.0)
+    srgb = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+    out = np.concatenate([srgb, alpha], axis=2)
+    return Image.fromarray((np.clip(out, 0.0, 1.0) * 255 + 0.5).astype(np.uint8), "RGBA")
+
+
+def parse_scales(value: str) -> tuple:
+    """Parse a --scales argument such as "0.5,1,2" into sorted floats."""
+    scales = sorted({float(part) for part in value.split(",") if part.strip()})
+    if not scales or scales[0] <= 0:
+        raise ValueError(f"Invalid scales: {value!r}")
+    return tuple(scales)
+
+
+def scale_path(path, scale: float):
+    """File for a scale variant: 1x keeps the plain name, others get an @<scale>x suffix."""
+    from pathlib import Path
+
+    path = Path(path)
+    return path if scale == 1 else path.with_name(f"{path.stem}@{scale:g}x{path.suffix}")
+
+
+def write_scale_variants(master_path, base_size: int, scales: tuple, output_dir=None) -> dict:
+    """
+    Derive every scale variant from one master render.
+
+    The master at master_path was rendered at base_size * max(scales); it is
+    renamed to its own scale suffix and each smaller scale is downsampled
+    from it. With output_dir, every variant is written there instead and the
+    master stays where it is (e.g. checkpointed spin frames, which must only
+    ever hold master renders). Returns {scale: path}.
+    """
+    import shutil
+    from pathlib import Path
+
+    master_path = Path(master_path)
+    master_scale = max(scales)
+    with Image.open(master_path) as img:
+        master = img.convert("RGBA")
+
+    target = master_path if output_dir is None else Path(output_dir) / master_path.name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    variants = {master_scale: scale_path(target, master_scale)}
+    if output_dir is not None:
+        shutil.copyfile(master_path, variants[master_scale])
+    elif variants[master_scale] != master_path:
+        master_path.replace(variants[master_scale])
+    for scale in scales:
+        if scale == master_scale:
+            continue
+        size = max(1, round(base_size * scale))
+        variants[scale] = scale_path(target, scale)
+        downsample(master, (size, size)).save(variants[scale], "PNG")
+    return variants
+
+
+def update_scale_manifest(manifest_path, variants: dict) -> None:
+    """
+    Record scale variants in a JSON manifest next to the assets.
+
+    variants maps each asset's 1x file name to {scale: path}; entries are
+    merged into the manifest as {"<name>": {"<scale>x": {"file", "width",
+    "height"}}} with paths relative to the manifest.
+    """
+    import json
+    import os
+    from pathlib import Path
+
+    manifest_path = Path(manifest_path)
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    for name, paths in variants.items():
+        entry = manifest.setdefault(name, {})
+        for scale, path in sorted(paths.items()):
+            with Image.open(path) as img:
+                width, height = img.size
+            entry[f"{scale:g}x"] = {
+                "file": os.path.relpath(path, manifest_path.parent),
+                "width": width,
+                "height": height,
+            }
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
+
+def alpha_bbox(frames: list, threshold: int = 128):
+    """Union bounding box (left, top, right, bottom) of alpha > threshold over all frames."""
+    union = None
+    for frame in frames:
+        alpha = np.asarray(frame.convert("RGBA"))[..., 3] > threshold
+        rows, cols = np.nonzero(alpha.any(axis=1))[0], np.nonzero(alpha.any(axis=0))[0]
+        if len(rows) == 0:
+            continue
+        box = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+        union = box if union is None else (min(union[0], box[0]), min(union[1], box[1]),
+                                           max(union[2], box[2]), max(union[3], box[3]))
+    return union
+
+
+def max_pixel_difference(a: Image.Image, b: Image.Image) -> int:
+    """
+    Largest per-channel difference (0-255) between two RGBA images, or 255
+    if their sizes differ. Colour under pixels transparent in both is
+    invisible and ignored.
+    """
+    if a.size != b.size:
+        return 255
+    a = np.asarray(a.convert("RGBA"), dtype=np.int16)
+    b = np.asarray(b.convert("RGBA"), dtype=np.int16)
+    diff = np.abs(a - b)
+    diff[(a[..., 3] == 0) & (b[..., 3] == 0), :3] = 0
+    return int(diff.max()) if diff.size else 0
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)
+    return np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+
+
+def phash(img: Image.Image, size: int = 32, bits: int = 8) -> int:
+    """
+    64-bit perceptual hash (DCT of a 32x32 greyscale thumbnail, low 8x8
+    frequencies against their median). Re-encoding, resizing and small
+    colour noise flip a few bits at most; a different picture flips ~half.
+    Transparent pixels are composited on white first, so a cutout hashes
+    like the same subject on the concept's white background.
+    """
+    rgba = img.convert("RGBA")
+    flat = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+    flat.alpha_composite(rgba)
+    grey = np.asarray(flat.convert("L").resize((size, size), Image.LANCZOS), dtype=np.float64)
+    dct = _dct_matrix(size)
+    low = (dct @ grey @ dct.T)[:bits, :bits].ravel()
+    # The DC term is just mean brightness; leave it out of the median
+    hash_bits = low > np.median(low[1:])
+    return int("".join("1" if b else "0" for b in hash_bits), 2)
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def _bbox(mask: np.ndarray):
+    rows, cols = np.nonzero(mask.any(axis=1))[0], np.nonzero(mask.any(axis=0))[0]
+    if len(rows) == 0:
+        return None
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def _union(a, b):
+    if a is None or b is None:
+        return a or b
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def _area(box) -> int:
+    return 0 if box is None else (box[2] - box[0]) * (box[3] - box[1])
+
+
+def _plan_gif_frames(targets: list) -> list:
+    """
+    Choose per-frame rectangles and disposal for palette-index frames.
+
+    Index 0 is transparent. Every frame only stores the sub-rectangle that
+    changes, with unchanged pixels inside it left transparent (index 0) so
+    they compress well. A frame that keeps the previous one on screen
+    (disposal 1) cannot make pixels transparent again, so when the next
+    frame needs that, the previous frame is switched to disposal 2 (clear
+    its rectangle) and its rectangle widened to cover those pixels.
+    Returns [{"target", "need", "rect", "disposal", "duration"}] with
+    identical frames merged into the one before.
+    """
+    height, width = targets[0].shape
+    planned = []
+    canvas = np.zeros((height, width), dtype=np.uint8)
+
+    for target in targets:
+        if not planned:
+            need = target != canvas
+            # A blank first frame still needs a rectangle; draw one transparent pixel
+            rect = _bbox(need) or (0, 0, 1, 1)
+            planned.append({"target": target, "need": need, "rect": rect, "disposal": 1, "frames": 1})
+            canvas = target
+            continue
+
+        previous = planned[-1]
+        # Option A: keep the previous frame on screen
+        keep_need = target != canvas
+        keep_valid = not (keep_need & (target == 0)).any()
+
+        # Option B: clear the previous frame's rectangle first, widened to
+        # every pixel that has to become transparent
+        clear_rect = _union(previous["rect"], _bbox((target == 0) & (canvas != 0)))
+        cleared = canvas.copy()
+        if clear_rect is not None:
+            cleared[clear_rect[1]:clear_rect[3], clear_rect[0]:clear_rect[2]] = 0
+        clear_need = target != cleared
+
+        keep_cost = _area(_bbox(keep_need))
+        clear_cost = _area(_bbox(clear_need)) + _area(clear_rect) - _area(previous["rect"])
+        if keep_valid and keep_cost <= clear_cost:
+            need = keep_need
+        else:
+            previous["disposal"] = 2
+            previous["rect"] = clear_rect
+            need = clear_need
+
+        rect = _bbox(need)
+        if rect is None and previous["disposal"] == 1:
+            # Identical frame: show the previous one for longer
+            previous["frames"] += 1
+            continue
+        if rect is None:
+            # The clear already produces this frame; draw one transparent pixel
+            rect = (0, 0, 1, 1)
+        planned.append({"target": target, "need": need, "rect": rect, "disposal": 1, "frames": 1})
+        canvas = target
+
+    return planned
+
+
+def encode_spin_gif(frames: list, output_path, duration: int = 50, crop: bool = True,
+                    alpha_threshold: int = 128) -> dict:
+    """
+    Encode RGBA frames as a small looping GIF with 1-bit transparency.
+
+    Frames are cropped to the union alpha bounding box (crop=True), mapped
+    to one shared 255-colour palette (index 0 = transparent) so unchanged
+    pixels keep the same index, and written as inter-frame deltas with
+    per-frame disposal (see _plan_gif_frames). Returns {"size", "crop",
+    "frames", "bytes"}.
+    """
+    from pathlib import Path
+    from PIL import GifImagePlugin
+
+    frames = [frame.convert("RGBA") for frame in frames]
+    box = alpha_bbox(frames, alpha_threshold) if crop else None
+    # Every frame blank (alpha_bbox is None): nothing to crop to, keep the full canvas
+    if box is not None:
+        frames = [frame.crop(box) for frame in frames]
+    width, height = frames[0].size
+
+    # One palette for every frame, built from the opaque pixels of all of them
+    rgba = np.stack([np.asarray(frame) for frame in frames])
+    opaque = rgba[..., 3] > alpha_threshold
+    colors = rgba[..., :3][opaque] if opaque.any() else np.zeros((1, 3), dtype=np.uint8)
+    sample = Image.fromarray(colors.reshape(1, -1, 3), "RGB")
+    palette_image = sample.quantize(255, method=Image.Quantize.MEDIANCUT)
+
+    targets = []
+    for frame, mask in zip(frames, opaque):
+        # Same compositing onto black as the previous encoder, no dithering
+        # so that static areas map to identical indices in every frame
+        composite = Image.alpha_composite(Image.new("RGBA", frame.size, (0, 0, 0, 255)), frame).convert("RGB")
+        indices = np.asarray(composite.quantize(palette=palette_image, dither=Image.Dither.NONE)).astype(np.uint8)
+        targets.append(np.where(mask, indices + 1, 0).astype(np.uint8))
+
+    palette = [0, 0, 0] + palette_image.getpalette()[:255 * 3]
+    palette += [0] * (768 - len(palette))
+
+    planned = _plan_gif_frames(targets)
+
+    data = [
+        b"GIF89a",
+        struct.pack("<HHBBB", width, height, 0xF7, 0, 0),  # 256-entry global colour table
+        bytes(palette),
+        b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00",     # loop forever
+    ]
+    for frame in planned:
+        left, top, right, bottom = frame["rect"]
+        pixels = np.where(frame["need"], frame["target"], 0)[top:bottom, left:right]
+        image = Image.fromarray(np.ascontiguousarray(pixels), "P")
+        image.putpalette(palette)
+        data.extend(GifImagePlugin.getdata(image, (left, top), duration=duration * frame["frames"],
+                                           disposal=frame["disposal"], transparency=0))
+    data.append(b";")
+
+    output_path = Path(output_path)
+    output_path.write_bytes(b"".join(data))
+    return {"size": (width, height), "crop": box, "frames": len(planned), "bytes": output_path.stat().st_size}
+
+
+def write_spritesheet(frames: list, output_path, duration: int = 50, crop: bool = True,
+                      columns: int = None) -> dict:
+    """
+    Pack animation frames into one spritesheet plus a JSON atlas.
+
+    Frames are cropped to their union alpha bounding box (crop=True) and laid
+    out on a uniform grid, so CSS can step through them with
+    background-position and Phaser can load the sheet with load.atlas().
+    The image format follows output_path (.webp lossless or .png); the atlas
+    goes next to it as <stem>.json in TexturePacker's JSON-hash layout, with
+    the frame duration and grid in "meta". Returns the atlas dict.
+    """
+    import json
+    import math
+    from pathlib import Path
+
+    output_path = Path(output_path)
+    frames = [frame.convert("RGBA") for frame in frames]
+    source_w, source_h = frames[0].size
+    box = (alpha_bbox(frames, 0) if crop else None) or (0, 0, source_w, source_h)
+    cell_w, cell_h = box[2] - box[0], box[3] - box[1]
+    columns = columns or math.ceil(math.sqrt(len(frames)))
+    rows = math.ceil(len(frames) / columns)
+
+    sheet = Image.new("RGBA", (columns * cell_w, rows * cell_h), (0, 0, 0, 0))
+    atlas_frames = {}
+    for index, frame in enumerate(frames):
+        x, y = (index % columns) * cell_w, (index // columns) * cell_h
+        sheet.paste(frame.crop(box), (x, y))
+        atlas_frames[f"frame_{index:03d}"] = {
+            "frame": {"x": x, "y": y, "w": cell_w, "h": cell_h},
+            "rotated": False,
+            "trimmed": crop,
+            "spriteSourceSize": {"x": box[0], "y": box[1], "w": cell_w, "h": cell_h},
+            "sourceSize": {"w": source_w, "h": source_h},
+            "duration": duration,
+        }
+
+    if output_path.suffix.lower() == ".webp":
+        sheet.save(output_path, "WEBP", lossless=True)
+    else:
+        sheet.save(output_path, "PNG", optimize=True)
+
+    atlas = {
+        "frames": atlas_frames,
+        "meta": {
+            "image": output_path.name,
+            "format": "RGBA8888",
+            "size": {"w": sheet.width, "h": sheet.height},
+            "scale": "1",
+            "frameDuration": duration,
+            "frameRate": round(1000 / duration, 3) if duration else None,
+            "columns": columns,
+            "rows": rows,
+            "frameCount": len(frames),
+        },
+    }
+    output_path.with_suffix(".json").write_text(json.dumps(atlas, indent=2) + "\n")
+    return atlas
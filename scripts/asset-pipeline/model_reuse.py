@@ -0,0 +1,60 @@
+"""
+Reuse Tripo3D models for inputs that look the same.
+
+A 3D conversion is the slowest and most expensive call in the pipeline,
+and a batch re-run often feeds it inputs that differ only in encoding (a
+re-downloaded birefnet cutout, a re-saved concept). Every conversion
+records the perceptual hash of its input in the asset registry; before the
+next one, reuse_model() looks for an earlier input within REUSE_DISTANCE
+bits and, if it finds one whose GLB is still on disk unchanged, copies
+that GLB to the output instead of converting. --strict skips the lookup.
+
+    model = reuse_model(image, output_path, converter)
+    if model is None:
+        ... convert ...
+        record_model(image, output_path, converter)
+"""
+
+import time
+from pathlib import Path
+
+import run_report
+from artifacts import Artifact
+from asset_registry import content_hash, registry, repo_relative
+from image_utils import phash
+
+# Re-encoding moves a 64-bit DCT hash by a bit or two; distinct subjects
+# (even on the same gray background) differ by well over ten
+REUSE_DISTANCE = 4
+
+
+def reuse_model(image, output_path: Path, converter: str, strict: bool = False,
+                max_distance: int = REUSE_DISTANCE) -> Path:
+    """
+    Copy the model of a perceptually identical earlier input to output_path;
+    returns output_path, or None when the input has to be converted.
+    """
+    if strict:
+        return None
+    image = Artifact.of(image)
+    start = time.time()
+    matches = registry().similar_conversions(phash(image.image), converter, max_distance)
+    if not matches:
+        return None
+
+    distance, model = matches[0]
+    output_path = Path(output_path)
+    if model.resolve() != output_path.resolve():
+        Artifact.of(model).save(output_path)
+    print(f"Reusing 3D model {repo_relative(model)} (input within {distance} bit(s); --strict to convert anyway)")
+    registry().register(output_path, "model", parents=image.lineage + [content_hash(model)],
+                        params={"converter": converter, "reused_from": repo_relative(model), "distance": distance},
+                        seconds=time.time() - start)
+    run_report.current().add("model_reuse", repo_relative(output_path),
+                             {"from": repo_relative(model), "distance": distance})
+    return output_path
+
+
+def record_model(image, model_path: Path, converter: str) -> None:
+    """Index a fresh conversion so later look-alike inputs can reuse it."""
+    registry().record_conversion(phash(Artifact.of(image).image), converter, model_path)
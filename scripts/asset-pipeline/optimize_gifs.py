@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Re-encode existing spin GIFs with union-bbox cropping and delta frames.
+
+New spins are written this way by the avatar and sigil scripts; this
+shrinks GIFs that were generated before.
+
+Usage:
+    python optimize_gifs.py "../../apps/web/public/assets/council/*_spin.gif"
+    python optimize_gifs.py ../../apps/web/public/assets/ui/sigil_spin.gif --no-crop
+"""
+
+import argparse
+import glob
+import sys
+from pathlib import Path
+
+from PIL import Image, ImageSequence
+
+from image_utils import encode_spin_gif
+
+
+def optimize_gif(path: Path, crop: bool = True, dry_run: bool = False) -> tuple:
+    """Re-encode one GIF in place (unless dry_run). Returns (old bytes, new bytes)."""
+    with Image.open(path) as gif:
+        durations = []
+        frames = []
+        for frame in ImageSequence.Iterator(gif):
+            durations.append(frame.info.get("duration", 50))
+            frames.append(frame.convert("RGBA"))
+
+    # Spins use one frame time; keep the most common one
+    duration = max(set(durations), key=durations.count)
+    target = path.with_suffix(".tmp.gif")
+    stats = encode_spin_gif(frames, target, duration, crop)
+    old_size = path.stat().st_size
+    if dry_run or stats["bytes"] >= old_size:
+        target.unlink()
+        return old_size, min(stats["bytes"], old_size)
+    target.replace(path)
+    return old_size, stats["bytes"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crop and delta-encode spin GIFs")
+    parser.add_argument("gifs", nargs="+", help="GIF files or globs")
+    parser.add_argument("--no-crop", action="store_true", help="Keep the original canvas size")
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without rewriting files")
+    args = parser.parse_args()
+
+    paths = sorted({Path(p) for pattern in args.gifs for p in (glob.glob(pattern) or [pattern])})
+    total_old = total_new = 0
+    for path in paths:
+        if not path.exists():
+            print(f"WARNING: {path} not found")
+            continue
+        old_size, new_size = optimize_gif(path, not args.no_crop, args.dry_run)
+        total_old += old_size
+        total_new += new_size
+        print(f"{path}: {old_size / 1024:.0f} KB -> {new_size / 1024:.0f} KB")
+
+    if not total_old:
+        sys.exit(1)
+    print(f"Total: {total_old / 1024:.0f} KB -> {total_new / 1024:.0f} KB "
+          f"({100 * (1 - total_new / total_old):.0f}% smaller)")
+
+
+if __name__ == "__main__":
+    main()
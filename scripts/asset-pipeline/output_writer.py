@@ -0,0 +1,109 @@
+"""
+Leave outputs untouched when a re-render does not change them.
+
+Re-rendering every sprite rewrites every PNG, even when the pixels are
+identical or differ only by encoder/sampling noise, which changes the
+bytes git, the content-hashed publish step and browser caches see. Here
+new pixels are compared with the file already on disk (vectorized, see
+image_utils.max_pixel_difference) and the old file is kept unless some
+channel of some pixel moved by more than `tolerance` (0 = exact pixels).
+
+- write_if_changed(image, path) for steps that hold the image in memory
+- keep_unchanged(paths) around steps that write files in place (Blender):
+  the current files are copied aside first and put back, bytes and mtime
+  intact, wherever the new render matches them
+
+Changed/unchanged counts go to the run report's "outputs" section.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from PIL import Image
+
+import run_report
+from image_utils import max_pixel_difference
+
+_lock = threading.Lock()
+_counts = {"changed": 0, "unchanged": 0, "new": 0}
+
+
+def _count(outcome: str) -> None:
+    with _lock:
+        _counts[outcome] += 1
+        run_report.current().set("outputs", dict(_counts))
+
+
+def matches_existing(image: Image.Image, path: Path, tolerance: int = 0) -> bool:
+    """True if path holds an image no further than tolerance from image."""
+    path = Path(path)
+    if not path.exists():
+        return False
+    try:
+        with Image.open(path) as existing:
+            return max_pixel_difference(image, existing) <= tolerance
+    except OSError:
+        return False
+
+
+def write_if_changed(image: Image.Image, path: Path, tolerance: int = 0) -> bool:
+    """Save image as a PNG at path unless the file there already matches; returns True if written."""
+    path = Path(path)
+    existed = path.exists()
+    if matches_existing(image, path, tolerance):
+        _count("unchanged")
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".png")
+    with os.fdopen(fd, "wb") as f:
+        image.save(f, "PNG")
+    os.replace(temp_path, path)
+    _count("changed" if existed else "new")
+    return True
+
+
+@contextmanager
+def keep_unchanged(paths: list, tolerance: int = 0):
+    """
+    Restore each of paths to its previous file if what the body wrote there
+    matches it within tolerance. Yields {"changed", "unchanged", "new"}
+    lists of paths, filled in on exit.
+    """
+    result = {"changed": [], "unchanged": [], "new": []}
+    paths = [Path(p) for p in dict.fromkeys(paths)]
+    # Backups sit next to their file, so putting one back is a same-directory rename
+    backups = {path: path.with_name(f".{path.name}.previous") for path in paths if path.exists()}
+    try:
+        for path, backup in backups.items():
+            shutil.copy2(path, backup)
+        yield result
+    finally:
+        for path in paths:
+            backup = backups.get(path)
+            if backup is None:
+                if path.exists():
+                    result["new"].append(path)
+                    _count("new")
+                continue
+            if not path.exists():
+                # Nothing new was written (e.g. the render failed): keep the old file
+                os.replace(backup, path)
+                continue
+            try:
+                with Image.open(path) as new, Image.open(backup) as old:
+                    unchanged = max_pixel_difference(new, old) <= tolerance
+            except OSError:
+                unchanged = False
+            if unchanged:
+                os.replace(backup, path)
+            else:
+                backup.unlink()
+            result["unchanged" if unchanged else "changed"].append(path)
+            _count("unchanged" if unchanged else "changed")
+        if paths:
+            print(f"Outputs: {len(result['changed'])} changed, {len(result['unchanged'])} unchanged, "
+                  f"{len(result['new'])} new (tolerance {tolerance})")
@@ -11,18 +11,31 @@ Pipeline steps:
 Usage:
     python pipeline.py --prompt "A cozy lobster restaurant with red roof"
     python pipeline.py --image input.png  # Skip step 1, use existing image
+    python pipeline.py --prompt "A lighthouse" --variants 4  # Pick a concept, then rerun with --image
+    python pipeline.py --model "models/*.glb" --workers 2  # Batch re-render
 """
 
 import os
 import sys
 import time
 import argparse
+import atexit
 import base64
+import glob
+import json
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 
+import api_limits
+import run_report
+from artifacts import Artifact
+from asset_registry import registry, renderer_id
+from blender_utils import (FRAME_BUDGET_SNIPPET, REGION_SNIPPET, blender_env, find_blender, parse_frame_seconds,
+                           parse_frame_times, restore_resolution, split_regions, stitch_regions, warm_shader_cache)
+
 # Load environment variables from project root
 env_path = Path(__file__).parent.parent.parent / ".env.local"
 load_dotenv(env_path)
@@ -61,7 +74,9 @@ Style requirements:
     print(f"Prompt: {enhanced_prompt[:100]}...")
     print("Generating image...")
 
-    response = client.models.generate_content(
+    start = time.time()
+    response = api_limits.call(
+        "gemini", client.models.generate_content,
         model="gemini-3-pro-image-preview",  # Nano Banana Pro
         contents=enhanced_prompt,
         config={
@@ -76,6 +91,8 @@ Style requirements:
             with open(output_path, "wb") as f:
                 f.write(base64.b64decode(image_data) if isinstance(image_data, str) else image_data)
             print(f"Saved concept art to: {output_path}")
+            registry().register(output_path, "concept", seconds=time.time() - start,
+                                params={"prompt": prompt, "model": "gemini-3-pro-image-preview"})
             return output_path
 
     print("ERROR: No image in response")
@@ -83,12 +100,22 @@ Style requirements:
     sys.exit(1)
 
 
-def step2_convert_to_3d(image_path: Path, output_path: Path) -> Path:
-    """Convert 2D image to 3D model using Tripo3D via fal.ai."""
+def step2_convert_to_3d(image_path: Path, output_path: Path, strict: bool = False) -> Path:
+    """
+    Convert 2D image to 3D model using Tripo3D via fal.ai.
+
+    An image that looks the same as an earlier input reuses that model
+    (see model_reuse) unless strict.
+    """
     print("\n" + "=" * 60)
     print("STEP 2: Convert to 3D (Tripo3D via fal.ai)")
     print("=" * 60)
 
+    from model_reuse import record_model, reuse_model
+
+    if reuse_model(image_path, output_path, "tripo3d/tripo/v2.5/image-to-3d", strict):
+        return output_path
+
     try:
         import fal_client
     except ImportError:
@@ -106,12 +133,14 @@ def step2_convert_to_3d(image_path: Path, output_path: Path) -> Path:
     print(f"Input image: {image_path}")
     print("Uploading and converting to 3D...")
 
-    # Upload the image first
-    image_url = fal_client.upload_file(str(image_path))
+    start = time.time()
+    # Upload the image first (from memory, no temp file)
+    image_url = Artifact.of(image_path).upload()
     print(f"Uploaded to: {image_url}")
 
     # Call Tripo3D
-    result = fal_client.subscribe(
+    result = api_limits.call(
+        "tripo3d", fal_client.subscribe,
         "tripo3d/tripo/v2.5/image-to-3d",
         arguments={
             "image_url": image_url,
@@ -128,255 +157,674 @@ def step2_convert_to_3d(image_path: Path, output_path: Path) -> Path:
         model_url = model_data["url"]
         print(f"Downloading model from: {model_url}")
 
-        import httpx
-        response = httpx.get(model_url)
-        with open(output_path, "wb") as f:
-            f.write(response.content)
+        Artifact.download(model_url).save(output_path)
         print(f"Saved 3D model to: {output_path}")
+        registry().register(output_path, "model", parents=[image_path],
+                            params={"endpoint": "tripo3d/tripo/v2.5/image-to-3d", "texture": "standard"},
+                            seconds=time.time() - start)
+        record_model(image_path, output_path, "tripo3d/tripo/v2.5/image-to-3d")
         return output_path
     else:
         print(f"ERROR: Unexpected response format: {result}")
         sys.exit(1)
 
 
-def step3_render_isometric(model_path: Path, output_path: Path, orientation: int = None, soft_lighting: bool = False) -> Path:
-    """Render isometric sprite from 3D model using Blender."""
-    print("\n" + "=" * 60)
-    print("STEP 3: Render Isometric Sprite (Blender)")
-    if soft_lighting:
-        print("Using SOFT LIGHTING (even illumination for props)")
-    print("=" * 60)
-
-    # Create Blender Python script for rendering
-    blender_script = '''
+# Blender script for isometric sprite rendering. Reads a JSON list of render
+# jobs so many models can be rendered in one Blender process (startup paid once).
+ISOMETRIC_BLENDER_SCRIPT = FRAME_BUDGET_SNIPPET + REGION_SNIPPET + '''
 import bpy
+import os
 import sys
+import json
 import math
 import mathutils
+import numpy as np
 
 # Get command line arguments after "--"
 argv = sys.argv
 argv = argv[argv.index("--") + 1:]
-model_path = argv[0]
-output_path = argv[1]
-
-# Clear default scene
-bpy.ops.object.select_all(action='SELECT')
-bpy.ops.object.delete()
+with open(argv[0]) as f:
+    jobs = json.load(f)
+frame_budget = float(argv[1]) if len(argv) > 1 else 0.0
+
+# One budget for the whole batch: calibrated on the first frame only
+budget = FrameBudget(bpy.context.scene, frame_budget)
+
+
+def clear_scene():
+    """Delete all objects and purge orphaned meshes, materials and images."""
+    bpy.ops.object.select_all(action='SELECT')
+    bpy.ops.object.delete()
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
+
+def render_light_passes(scene, sun, fill, bg, render_path, pass_path, lighting):
+    """
+    Render one unit-energy pass per light group (key sun, fill, world
+    ambient) and save them as linear float arrays for relight.py. Returns
+    the seconds spent on all three.
+    """
+    groups = {"key": (1.0, 0.0, 0.0), "fill": (0.0, 1.0, 0.0), "ambient": (0.0, 0.0, 1.0)}
+    settings = scene.render.image_settings
+    settings.file_format = 'OPEN_EXR'
+    settings.color_depth = '32'
+
+    passes = {}
+    elapsed = 0.0
+    for group, (key_energy, fill_energy, ambient) in groups.items():
+        sun.data.energy = key_energy
+        fill.data.energy = fill_energy
+        if bg:
+            bg.inputs['Strength'].default_value = ambient
+        exr_path = f"{pass_path}_{group}.exr"
+        elapsed += budget.render(exr_path)
+
+        # EXR keeps scene-linear, premultiplied light; image rows are bottom-up
+        image = bpy.data.images.load(exr_path)
+        width, height = image.size
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        passes[group] = np.flipud(pixels.reshape(height, width, 4))
+        bpy.data.images.remove(image)
+        os.remove(exr_path)
+
+    settings.file_format = 'PNG'
+    settings.color_depth = '8'
+    np.savez_compressed(
+        f"{pass_path}.npz",
+        key=passes["key"][..., :3].astype(np.float16),
+        fill=passes["fill"][..., :3].astype(np.float16),
+        ambient=passes["ambient"][..., :3].astype(np.float16),
+        alpha=passes["key"][..., 3].astype(np.float16),
+        sprite_path=render_path,
+        lighting=lighting,
+    )
+    return elapsed
 
-# Import the model
-if model_path.endswith('.glb') or model_path.endswith('.gltf'):
-    bpy.ops.import_scene.gltf(filepath=model_path)
-elif model_path.endswith('.obj'):
-    bpy.ops.wm.obj_import(filepath=model_path)
-else:
-    print(f"Unsupported format: {model_path}")
-    sys.exit(1)
 
-# Select all imported objects and get bounding box
-bpy.ops.object.select_all(action='SELECT')
-objects = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
+def render_job(job):
+    model_path = job["model_path"]
+    output_path = job["output_path"]
 
-if not objects:
-    print("No mesh objects found!")
+    # Import the model
+    if model_path.endswith('.glb') or model_path.endswith('.gltf'):
+        bpy.ops.import_scene.gltf(filepath=model_path)
+    elif model_path.endswith('.obj'):
+        bpy.ops.wm.obj_import(filepath=model_path)
+    else:
+        print(f"Unsupported format: {model_path}")
+        return False
+
+    # Select all imported objects and get bounding box
+    bpy.ops.object.select_all(action='SELECT')
+    objects = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
+
+    if not objects:
+        print(f"No mesh objects found in {model_path}!")
+        return False
+
+    print(f"Found {len(objects)} mesh objects")
+
+    # Calculate scene bounds
+    min_coord = [float('inf')] * 3
+    max_coord = [float('-inf')] * 3
+
+    for obj in objects:
+        for vertex in obj.bound_box:
+            world_vertex = obj.matrix_world @ mathutils.Vector(vertex)
+            for i in range(3):
+                min_coord[i] = min(min_coord[i], world_vertex[i])
+                max_coord[i] = max(max_coord[i], world_vertex[i])
+
+    center = mathutils.Vector([(min_coord[i] + max_coord[i]) / 2 for i in range(3)])
+    size = max(max_coord[i] - min_coord[i] for i in range(3))
+    print(f"Center: {center}, Size: {size}")
+
+    # Create an empty at the center for camera to track
+    bpy.ops.object.empty_add(type='PLAIN_AXES', location=center)
+    target = bpy.context.object
+    target.name = "CameraTarget"
+
+    # Create orthographic camera for isometric view
+    bpy.ops.object.camera_add()
+    camera = bpy.context.object
+    camera.data.type = 'ORTHO'
+    camera.data.ortho_scale = size * job.get("framing", 1.5)
+
+    # Add track-to constraint so camera always looks at center
+    track = camera.constraints.new(type='TRACK_TO')
+    track.target = target
+    track.track_axis = 'TRACK_NEGATIVE_Z'
+    track.up_axis = 'UP_Y'
+
+    bpy.context.scene.camera = camera
+
+    # Lighting settings - per job so props and buildings can share a batch
+    if job["lighting"] == 'soft':
+        # SOFT LIGHTING - more even illumination for trees/props
+        sun_energy = 5.0      # Lower key light
+        fill_energy = 4.0     # Higher fill light (almost equal to key)
+        ambient_strength = 1.2  # Higher ambient
+    else:
+        # STANDARD LIGHTING - more contrast for buildings
+        sun_energy = 8.0
+        fill_energy = 2.5
+        ambient_strength = 0.8
+
+    # Set up world ambient lighting
+    world = bpy.context.scene.world
+    if world is None:
+        world = bpy.data.worlds.new("World")
+        bpy.context.scene.world = world
+    world.use_nodes = True
+    bg = world.node_tree.nodes.get('Background')
+    if bg:
+        bg.inputs['Strength'].default_value = ambient_strength
+
+    # Set up render settings
+    scene = bpy.context.scene
+    scene.render.resolution_x = job.get("resolution", 512)
+    scene.render.resolution_y = job.get("resolution", 512)
+    scene.render.film_transparent = True
+    scene.render.image_settings.file_format = 'PNG'
+    scene.render.image_settings.color_mode = 'RGBA'
+    # Split-frame mode: this process renders one strip of the frame
+    apply_region(scene, job.get("region"))
+
+    # Render orientations (isometric views from different corners)
+    distance = size * 2
+    iso_elevation = math.radians(35.264)  # True isometric angle
+    if job.get("orientation") is not None:
+        orientations = [job["orientation"]]
+    else:
+        orientations = [0, 90, 180, 270]
+    base_output = output_path.replace('.png', '')
+
+    # Keep track of light objects so we can update them per orientation
+    sun = None
+    fill = None
+
+    for index, angle in enumerate(orientations):
+        # Position camera at isometric angle, rotating around Z axis
+        rad = math.radians(45 + angle)  # 45° offset for corner view
+        camera.location = (
+            center.x + distance * math.cos(rad) * math.cos(iso_elevation),
+            center.y + distance * math.sin(rad) * math.cos(iso_elevation),
+            center.z + distance * math.sin(iso_elevation)
+        )
+
+        # Create or update lights to rotate WITH the camera
+        # This ensures consistent lighting relative to camera view
+        if sun is None:
+            bpy.ops.object.light_add(type='SUN', location=(0, 0, 10))
+            sun = bpy.context.object
+            sun.data.energy = sun_energy
+        if fill is None:
+            bpy.ops.object.light_add(type='SUN', location=(0, 0, 5))
+            fill = bpy.context.object
+            fill.data.energy = fill_energy
+
+        # Position lights relative to camera angle (rotate with camera)
+        # Main sun: above and to the right of camera view
+        sun_rad = rad + math.radians(-30)  # 30 degrees right of camera
+        sun.location = (
+            center.x + 10 * math.cos(sun_rad),
+            center.y + 10 * math.sin(sun_rad),
+            center.z + 10
+        )
+        sun.rotation_euler = (math.radians(45), 0, sun_rad + math.radians(90))
+
+        # Fill light: opposite side, lower
+        fill_rad = rad + math.radians(150)  # opposite side
+        fill.location = (
+            center.x + 10 * math.cos(fill_rad),
+            center.y + 10 * math.sin(fill_rad),
+            center.z + 5
+        )
+        fill.rotation_euler = (math.radians(60), 0, fill_rad + math.radians(90))
+
+        # Set output path for this orientation
+        render_path = f"{base_output}_{angle}.png"
+
+        if job.get("passes_dir"):
+            # Relightable: light group passes instead of a final sprite
+            pass_path = os.path.join(job["passes_dir"], os.path.basename(base_output) + f"_{angle}")
+            print(f"Rendering light passes for orientation {angle}...")
+            elapsed = render_light_passes(scene, sun, fill, bg, render_path, pass_path, job["lighting"])
+            print(f"Saved passes to: {pass_path}.npz ({elapsed:.2f}s)")
+            report(f"FRAME_DONE {index + 1}/{len(orientations)} {elapsed:.2f} {render_path}")
+            continue
+
+        print(f"Rendering orientation {angle}...")
+        elapsed = budget.render(render_path)
+        print(f"Rendered to: {render_path} ({elapsed:.2f}s)")
+        report(f"FRAME_DONE {index + 1}/{len(orientations)} {elapsed:.2f} {render_path}")
+
+    return True
+
+
+failed = []
+for index, job in enumerate(jobs):
+    print(f"=== Model {index + 1}/{len(jobs)}: {job['model_path']} ({job['lighting']} lighting) ===")
+    clear_scene()
+    if not render_job(job):
+        failed.append(job["model_path"])
+
+clear_scene()
+budget.summary()
+if failed:
+    print(f"Failed models: {failed}")
     sys.exit(1)
+'''
+# Versioned by the script text, so lighting/camera changes make older sprites stale
+ISOMETRIC_RENDERER = renderer_id("blender-isometric", ISOMETRIC_BLENDER_SCRIPT)
+
+
+def load_render_jobs(model_spec: str, output_dir: Path = None, name: str = None,
+                     orientation: int = None, soft_lighting: bool = False) -> list:
+    """
+    Expand a --model argument into isometric render jobs.
+
+    model_spec may be a single model file, a glob (e.g. "assets/props/*.glb")
+    or a JSON manifest. Manifest entries look like:
+        {"model": "buildings/core/*.glb", "lighting": "soft", "output_dir": "...",
+         "name": "town_hall", "orientation": 0}
+    Paths in a manifest are relative to the manifest file. Sprites are written
+    next to each model unless an output directory is given, as
+    <name>_sprite_<angle>.png (name defaults to the model's stem), the
+    files apps/web loads.
+    """
+    default_lighting = "soft" if soft_lighting else "normal"
+
+    if model_spec.endswith(".json"):
+        manifest_path = Path(model_spec)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        entries = manifest["jobs"] if isinstance(manifest, dict) else manifest
+        base_dir = manifest_path.parent
+    else:
+        entries = [{"model": model_spec}]
+        if name:
+            entries[0]["name"] = name
+        if orientation is not None:
+            entries[0]["orientation"] = orientation
+        base_dir = Path(".")
+
+    jobs = []
+    for entry in entries:
+        pattern = str(base_dir / entry["model"])
+        if glob.has_magic(pattern):
+            models = sorted(Path(p) for p in glob.glob(pattern))
+            if not models:
+                print(f"WARNING: No models match {pattern}")
+        else:
+            models = [Path(pattern)]
+
+        for model_path in models:
+            if "output_dir" in entry:
+                job_dir = base_dir / entry["output_dir"]
+            elif output_dir is not None:
+                job_dir = output_dir
+            else:
+                job_dir = model_path.parent
+            # An explicit name only makes sense for a single model
+            sprite_name = entry.get("name") if len(models) == 1 and entry.get("name") else model_path.stem
+            jobs.append({
+                "model_path": str(model_path.resolve()),
+                "output_path": str((job_dir / f"{sprite_name}_sprite.png").resolve()),
+                "orientation": entry.get("orientation", orientation),
+                "lighting": entry.get("lighting", default_lighting),
+            })
+
+    return jobs
+
+
+def sprite_paths(job: dict) -> list:
+    """Per-orientation sprite files produced by an isometric render job."""
+    base_output = job["output_path"].replace('.png', '')
+    if job.get("orientation") is not None:
+        orientations = [job["orientation"]]
+    else:
+        orientations = [0, 90, 180, 270]
+    return [Path(f"{base_output}_{angle}.png") for angle in orientations]
+
+
+def render_isometric_batch(jobs: list, workers: int = 1, frame_budget: float = 0.0, passes_dir: Path = None,
+                           backend=None, change_tolerance: int = 0, qa_reframe: bool = False) -> list:
+    """
+    Render isometric sprites for many models, one Blender process per worker.
+
+    Each worker imports, renders all orientations and purges one model at a
+    time, so Blender startup is paid once per worker instead of once per model.
+    With a frame_budget (seconds), each worker times its first frame and
+    lowers samples/resolution for the rest so long batches run predictably.
+    With passes_dir, Blender saves per-light-group passes there and the
+    sprites are composed from them (see relight.py). Workers share a warmed
+    shader cache, and their first-frame vs. steady-state frame times go to
+    the run report. With backend (see blender_backend), all jobs run in that
+    backend's Blender instead, e.g. one of the asset daemon's warm workers.
+    Sprites whose pixels stay within change_tolerance (0-255 per channel) of
+    the existing file keep that file untouched (see output_writer).
+    Every sprite is checked for empty, clipped, tiny or off-centre framing
+    (see render_qa); with qa_reframe, models whose sprites were clipped or
+    tiny are re-rendered once with a corrected framing.
+    """
+    print("\n" + "=" * 60)
+    print(f"STEP 3: Render Isometric Sprites (Blender, {len(jobs)} models, {workers} worker(s))")
+    print("=" * 60)
 
-print(f"Found {len(objects)} mesh objects")
-
-# Calculate scene bounds
-min_coord = [float('inf')] * 3
-max_coord = [float('-inf')] * 3
-
-for obj in objects:
-    for vertex in obj.bound_box:
-        world_vertex = obj.matrix_world @ mathutils.Vector(vertex)
-        for i in range(3):
-            min_coord[i] = min(min_coord[i], world_vertex[i])
-            max_coord[i] = max(max_coord[i], world_vertex[i])
-
-center = mathutils.Vector([(min_coord[i] + max_coord[i]) / 2 for i in range(3)])
-size = max(max_coord[i] - min_coord[i] for i in range(3))
-print(f"Center: {center}, Size: {size}")
-
-# Create an empty at the center for camera to track
-bpy.ops.object.empty_add(type='PLAIN_AXES', location=center)
-target = bpy.context.object
-target.name = "CameraTarget"
-
-# Create orthographic camera for isometric view
-bpy.ops.object.camera_add()
-camera = bpy.context.object
-camera.data.type = 'ORTHO'
-camera.data.ortho_scale = size * 1.5
-
-# Add track-to constraint so camera always looks at center
-track = camera.constraints.new(type='TRACK_TO')
-track.target = target
-track.track_axis = 'TRACK_NEGATIVE_Z'
-track.up_axis = 'UP_Y'
-
-bpy.context.scene.camera = camera
-
-# Lighting settings - check for soft lighting mode (last argument)
-soft_lighting = argv[-1] == 'soft'
-
-if soft_lighting:
-    # SOFT LIGHTING - more even illumination for trees/props
-    sun_energy = 5.0      # Lower key light
-    fill_energy = 4.0     # Higher fill light (almost equal to key)
-    ambient_strength = 1.2  # Higher ambient
-else:
-    # STANDARD LIGHTING - more contrast for buildings
-    sun_energy = 8.0
-    fill_energy = 2.5
-    ambient_strength = 0.8
-
-# Set up world ambient lighting
-world = bpy.context.scene.world
-if world is None:
-    world = bpy.data.worlds.new("World")
-    bpy.context.scene.world = world
-world.use_nodes = True
-bg = world.node_tree.nodes.get('Background')
-if bg:
-    bg.inputs['Strength'].default_value = ambient_strength
-
-# Set up render settings
-scene = bpy.context.scene
-scene.render.resolution_x = 512
-scene.render.resolution_y = 512
-scene.render.film_transparent = True
-scene.render.image_settings.file_format = 'PNG'
-scene.render.image_settings.color_mode = 'RGBA'
-
-# Render orientations (isometric views from different corners)
-distance = size * 2
-iso_elevation = math.radians(35.264)  # True isometric angle
-# Check for single orientation argument (must be a number, not "soft"/"normal")
-if len(argv) > 2 and argv[2].isdigit():
-    orientations = [int(argv[2])]
-else:
-    orientations = [0, 90, 180, 270]
-base_output = output_path.replace('.png', '')
-
-# Keep track of light objects so we can update them per orientation
-sun = None
-fill = None
-
-for angle in orientations:
-    # Position camera at isometric angle, rotating around Z axis
-    rad = math.radians(45 + angle)  # 45° offset for corner view
-    camera.location = (
-        center.x + distance * math.cos(rad) * math.cos(iso_elevation),
-        center.y + distance * math.sin(rad) * math.cos(iso_elevation),
-        center.z + distance * math.sin(iso_elevation)
-    )
-
-    # Create or update lights to rotate WITH the camera
-    # This ensures consistent lighting relative to camera view
-    if sun is None:
-        bpy.ops.object.light_add(type='SUN', location=(0, 0, 10))
-        sun = bpy.context.object
-        sun.data.energy = sun_energy
-    if fill is None:
-        bpy.ops.object.light_add(type='SUN', location=(0, 0, 5))
-        fill = bpy.context.object
-        fill.data.energy = fill_energy
-
-    # Position lights relative to camera angle (rotate with camera)
-    # Main sun: above and to the right of camera view
-    sun_rad = rad + math.radians(-30)  # 30 degrees right of camera
-    sun.location = (
-        center.x + 10 * math.cos(sun_rad),
-        center.y + 10 * math.sin(sun_rad),
-        center.z + 10
-    )
-    sun.rotation_euler = (math.radians(45), 0, sun_rad + math.radians(90))
-
-    # Fill light: opposite side, lower
-    fill_rad = rad + math.radians(150)  # opposite side
-    fill.location = (
-        center.x + 10 * math.cos(fill_rad),
-        center.y + 10 * math.sin(fill_rad),
-        center.z + 5
-    )
-    fill.rotation_euler = (math.radians(60), 0, fill_rad + math.radians(90))
+    if not jobs:
+        print("ERROR: No models to render")
+        sys.exit(1)
 
-    # Set output path for this orientation
-    render_path = f"{base_output}_{angle}.png"
-    scene.render.filepath = render_path
+    if passes_dir is not None and frame_budget:
+        # The budget recalibrates after the key pass, so fill/ambient would come out at another size
+        print("ERROR: A frame budget cannot be combined with light passes")
+        sys.exit(1)
+    if passes_dir is not None:
+        passes_dir = Path(passes_dir)
+        passes_dir.mkdir(parents=True, exist_ok=True)
+        for job in jobs:
+            job["passes_dir"] = str(passes_dir.resolve())
+    for job in jobs:
+        Path(job["output_path"]).parent.mkdir(parents=True, exist_ok=True)
+
+    from image_utils import scale_path
+    from output_writer import keep_unchanged
+
+    # Final sprite files (split-frame strips are temporary). Relit sprites
+    # are compared by relight itself, so they are left out here
+    outputs = [scale_path(path, scale) if job.get("scales") else path
+               for job in jobs if "region" not in job and not (passes_dir is not None and not job.get("scales"))
+               for path in sprite_paths(job) for scale in job.get("scales") or [1]]
+    with keep_unchanged(outputs, change_tolerance):
+        if backend is not None:
+            seconds = _render_jobs_in_backend(jobs, frame_budget, backend)
+        else:
+            seconds = _render_jobs_in_subprocesses(jobs, workers, frame_budget)
+        if seconds is None:
+            sys.exit(1)
 
-    print(f"Rendering orientation {angle}...")
-    bpy.ops.render.render(write_still=True)
-    print(f"Rendered to: {render_path}")
-'''
+        if passes_dir is not None:
+            from relight import pass_path, relight
+            passes = {scaled: [pass_path(passes_dir, path) for job in jobs if bool(job.get("scales")) == scaled
+                               for path in sprite_paths(job)] for scaled in (False, True)}
+            relight(passes[False], change_tolerance=change_tolerance)
+            # Scaled masters only feed their variants, which keep_unchanged compares
+            relight(passes[True], only_changed=False)
+
+        if frame_budget:
+            for job in jobs:
+                resolution = job.get("resolution", 512)
+                restore_resolution(sprite_paths(job), (resolution, resolution))
+
+        scaled_jobs = [job for job in jobs if job.get("scales")]
+        if scaled_jobs:
+            write_sprite_scales(scaled_jobs)
+
+    # Split-frame strips are temporary (render_isometric_split registers the
+    # stitched sprites) and scaled masters are registered per variant
+    for job in jobs:
+        if "region" not in job and not job.get("scales"):
+            register_sprites(job, sprite_paths(job), seconds, frame_budget=frame_budget, relit=passes_dir is not None,
+                             framing=job.get("framing"))
+
+    reframed = qa_sprites(jobs)
+    if reframed and qa_reframe:
+        print(f"\nRe-rendering {len(reframed)} model(s) that failed framing QA with a new framing")
+        render_isometric_batch(reframed, workers, frame_budget, passes_dir, backend, change_tolerance)
+    return [Path(job["output_path"]) for job in jobs]
+
+
+def qa_sprites(jobs: list) -> list:
+    """
+    Run framing QA (see render_qa) over the final sprites of jobs; returns
+    copies of the jobs a new framing should fix, with that framing set.
+    """
+    import render_qa
+    from image_utils import scale_path
+
+    finals = {id(job): [scale_path(path, max(job["scales"])) if job.get("scales") else path
+                        for path in sprite_paths(job)]
+              for job in jobs if "region" not in job}
+    results = render_qa.check([path for paths in finals.values() for path in paths])
+
+    reframed = []
+    for job in jobs:
+        framing = job.get("framing", render_qa.DEFAULT_FRAMING)
+        factors = [render_qa.reframe_factor(*results[path], framing)
+                   for path in finals.get(id(job), []) if path in results]
+        factors = [factor for factor in factors if factor]
+        if factors:
+            # One framing per model; the widest keeps every orientation unclipped
+            reframed.append({**job, "framing": max(factors)})
+    return reframed
+
+
+def register_sprites(job: dict, paths: list, seconds: dict = None, **params) -> None:
+    """Record a job's sprites in the asset registry with its model as their parent."""
+    orientations = [job["orientation"]] if job.get("orientation") is not None else [0, 90, 180, 270]
+    for angle, path in zip(orientations, paths):
+        registry().register(
+            path, "sprite", parents=[job["model_path"]], renderer=ISOMETRIC_RENDERER,
+            seconds=(seconds or {}).get(str(path)),
+            params={"lighting": job["lighting"], "orientation": angle, "resolution": job.get("resolution", 512),
+                    **{key: value for key, value in params.items() if value}},
+        )
+
+
+def _render_jobs_in_subprocesses(jobs: list, workers: int, frame_budget: float) -> dict:
+    """
+    Split isometric jobs over `workers` parallel Blender processes.
+
+    Returns {sprite path: render seconds}, or None if a worker failed.
+    """
+    blender_exe = find_blender()
 
     # Write the Blender script to a temp file
     with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-        f.write(blender_script)
+        f.write(ISOMETRIC_BLENDER_SCRIPT)
         script_path = f.name
 
-    print(f"Model: {model_path}")
-    print(f"Output: {output_path}")
-    print("Running Blender...")
+    # Compile the standard material shaders once before the workers start
+    warm_shader_cache()
 
-    try:
-        # Find Blender executable
-        blender_paths = [
-            "/Applications/Blender.app/Contents/MacOS/Blender",  # macOS
-            "blender",  # Linux/Windows (if in PATH)
-        ]
-        blender_exe = None
-        for path in blender_paths:
-            if os.path.exists(path) or path == "blender":
-                blender_exe = path
-                break
-
-        if not blender_exe:
-            print("ERROR: Blender not found. Install from https://blender.org")
-            sys.exit(1)
+    # Round-robin so each worker gets a similar mix of models
+    workers = max(1, min(workers, len(jobs)))
+    chunks = [jobs[i::workers] for i in range(workers)]
+    job_files = []
 
-        # Run Blender in background mode
+    def run_chunk(chunk: list) -> subprocess.CompletedProcess:
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+            json.dump(chunk, f)
+            job_files.append(f.name)
         cmd = [
             blender_exe,
             "--background",
             "--python", script_path,
-            "--", str(model_path), str(output_path)
+            "--", f.name, str(frame_budget)
         ]
-        if orientation is not None:
-            cmd.append(str(orientation))
-        # Pass soft lighting flag as separate argument (argv index 3 or 2 depending on orientation)
-        cmd.append("soft" if soft_lighting else "normal")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)  # 10 min for Cycles
+        # 10 min per model for Cycles
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=600 * len(chunk), env=blender_env())
 
+    print("Running Blender...")
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_chunk, chunks))
+    finally:
+        os.unlink(script_path)
+        for job_file in job_files:
+            os.unlink(job_file)
+
+    failed = False
+    seconds = {}
+    for index, result in enumerate(results):
         print(result.stdout)
+        run_report.current().add_frames(f"isometric worker {index + 1}/{workers}", parse_frame_times(result.stdout))
+        seconds.update(parse_frame_seconds(result.stdout))
         if result.returncode != 0:
             print(f"Blender stderr: {result.stderr}")
-            sys.exit(1)
+            failed = True
+    return None if failed else seconds
 
+
+def _render_jobs_in_backend(jobs: list, frame_budget: float, backend) -> dict:
+    """Run isometric jobs in one blender_backend backend; returns {sprite path: seconds}, or None."""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+        json.dump(jobs, f)
+    try:
+        # Every orientation reports FRAME_DONE, so the stall watchdog works per frame
+        rendered = backend.run_script(ISOMETRIC_BLENDER_SCRIPT, [f.name, frame_budget], frame_timeout=600.0)
     finally:
-        os.unlink(script_path)
+        os.unlink(f.name)
+    if rendered is None:
+        return None
+    run_report.current().add_frames(f"isometric {backend.name} ({len(jobs)} models)", rendered.times)
+    # The isometric script never skips frames, so paths and times line up
+    return dict(zip(rendered.paths, rendered.times))
+
+
+def with_scales(jobs: list, scales: tuple, base_resolution: int = 512) -> list:
+    """Render jobs at the largest requested scale so every DPI variant can be derived from it."""
+    for job in jobs:
+        job["scales"] = list(scales)
+        job["resolution"] = round(base_resolution * max(scales))
+    return jobs
+
+
+def write_sprite_scales(jobs: list) -> None:
+    """
+    Downsample each master sprite into its scale variants (e.g.
+    town_hall_sprite_0@2x.png, town_hall_sprite_0.png, ...@0.5x.png) and
+    record them in a scales.json manifest in each sprite directory.
+    """
+    from image_utils import update_scale_manifest, write_scale_variants
+
+    manifests = {}
+    for job in jobs:
+        scales = tuple(job["scales"])
+        base_size = round(job["resolution"] / max(scales))
+        for sprite_path in sprite_paths(job):
+            variants = write_scale_variants(sprite_path, base_size, scales)
+            manifests.setdefault(sprite_path.parent / "scales.json", {})[sprite_path.name] = variants
+            for scale, variant in variants.items():
+                registry().register(variant, "sprite", parents=[job["model_path"]], renderer=ISOMETRIC_RENDERER,
+                                    params={"lighting": job["lighting"], "scale": scale,
+                                            "resolution": max(1, round(base_size * scale))})
+
+    for manifest_path, variants in manifests.items():
+        update_scale_manifest(manifest_path, variants)
+        print(f"Wrote {len(variants)} sprite(s) x {len(next(iter(variants.values())))} scales to {manifest_path}")
+
+
+def render_isometric_split(model_path: Path, output_path: Path, resolution: int = 2048, parts: int = 4,
+                           orientation: int = None, soft_lighting: bool = False, change_tolerance: int = 0) -> Path:
+    """
+    Render large isometric sprites with each frame split across processes.
+
+    Every worker renders one horizontal strip of every orientation
+    (render.use_border + use_crop_to_border) into a temp dir, and the strips
+    are stitched back into full `<output>_<angle>.png` sprites. Strips
+    overlap a little and the overlap is cropped, so there are no seams.
+    """
+    from output_writer import write_if_changed
+
+    regions = split_regions(resolution, resolution, parts)
+    print(f"Split-frame render: {resolution}x{resolution} in {len(regions)} strips")
+
+    with tempfile.TemporaryDirectory() as tiles_dir:
+        jobs = [{
+            "model_path": str(Path(model_path).resolve()),
+            "output_path": str(Path(tiles_dir) / f"part{index}_sprite.png"),
+            "orientation": orientation,
+            "lighting": "soft" if soft_lighting else "normal",
+            "resolution": resolution,
+            "region": region["border"],
+        } for index, region in enumerate(regions)]
+        render_isometric_batch(jobs, workers=len(jobs))
+
+        full = {"output_path": str(output_path), "orientation": orientation}
+        for angle_index, sprite_path in enumerate(sprite_paths(full)):
+            tiles = [sprite_paths(job)[angle_index] for job in jobs]
+            if write_if_changed(stitch_regions(tiles, regions, (resolution, resolution)), sprite_path,
+                                change_tolerance):
+                print(f"Stitched {len(tiles)} strips into: {sprite_path}")
+            else:
+                print(f"Unchanged: {sprite_path}")
+        register_sprites(jobs[0], sprite_paths(full), split=len(regions))
+
+    from render_qa import check
+
+    check(sprite_paths(full))
+
+    return output_path
+
+
+def step3_render_isometric(model_path: Path, output_path: Path, orientation: int = None, soft_lighting: bool = False,
+                           frame_budget: float = 0.0, passes_dir: Path = None, resolution: int = 512,
+                           scales: tuple = None, change_tolerance: int = 0, qa_reframe: bool = False) -> Path:
+    """Render isometric sprite from 3D model using Blender."""
+    if soft_lighting:
+        print("Using SOFT LIGHTING (even illumination for props)")
+    print(f"Model: {model_path}")
+    print(f"Output: {output_path}")
+
+    jobs = [{
+        "model_path": str(Path(model_path).resolve()),
+        "output_path": str(Path(output_path).resolve()),
+        "orientation": orientation,
+        "lighting": "soft" if soft_lighting else "normal",
+        "resolution": resolution,
+    }]
+    if scales:
+        with_scales(jobs, scales, resolution)
+    render_isometric_batch(jobs, frame_budget=frame_budget, passes_dir=passes_dir, change_tolerance=change_tolerance,
+                           qa_reframe=qa_reframe)
 
     print(f"Saved sprite to: {output_path}")
     return output_path
 
 
-def transform_to_isometric(input_path: Path, output_path: Path) -> Path:
-    """Transform a flat square texture to isometric (2:1 projection)."""
+def isometric_warp(img):
+    """
+    Project a flat square texture to a 2:1 isometric diamond in one resample.
+
+    Equivalent to rotate(45, expand=True) followed by scaling Y by 0.5, but
+    both are folded into a single affine warp so the texture is only
+    interpolated once (half the work, no double-resampling blur).
+    """
+    import math
     from PIL import Image
 
-    img = Image.open(input_path)
+    img = img.convert("RGBA")
+    w, h = img.size
+    angle = math.radians(45)
+    cos_a, sin_a = math.cos(angle), math.sin(angle)
+
+    # Size of the rotated, expanded image (same rounding as Image.rotate)
+    corners = [(-w / 2, -h / 2), (w / 2, -h / 2), (w / 2, h / 2), (-w / 2, h / 2)]
+    xs = [cos_a * x + sin_a * y for x, y in corners]
+    ys = [-sin_a * x + cos_a * y for x, y in corners]
+    rotated_w = math.ceil(max(xs)) - math.floor(min(xs))
+    rotated_h = math.ceil(max(ys)) - math.floor(min(ys))
+    out_w, out_h = rotated_w, int(rotated_h * 0.5)
 
-    # For 2:1 isometric: rotate 45°, then scale Y by 0.5
-    # This creates the diamond shape
+    # Inverse map from output pixel to source pixel: undo the 0.5 Y scale
+    # (y * 2), then undo the 45° rotation, around the respective centres
+    a, b = cos_a, -sin_a * 2
+    d, e = sin_a, cos_a * 2
+    c = w / 2 - a * out_w / 2 - b * out_h / 2
+    f = h / 2 - d * out_w / 2 - e * out_h / 2
 
-    # First rotate 45 degrees (expand to fit)
-    rotated = img.rotate(45, expand=True, resample=Image.BICUBIC)
+    return img.transform((out_w, out_h), Image.AFFINE, (a, b, c, d, e, f), resample=Image.BICUBIC)
 
-    # Scale Y by 0.5 for 2:1 isometric projection
-    new_width = rotated.width
-    new_height = int(rotated.height * 0.5)
-    isometric = rotated.resize((new_width, new_height), Image.BICUBIC)
+
+def transform_to_isometric(input_path: Path, output_path: Path) -> Path:
+    """Transform a flat square texture to isometric (2:1 projection)."""
+    from PIL import Image
+
+    with Image.open(input_path) as img:
+        isometric = isometric_warp(img)
 
     # Save with transparency
     isometric.save(output_path, 'PNG')
@@ -386,8 +834,19 @@ def transform_to_isometric(input_path: Path, output_path: Path) -> Path:
 
 def render_cube_tile(texture_path: Path, output_path: Path) -> Path:
     """Render a 3D cube tile with texture on top using Blender."""
+    render_cube_tiles([(texture_path, output_path)])
+    return output_path
+
+
+def render_cube_tiles(pairs: list) -> list:
+    """
+    Render many cube tiles in one Blender session.
+
+    pairs is a list of (texture_path, output_path). The cube, camera and
+    lights are built once; only the TileMaterial image is swapped per tile.
+    """
     print("\n" + "=" * 60)
-    print("CUBE TILE RENDERING (Blender)")
+    print(f"CUBE TILE RENDERING (Blender, {len(pairs)} tile(s))")
     print("=" * 60)
 
     # Create Blender Python script for cube tile rendering
@@ -396,11 +855,10 @@ import bpy
 import sys
 import math
 
-# Get command line arguments after "--"
+# Get command line arguments after "--": (texture, output) pairs
 argv = sys.argv
 argv = argv[argv.index("--") + 1:]
-texture_path = argv[0]
-output_path = argv[1]
+pairs = list(zip(argv[0::2], argv[1::2]))
 
 # Clear default scene
 bpy.ops.object.select_all(action='SELECT')
@@ -452,7 +910,7 @@ bsdf.inputs['Roughness'].default_value = 0.9  # Matte surface
 
 tex_node = nodes.new('ShaderNodeTexImage')
 tex_node.location = (-400, 0)
-tex_node.image = bpy.data.images.load(texture_path)
+tex_node.image = bpy.data.images.load(pairs[0][0])
 
 # Connect using UV coordinates
 tex_coord = nodes.new('ShaderNodeTexCoord')
@@ -524,11 +982,16 @@ scene.render.film_transparent = True
 scene.render.image_settings.file_format = 'PNG'
 scene.render.image_settings.color_mode = 'RGBA'
 
-# Render
-scene.render.filepath = output_path
-print(f"Rendering cube tile...")
-bpy.ops.render.render(write_still=True)
-print(f"Rendered to: {output_path}")
+# Render every tile, swapping only the texture image between renders
+for texture_path, output_path in pairs:
+    previous = tex_node.image
+    if previous.filepath != texture_path:
+        tex_node.image = bpy.data.images.load(texture_path)
+        bpy.data.images.remove(previous)
+    scene.render.filepath = output_path
+    print(f"Rendering cube tile {texture_path}...")
+    bpy.ops.render.render(write_still=True)
+    print(f"Rendered to: {output_path}")
 '''
 
     # Write the Blender script to a temp file
@@ -536,34 +999,23 @@ print(f"Rendered to: {output_path}")
         f.write(blender_script)
         script_path = f.name
 
-    print(f"Texture: {texture_path}")
-    print(f"Output: {output_path}")
+    for texture_path, output_path in pairs:
+        print(f"Texture: {texture_path} -> {output_path}")
     print("Running Blender...")
 
     try:
-        # Find Blender executable
-        blender_paths = [
-            "/Applications/Blender.app/Contents/MacOS/Blender",  # macOS
-            "blender",  # Linux/Windows (if in PATH)
-        ]
-        blender_exe = None
-        for path in blender_paths:
-            if os.path.exists(path) or path == "blender":
-                blender_exe = path
-                break
-
-        if not blender_exe:
-            print("ERROR: Blender not found. Install from https://blender.org")
-            sys.exit(1)
+        blender_exe = find_blender()
 
         # Run Blender in background mode
         cmd = [
             blender_exe,
             "--background",
             "--python", script_path,
-            "--", str(texture_path), str(output_path)
+            "--",
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        for texture_path, output_path in pairs:
+            cmd += [str(Path(texture_path).resolve()), str(Path(output_path).resolve())]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300 * len(pairs), env=blender_env())
 
         print(result.stdout)
         if result.returncode != 0:
@@ -573,8 +1025,83 @@ print(f"Rendered to: {output_path}")
     finally:
         os.unlink(script_path)
 
-    print(f"Saved cube tile to: {output_path}")
-    return output_path
+    for texture_path, output_path in pairs:
+        print(f"Saved cube tile to: {output_path}")
+        registry().register(output_path, "tile_cube", parents=[texture_path],
+                            renderer=renderer_id("blender-cube", blender_script))
+    return [Path(output_path) for _, output_path in pairs]
+
+
+def process_tile(texture_path: Path, output_dir: Path, name: str, variants: tuple = ("iso", "cube"),
+                 seam_threshold: float = 1.5, auto_fix_seams: bool = False, cube_renderer: str = "numpy",
+                 compare_blender: bool = False) -> dict:
+    """
+    Derive every tile variant from one decoded texture.
+
+    The flat texture is decoded once and checked for seams; the `_iso`
+    diamond is warped from the in-memory image and the `_cube` is drawn
+    analytically from it (cube_renderer="blender" renders the texture file
+    in Blender instead). With auto_fix_seams, a texture scoring above
+    seam_threshold is offset-and-blended and rewritten before either variant.
+    Returns {"flat": path, "iso": path, "cube": path} for what was produced.
+    """
+    from PIL import Image
+    from image_utils import fix_seams, seam_score
+
+    print("\n" + "=" * 60)
+    print(f"TILE VARIANTS: {name} ({', '.join(variants)})")
+    print("=" * 60)
+
+    outputs = {"flat": texture_path}
+    with Image.open(texture_path) as img:
+        texture = img.convert("RGBA")
+    print(f"Decoded texture: {texture_path} ({texture.width}x{texture.height})")
+
+    # Seam check: wrap-around difference vs. interior, ~1.0 when seamless
+    seams = seam_score(texture)
+    print(f"Seam score: {seams['score']:.2f} (x {seams['x']:.2f}, y {seams['y']:.2f}, threshold {seam_threshold})")
+    if seams["score"] > seam_threshold:
+        if auto_fix_seams:
+            texture = fix_seams(texture)
+            fixed_path = output_dir / f"{name}.png"
+            texture.save(fixed_path, 'PNG')
+            outputs["flat"] = texture_path = fixed_path
+            registry().register(fixed_path, "tile", params={"fixed_seams": True})
+            print(f"Fixed seams (score now {seam_score(texture)['score']:.2f}): {fixed_path}")
+        else:
+            print(f"WARNING: {name} does not tile seamlessly (use --fix-seams or regenerate)")
+
+    if "iso" in variants:
+        iso_path = output_dir / f"{name}_iso.png"
+        isometric_warp(texture).save(iso_path, 'PNG')
+        print(f"Transformed to isometric: {iso_path}")
+        registry().register(iso_path, "tile_iso", parents=[texture_path], renderer="isometric-warp")
+        outputs["iso"] = iso_path
+
+    if "cube" in variants:
+        cube_path = output_dir / f"{name}_cube.png"
+        if cube_renderer == "blender":
+            render_cube_tile(texture_path, cube_path)
+        else:
+            from cube_tile import compare_images, render_cube_tile_numpy
+
+            start = time.time()
+            cube = render_cube_tile_numpy(texture)
+            cube.save(cube_path, 'PNG')
+            registry().register(cube_path, "tile_cube", parents=[texture_path], renderer="numpy-cube",
+                                seconds=time.time() - start)
+            print(f"Rendered cube tile (NumPy, {(time.time() - start) * 1000:.0f} ms): {cube_path}")
+
+            if compare_blender:
+                reference_path = output_dir / f"{name}_cube_blender.png"
+                render_cube_tile(texture_path, reference_path)
+                with Image.open(reference_path) as reference:
+                    diff = compare_images(cube, reference)
+                print(f"NumPy vs Blender cube: mean diff {diff['mean']:.2f} "
+                      f"(rgb {diff['rgb_mean']:.2f}, alpha {diff['alpha_mean']:.2f}, max {diff['max']:.0f})")
+        outputs["cube"] = cube_path
+
+    return outputs
 
 
 def generate_tile(prompt: str, output_path: Path) -> Path:
@@ -610,7 +1137,8 @@ CRITICAL requirements:
     print(f"Prompt: {enhanced_prompt[:100]}...")
     print("Generating tile...")
 
-    response = client.models.generate_content(
+    response = api_limits.call(
+        "gemini", client.models.generate_content,
         model="gemini-3-pro-image-preview",
         contents=enhanced_prompt,
         config={
@@ -625,6 +1153,7 @@ CRITICAL requirements:
             with open(output_path, "wb") as f:
                 f.write(base64.b64decode(image_data) if isinstance(image_data, str) else image_data)
             print(f"Saved tile to: {output_path}")
+            registry().register(output_path, "tile", params={"prompt": prompt, "model": "gemini-3-pro-image-preview"})
             return output_path
 
     print("ERROR: No image in response")
@@ -632,50 +1161,252 @@ CRITICAL requirements:
     sys.exit(1)
 
 
+def load_tile_manifest(manifest_path: Path) -> list:
+    """
+    Read tile names and prompts from a JSON sidecar or ASSET_MANIFEST.md.
+
+    JSON: [{"name": "sand_tile", "prompt": "..."}] (or {"tiles": [...]}).
+    Markdown: rows of the table under the "## Tiles" heading.
+    """
+    manifest_path = Path(manifest_path)
+    if manifest_path.suffix == ".json":
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        return manifest["tiles"] if isinstance(manifest, dict) else manifest
+
+    tiles = []
+    in_tiles = False
+    for line in manifest_path.read_text().splitlines():
+        if line.startswith("## "):
+            in_tiles = line.strip() == "## Tiles"
+            continue
+        if not in_tiles or not line.startswith("|"):
+            continue
+        cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+        # Skip the header and separator rows
+        if len(cells) < 2 or cells[0] in ("Asset", "") or set(cells[0]) <= set("-: "):
+            continue
+        tiles.append({"name": cells[0], "prompt": cells[1].strip('"')})
+    return tiles
+
+
+def generate_tiles_from_manifest(manifest_path: Path, output_dir: Path, variants: tuple = ("iso", "cube"),
+                                 seam_threshold: float = 1.5, auto_fix_seams: bool = False,
+                                 cube_renderer: str = "numpy") -> list:
+    """
+    Generate and render every tile in a manifest in one run.
+
+    All Gemini requests are in flight at once and each texture is decoded
+    once for its variants. With the Blender cube renderer, every `_cube` is
+    rendered in a single Blender session.
+    """
+    tiles = load_tile_manifest(manifest_path)
+    if not tiles:
+        print(f"ERROR: No tiles found in {manifest_path}")
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print(f"BATCH TILES: {len(tiles)} tile(s) from {manifest_path}")
+    print("=" * 60)
+
+    with ThreadPoolExecutor(max_workers=len(tiles)) as pool:
+        texture_paths = list(pool.map(
+            lambda tile: generate_tile(tile["prompt"], output_dir / f"{tile['name']}.png"),
+            tiles,
+        ))
+
+    blender_cubes = cube_renderer == "blender" and "cube" in variants
+    tile_variants = tuple(v for v in variants if v != "cube") if blender_cubes else variants
+    results = [
+        process_tile(texture_path, output_dir, tile["name"], tile_variants, seam_threshold, auto_fix_seams,
+                     cube_renderer)
+        for tile, texture_path in zip(tiles, texture_paths)
+    ]
+
+    if blender_cubes:
+        cube_paths = render_cube_tiles([
+            (outputs["flat"], output_dir / f"{tile['name']}_cube.png")
+            for tile, outputs in zip(tiles, results)
+        ])
+        for outputs, cube_path in zip(results, cube_paths):
+            outputs["cube"] = cube_path
+
+    return results
+
+
 def main():
     parser = argparse.ArgumentParser(description="Asset Generation Pipeline")
     parser.add_argument("--prompt", type=str, help="Prompt for concept art generation")
     parser.add_argument("--image", type=str, help="Skip step 1, use existing image")
-    parser.add_argument("--model", type=str, help="Skip steps 1-2, use existing 3D model")
+    parser.add_argument("--variants", type=int, default=1, metavar="N",
+                        help="With --prompt, generate N concepts concurrently plus a contact sheet, then stop")
+    parser.add_argument("--strict", action="store_true",
+                        help="Always convert to 3D, even if an earlier input looked the same (see model_reuse.py)")
+    parser.add_argument("--model", type=str,
+                        help="Skip steps 1-2, use existing 3D model (also accepts a glob or a JSON render manifest)")
     parser.add_argument("--output-dir", type=str, default="./output", help="Output directory")
     parser.add_argument("--name", type=str, default="building", help="Output file base name")
     parser.add_argument("--orientation", type=int, help="Single orientation to render (0, 90, 180, or 270)")
-    parser.add_argument("--tile", action="store_true", help="Generate a tile texture (skip 3D conversion)")
-    parser.add_argument("--cube-tile", action="store_true", help="Generate 3D cube tile (elevated tile with visible sides)")
-    parser.add_argument("--texture", type=str, help="Use existing texture for cube tile (skip generation)")
+    parser.add_argument("--tile", action="store_true",
+                        help="Generate a tile texture plus its _iso and _cube variants (skip 3D conversion)")
+    parser.add_argument("--cube-tile", action="store_true", help="Generate 3D cube tile only (elevated tile with visible sides)")
+    parser.add_argument("--no-cube", action="store_true", help="With --tile, skip the cube render")
+    parser.add_argument("--cube-renderer", choices=["numpy", "blender"], default="numpy",
+                        help="Draw cube tiles analytically (fast) or render them in Blender (fallback)")
+    parser.add_argument("--compare-blender", action="store_true",
+                        help="Also render the cube in Blender and report the pixel diff against the NumPy render")
+    parser.add_argument("--tiles-from-manifest", type=str,
+                        help="Generate every tile listed in ASSET_MANIFEST.md or a JSON sidecar in one run")
+    parser.add_argument("--seam-threshold", type=float, default=1.5,
+                        help="Max tile seam score (edge-wrap vs. interior difference, ~1.0 is seamless)")
+    parser.add_argument("--fix-seams", action="store_true",
+                        help="Offset-and-blend tiles that fail the seam check before deriving variants")
+    parser.add_argument("--texture", type=str, help="Use existing texture for tile variants (skip generation)")
     parser.add_argument("--soft-lighting", action="store_true", help="Use softer, more even lighting (good for trees/props)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parallel Blender processes when rendering a glob or manifest of models")
+    parser.add_argument("--frame-budget", type=float, default=0.0,
+                        help="Target seconds per rendered frame; lowers samples/resolution after the first frame")
+    parser.add_argument("--render-passes", type=str, metavar="DIR",
+                        help="Also save relightable light-group passes (key, fill, ambient) to DIR")
+    parser.add_argument("--relight", type=str, metavar="DIR",
+                        help="Skip Blender: recompose sprites from the passes in DIR")
+    parser.add_argument("--lighting", choices=["normal", "soft"],
+                        help="Lighting preset for --relight (default: the one the passes were rendered for)")
+    parser.add_argument("--sun-energy", type=float, help="Override key sun energy for --relight")
+    parser.add_argument("--fill-energy", type=float, help="Override fill light energy for --relight")
+    parser.add_argument("--ambient-strength", type=float, help="Override world ambient strength for --relight")
+    parser.add_argument("--view-transform", choices=["agx", "standard"], default="agx",
+                        help="View transform applied by --relight (Blender's default is AgX)")
+    parser.add_argument("--resolution", type=int, default=512,
+                        help="Sprite resolution for single-model renders (e.g. 2048 for hero renders)")
+    parser.add_argument("--scales", type=str,
+                        help="Comma-separated sprite scales, e.g. 0.5,1,2: render once at the largest and "
+                             "downsample the rest (@<scale>x suffixes, listed in scales.json)")
+    parser.add_argument("--split-frame", type=int, default=1, metavar="N",
+                        help="Split each frame into N strips rendered by parallel Blender processes and stitch them")
+    parser.add_argument("--preview", action="store_true",
+                        help="With --model, write fast software previews and a contact sheet instead of Blender renders")
+    parser.add_argument("--preview-size", type=int, default=128, help="Preview size in pixels")
+    parser.add_argument("--turntable", type=int, default=1, metavar="N",
+                        help="With --preview, render N evenly spaced angles per model")
+    parser.add_argument("--change-tolerance", type=int, default=0, metavar="N",
+                        help="Keep an existing sprite file when no pixel channel of the new render differs by more "
+                             "than N (0-255; 0 = identical pixels)")
+    parser.add_argument("--qa-reframe", action="store_true",
+                        help="Re-render models whose sprites fail framing QA (clipped or tiny) with a corrected framing")
+    parser.add_argument("--warm-shaders", action="store_true",
+                        help="Re-run the shader cache warm-up (BLENDER_SHADER_CACHE_DIR) even if it is up to date")
+    parser.add_argument("--run-report", type=str, metavar="PATH",
+                        help="Write a JSON run report (frame timings, shader cache) to PATH")
 
     args = parser.parse_args()
+    atexit.register(run_report.finish, args.run_report)
+    if args.scales:
+        from image_utils import parse_scales
+
+        try:
+            args.scales = parse_scales(args.scales)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.render_passes and args.frame_budget:
+        parser.error("--frame-budget cannot be combined with --render-passes (all light passes must match in size)")
+    if args.split_frame > 1:
+        # Strips are stitched as plain PNGs: per-strip budgets, passes, scales or re-framing would not line up
+        combined = (("--frame-budget", args.frame_budget), ("--render-passes", args.render_passes),
+                    ("--scales", args.scales), ("--qa-reframe", args.qa_reframe))
+        unsupported = [flag for flag, value in combined if value]
+        if unsupported:
+            parser.error(f"--split-frame cannot be combined with {', '.join(unsupported)}")
+
+    if args.warm_shaders:
+        warm_shader_cache(force=True)
+        if not (args.prompt or args.image or args.model or args.texture or args.tiles_from_manifest):
+            return
+
+    if not (args.prompt or args.image or args.model or args.texture or args.tiles_from_manifest or args.relight):
+        parser.error("Must provide --prompt, --image, --model, --texture, --tiles-from-manifest or --relight")
+
+    # Relight mode - recompose sprites from saved light passes, no Blender
+    if args.relight:
+        from relight import relight
+
+        pass_files = sorted(Path(args.relight).glob("*.npz"))
+        if not pass_files:
+            parser.error(f"No pass files (*.npz) in {args.relight}")
+        explicit_dir = Path(args.output_dir) if args.output_dir != parser.get_default("output_dir") else None
+        lighting = args.lighting or ("soft" if args.soft_lighting else None)
+        start = time.time()
+        sprites = relight(pass_files, explicit_dir, lighting, args.sun_energy, args.fill_energy,
+                          args.ambient_strength, args.view_transform, args.change_tolerance)
 
-    if not args.prompt and not args.image and not args.model and not args.texture:
-        parser.error("Must provide --prompt, --image, --model, or --texture")
+        print("\n" + "=" * 60)
+        print(f"RELIGHT COMPLETE ({len(sprites)} sprites in {time.time() - start:.2f}s)")
+        print("=" * 60)
+        return
+
+    # Preview mode - software-rasterized triage of existing models, no Blender
+    if args.preview:
+        from preview import preview_jobs
+
+        if not args.model:
+            parser.error("--preview requires --model")
+        explicit_dir = Path(args.output_dir) if args.output_dir != parser.get_default("output_dir") else None
+        explicit_name = args.name if args.name != parser.get_default("name") else None
+        jobs = load_render_jobs(args.model, explicit_dir, explicit_name, args.orientation, args.soft_lighting)
+        sheet_path = Path(args.output_dir) / "contact_sheet.png"
+        start = time.time()
+        previews = preview_jobs(jobs, args.preview_size, args.turntable, sheet_path)
+        if not previews:
+            print(f"ERROR: No models matched {args.model}" if not jobs else "ERROR: None of the matched models could be previewed")
+            sys.exit(1)
+
+        print("\n" + "=" * 60)
+        print(f"PREVIEW COMPLETE ({len(previews)} models in {time.time() - start:.2f}s)")
+        print("=" * 60)
+        print(f"Contact sheet: {sheet_path}")
+        return
+
+    # Batch mode - glob or manifest of existing models, rendered in as few
+    # Blender processes as possible. Sprites go next to each model unless
+    # --output-dir is given explicitly.
+    if args.model and (args.model.endswith(".json") or glob.has_magic(args.model)):
+        explicit_dir = Path(args.output_dir) if args.output_dir != parser.get_default("output_dir") else None
+        jobs = load_render_jobs(args.model, explicit_dir, None, args.orientation, args.soft_lighting)
+        if args.scales:
+            with_scales(jobs, args.scales)
+        sprites = render_isometric_batch(jobs, args.workers, args.frame_budget, args.render_passes,
+                                         change_tolerance=args.change_tolerance, qa_reframe=args.qa_reframe)
+
+        print("\n" + "=" * 60)
+        print("BATCH RENDER COMPLETE")
+        print("=" * 60)
+        for sprite_path in sprites:
+            print(f"Sprite: {sprite_path}")
+        return
 
     # Create output directory
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Tile mode - simplified pipeline
-    if args.tile:
-        if not args.prompt:
-            parser.error("--tile requires --prompt")
-        tile_path = output_dir / f"{args.name}.png"
-        generate_tile(args.prompt, tile_path)
-
-        # Transform to isometric
-        iso_path = output_dir / f"{args.name}_iso.png"
-        transform_to_isometric(tile_path, iso_path)
+    # Batch tile mode - every tile in the manifest, generated concurrently
+    if args.tiles_from_manifest:
+        variants = ("iso",) if args.no_cube else ("iso", "cube")
+        results = generate_tiles_from_manifest(Path(args.tiles_from_manifest), output_dir, variants,
+                                               args.seam_threshold, args.fix_seams, args.cube_renderer)
 
         print("\n" + "=" * 60)
-        print("TILE COMPLETE")
+        print("BATCH TILES COMPLETE")
         print("=" * 60)
-        print(f"Flat tile: {tile_path}")
-        print(f"Isometric: {iso_path}")
+        for outputs in results:
+            print("  ".join(str(path) for path in outputs.values()))
         return
 
-    # Cube tile mode - 3D cube with texture
-    if args.cube_tile:
+    # Tile mode - flat texture plus all derived variants from one decode
+    if args.tile or args.cube_tile:
         if not args.prompt and not args.texture:
-            parser.error("--cube-tile requires --prompt or --texture")
+            parser.error("--tile/--cube-tile requires --prompt or --texture")
 
         # Generate or use existing texture
         if args.texture:
@@ -685,20 +1416,30 @@ def main():
             texture_path = output_dir / f"{args.name}.png"
             generate_tile(args.prompt, texture_path)
 
-        # Render as 3D cube
-        cube_path = output_dir / f"{args.name}_cube.png"
-        render_cube_tile(texture_path, cube_path)
+        # --tile derives every variant; --cube-tile alone only the cube render
+        if args.tile:
+            variants = ("iso",) if args.no_cube else ("iso", "cube")
+        else:
+            variants = ("cube",)
+        outputs = process_tile(texture_path, output_dir, args.name, variants, args.seam_threshold, args.fix_seams,
+                               args.cube_renderer, args.compare_blender)
 
         print("\n" + "=" * 60)
-        print("CUBE TILE COMPLETE")
+        print("TILE COMPLETE")
         print("=" * 60)
-        print(f"Texture: {texture_path}")
-        print(f"Cube tile: {cube_path}")
+        print(f"Flat tile: {outputs['flat']}")
+        if "iso" in outputs:
+            print(f"Isometric: {outputs['iso']}")
+        if "cube" in outputs:
+            print(f"Cube tile: {outputs['cube']}")
         return
 
     concept_path = output_dir / f"{args.name}_concept.png"
     model_path = output_dir / f"{args.name}.glb"
     sprite_path = output_dir / f"{args.name}_sprite.png"
+    if args.resolution != parser.get_default("resolution"):
+        # Keep hero renders from overwriting the regular 512px sprites
+        sprite_path = output_dir / f"{args.name}_{args.resolution}_sprite.png"
 
     # Step 1: Generate concept art (or use provided image)
     if args.model:
@@ -707,15 +1448,31 @@ def main():
     elif args.image:
         concept_path = Path(args.image)
         print(f"Skipping step 1, using image: {concept_path}")
+    elif args.variants > 1:
+        from variants import generate_variants
+
+        candidates = generate_variants(lambda path: step1_generate_concept(args.prompt, path), concept_path,
+                                       args.variants)
+        if not candidates:
+            print("ERROR: No concept variant was generated")
+            sys.exit(1)
+        print(f"Pick one and continue with: python pipeline.py --image {candidates[0]} --name {args.name}")
+        return
     else:
         step1_generate_concept(args.prompt, concept_path)
 
     # Step 2: Convert to 3D
     if not args.model:
-        step2_convert_to_3d(concept_path, model_path)
+        step2_convert_to_3d(concept_path, model_path, args.strict)
 
     # Step 3: Render isometric sprite
-    step3_render_isometric(model_path, sprite_path, args.orientation, args.soft_lighting)
+    if args.split_frame > 1:
+        render_isometric_split(model_path, sprite_path, args.resolution, args.split_frame, args.orientation,
+                               args.soft_lighting, args.change_tolerance)
+    else:
+        step3_render_isometric(model_path, sprite_path, args.orientation, args.soft_lighting, args.frame_budget,
+                               args.render_passes, args.resolution, args.scales, args.change_tolerance,
+                               args.qa_reframe)
 
     print("\n" + "=" * 60)
     print("PIPELINE COMPLETE")
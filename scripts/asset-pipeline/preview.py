@@ -0,0 +1,416 @@
+"""
+Software preview renderer for GLB models (NumPy, no Blender).
+
+Loads a GLB's triangles, UVs and base-colour texture and rasterizes a small
+flat-shaded isometric view (or a turntable) with the same camera framing and
+light directions as step3_render_isometric. A model renders in a fraction of
+a second, so a whole directory of Tripo3D output can be put on one contact
+sheet for triage before any Blender time is spent on it.
+"""
+
+import io
+import json
+import math
+import struct
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from cube_tile import sun_direction
+from relight import LIGHTING_PRESETS, VIEW_TRANSFORMS
+
+ISO_ELEVATION = 35.264      # degrees, true isometric
+WORLD_COLOR = 0.050876      # Blender's default world colour (linear)
+MAX_CANDIDATES = 4_000_000  # pixel tests per rasterizer chunk
+
+_COMPONENT_TYPES = {
+    5120: np.int8, 5121: np.uint8, 5122: np.int16,
+    5123: np.uint16, 5125: np.uint32, 5126: np.float32,
+}
+_TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT4": 16}
+
+
+def _read_glb(path: Path) -> tuple:
+    """Split a GLB file into its JSON document and binary chunk."""
+    data = Path(path).read_bytes()
+    magic, _, _ = struct.unpack_from("<III", data, 0)
+    if magic != 0x46546C67:  # "glTF"
+        raise ValueError(f"{path} is not a binary glTF (.glb) file")
+
+    document, binary = None, b""
+    offset = 12
+    while offset < len(data):
+        length, chunk_type = struct.unpack_from("<II", data, offset)
+        chunk = data[offset + 8:offset + 8 + length]
+        if chunk_type == 0x4E4F534A:    # "JSON"
+            document = json.loads(chunk)
+        elif chunk_type == 0x004E4942:  # "BIN\0"
+            binary = chunk
+        offset += 8 + length
+
+    if document is None:
+        raise ValueError(f"{path} has no JSON chunk")
+    return document, binary
+
+
+def _buffer_view(document: dict, binary: bytes, index: int) -> bytes:
+    view = document["bufferViews"][index]
+    start = view.get("byteOffset", 0)
+    return binary[start:start + view["byteLength"]]
+
+
+def _accessor(document: dict, binary: bytes, index: int) -> np.ndarray:
+    """Read an accessor as a (count, components) float or int array."""
+    accessor = document["accessors"][index]
+    dtype = np.dtype(_COMPONENT_TYPES[accessor["componentType"]])
+    components = _TYPE_SIZES[accessor["type"]]
+    count = accessor["count"]
+
+    view = document["bufferViews"][accessor["bufferView"]]
+    data = _buffer_view(document, binary, accessor["bufferView"])
+    offset = accessor.get("byteOffset", 0)
+    stride = view.get("byteStride") or dtype.itemsize * components
+
+    # Strided (interleaved) views are read as rows of raw bytes first
+    rows = np.frombuffer(data, dtype=np.uint8, count=stride * (count - 1) + dtype.itemsize * components,
+                         offset=offset)
+    rows = np.lib.stride_tricks.as_strided(rows, shape=(count, dtype.itemsize * components), strides=(stride, 1))
+    values = rows.copy().view(dtype).reshape(count, components)
+
+    if accessor.get("normalized") and dtype.kind in "iu":
+        values = values.astype(np.float32) / np.iinfo(dtype).max
+    return values
+
+
+def _node_matrix(node: dict) -> np.ndarray:
+    """Local transform of a glTF node (matrix or TRS)."""
+    if "matrix" in node:
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+
+    x, y, z, w = node.get("rotation", (0.0, 0.0, 0.0, 1.0))
+    rotation = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation * np.array(node.get("scale", (1.0, 1.0, 1.0)))
+    matrix[:3, 3] = node.get("translation", (0.0, 0.0, 0.0))
+    return matrix
+
+
+def load_glb(path: Path) -> dict:
+    """
+    Load the triangles of a GLB model in Blender's Z-up world space.
+
+    Returns {"positions": (V, 3), "faces": (F, 3), "uvs": (V, 2) or None,
+    "face_material": (F,), "materials": [texture image or None, colour]}.
+    """
+    document, binary = _read_glb(path)
+    if "KHR_draco_mesh_compression" in document.get("extensionsUsed", []):
+        raise ValueError(f"{path} uses Draco compression, which the preview loader does not decode")
+
+    textures = []
+    for image in document.get("images", []):
+        with Image.open(io.BytesIO(_buffer_view(document, binary, image["bufferView"]))) as img:
+            textures.append(np.asarray(img.convert("RGB"), dtype=np.float32) / 255.0)
+
+    materials = []
+    for material in document.get("materials", []):
+        pbr = material.get("pbrMetallicRoughness", {})
+        texture = None
+        if "baseColorTexture" in pbr:
+            source = document["textures"][pbr["baseColorTexture"]["index"]].get("source")
+            texture = textures[source] if source is not None else None
+        materials.append((texture, np.array(pbr.get("baseColorFactor", (1.0, 1.0, 1.0, 1.0))[:3])))
+    default_material = len(materials)
+    materials.append((None, np.array((0.8, 0.8, 0.8))))  # Blender's default grey
+
+    positions, faces, uvs, face_material = [], [], [], []
+    has_uvs = True
+    vertex_count = 0
+
+    scene = document.get("scenes", [{}])[document.get("scene", 0)] if document.get("scenes") else {}
+    stack = [(index, np.eye(4)) for index in scene.get("nodes", range(len(document.get("nodes", []))))]
+    while stack:
+        index, parent = stack.pop()
+        node = document["nodes"][index]
+        matrix = parent @ _node_matrix(node)
+        stack.extend((child, matrix) for child in node.get("children", []))
+        if "mesh" not in node:
+            continue
+
+        for primitive in document["meshes"][node["mesh"]]["primitives"]:
+            if primitive.get("mode", 4) != 4:  # triangles only
+                continue
+            attributes = primitive["attributes"]
+            points = _accessor(document, binary, attributes["POSITION"]).astype(np.float64)
+            points = points @ matrix[:3, :3].T + matrix[:3, 3]
+            if "indices" in primitive:
+                indices = _accessor(document, binary, primitive["indices"]).reshape(-1, 3).astype(np.int64)
+            else:
+                indices = np.arange(len(points)).reshape(-1, 3)
+
+            if "TEXCOORD_0" in attributes:
+                uvs.append(_accessor(document, binary, attributes["TEXCOORD_0"]).astype(np.float32))
+            else:
+                has_uvs = False
+
+            positions.append(points)
+            faces.append(indices + vertex_count)
+            face_material.append(np.full(len(indices), primitive.get("material", default_material)))
+            vertex_count += len(points)
+
+    if not faces:
+        raise ValueError(f"No triangle meshes found in {path}")
+
+    # glTF is Y-up; Blender's importer converts to Z-up as (x, -z, y)
+    positions = np.concatenate(positions)
+    positions = np.column_stack([positions[:, 0], -positions[:, 2], positions[:, 1]])
+    return {
+        "positions": positions,
+        "faces": np.concatenate(faces),
+        "uvs": np.concatenate(uvs) if has_uvs else None,
+        "face_material": np.concatenate(face_material),
+        "materials": materials,
+    }
+
+
+def _camera(angle: float) -> tuple:
+    """(right, up, forward) axes of the isometric camera at an orientation angle."""
+    rad = math.radians(45 + angle)
+    elevation = math.radians(ISO_ELEVATION)
+    forward = -np.array([math.cos(rad) * math.cos(elevation), math.sin(rad) * math.cos(elevation),
+                         math.sin(elevation)])
+    right = np.cross(forward, [0.0, 0.0, 1.0])
+    right /= np.linalg.norm(right)
+    up = np.cross(right, forward)
+    return right, up, forward
+
+
+def _rasterize(screen: np.ndarray, depth: np.ndarray, faces: np.ndarray, size: int) -> tuple:
+    """
+    Z-buffer rasterize triangles at pixel centres.
+
+    Every triangle's bounding box is expanded into candidate pixels in bulk,
+    tested with edge functions and resolved against the depth buffer, so
+    there is no per-triangle Python loop. Returns (face index per pixel, -1
+    for background, and barycentric weights per pixel).
+    """
+    tri = screen[faces]                     # (F, 3, 2)
+    tri_depth = depth[faces]                # (F, 3)
+    x0 = np.clip(np.floor(tri[..., 0].min(axis=1) - 0.5).astype(np.int64), 0, size)
+    x1 = np.clip(np.ceil(tri[..., 0].max(axis=1) - 0.5).astype(np.int64) + 1, 0, size)
+    y0 = np.clip(np.floor(tri[..., 1].min(axis=1) - 0.5).astype(np.int64), 0, size)
+    y1 = np.clip(np.ceil(tri[..., 1].max(axis=1) - 0.5).astype(np.int64) + 1, 0, size)
+    widths = x1 - x0
+    counts = widths * (y1 - y0)
+
+    # Signed area; degenerate (edge-on) triangles cover nothing
+    a, b, c = tri[:, 0], tri[:, 1], tri[:, 2]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    visible = np.nonzero((counts > 0) & (np.abs(area) > 1e-12))[0]
+
+    zbuffer = np.full(size * size, np.inf)
+    face_ids = np.full(size * size, -1, dtype=np.int64)
+    weights = np.zeros((size * size, 3))
+
+    # Chunk so the candidate arrays stay bounded for large triangles
+    cumulative = np.cumsum(counts[visible])
+    chunk_ends = np.searchsorted(cumulative, np.arange(MAX_CANDIDATES, cumulative[-1] + MAX_CANDIDATES,
+                                                       MAX_CANDIDATES), side="right") if len(visible) else []
+    start = 0
+    for end in list(chunk_ends) + [len(visible)]:
+        end = max(end, start + 1)
+        chunk = visible[start:end]
+        start = end
+        if len(chunk) == 0:
+            continue
+
+        chunk_counts = counts[chunk]
+        ids = np.repeat(chunk, chunk_counts)
+        local = np.arange(chunk_counts.sum()) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        px = x0[ids] + local % widths[ids]
+        py = y0[ids] + local // widths[ids]
+        sx, sy = px + 0.5, py + 0.5
+
+        ta, tb, tc = a[ids], b[ids], c[ids]
+        inv_area = 1.0 / area[ids]
+        w0 = ((tb[:, 0] - sx) * (tc[:, 1] - sy) - (tb[:, 1] - sy) * (tc[:, 0] - sx)) * inv_area
+        w1 = ((tc[:, 0] - sx) * (ta[:, 1] - sy) - (tc[:, 1] - sy) * (ta[:, 0] - sx)) * inv_area
+        w2 = 1.0 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+        if not inside.any():
+            continue
+
+        ids, w = ids[inside], np.column_stack([w0[inside], w1[inside], w2[inside]])
+        pixels = py[inside] * size + px[inside]
+        z = (w * tri_depth[ids]).sum(axis=1)
+
+        # Nearest candidate per pixel, then against what earlier chunks drew
+        order = np.lexsort((z, pixels))
+        pixels, z, ids, w = pixels[order], z[order], ids[order], w[order]
+        first = np.ones(len(pixels), dtype=bool)
+        first[1:] = pixels[1:] != pixels[:-1]
+        pixels, z, ids, w = pixels[first], z[first], ids[first], w[first]
+        closer = z < zbuffer[pixels]
+        pixels = pixels[closer]
+        zbuffer[pixels] = z[closer]
+        face_ids[pixels] = ids[closer]
+        weights[pixels] = w[closer]
+
+    return face_ids, weights
+
+
+def render_preview(model: dict, angle: float = 0, size: int = 128, lighting: str = "normal",
+                   supersample: int = 2, view_transform: str = "agx") -> Image.Image:
+    """
+    Flat-shaded isometric preview of a model loaded with load_glb().
+
+    Framing (ortho scale 1.5x the largest bound) and the key/fill sun
+    directions follow the Blender isometric renderer for the same angle.
+    """
+    positions = model["positions"]
+    faces = model["faces"]
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    center = (low + high) / 2
+    extent = max(float((high - low).max()), 1e-6)
+
+    right, up, forward = _camera(angle)
+    render_size = size * supersample
+    scale = render_size / (extent * 1.5)
+    relative = positions - center
+    screen = np.column_stack([render_size / 2 + (relative @ right) * scale,
+                              render_size / 2 - (relative @ up) * scale])
+    depth = relative @ forward
+
+    face_ids, weights = _rasterize(screen, depth, faces, render_size)
+    covered = face_ids >= 0
+
+    # Flat shading: one normal per face, flipped towards the camera so
+    # inconsistent winding in generated meshes does not render black
+    v0, v1, v2 = (positions[faces[:, i]] for i in range(3))
+    normals = np.cross(v1 - v0, v2 - v0)
+    normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+    normals[normals @ forward > 0] *= -1
+
+    energies = LIGHTING_PRESETS[lighting]
+    rad = math.radians(45 + angle)
+    key_direction = sun_direction((45, 0, math.degrees(rad) - 30 + 90))
+    fill_direction = sun_direction((60, 0, math.degrees(rad) + 150 + 90))
+    irradiance = (energies["ambient"] * WORLD_COLOR
+                  + (energies["sun"] * np.maximum(normals @ key_direction, 0.0)
+                     + energies["fill"] * np.maximum(normals @ fill_direction, 0.0)) / math.pi)
+
+    # Base colour per covered pixel: texture (UV interpolated) or material colour
+    ids = face_ids[covered]
+    albedo = np.empty((len(ids), 3))
+    face_material = model["face_material"][ids]
+    for index, (texture, color) in enumerate(model["materials"]):
+        selected = face_material == index
+        if not selected.any():
+            continue
+        if texture is not None and model["uvs"] is not None:
+            uv = (weights[covered][selected][:, :, None] * model["uvs"][faces[ids[selected]]]).sum(axis=1)
+            height, width = texture.shape[:2]
+            cols = np.floor(uv[:, 0] * width).astype(np.int64) % width
+            rows = np.floor(uv[:, 1] * height).astype(np.int64) % height  # glTF v runs down
+            srgb = texture[rows, cols]
+            linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+            albedo[selected] = linear * color
+        else:
+            albedo[selected] = color
+
+    rgb = np.zeros((render_size * render_size, 3))
+    rgb[covered] = albedo * irradiance[ids][:, None]
+    alpha = covered.astype(np.float64)
+
+    # Premultiplied box downsample of the supersamples
+    rgb = rgb.reshape(size, supersample, size, supersample, 3).mean(axis=(1, 3))
+    alpha = alpha.reshape(size, supersample, size, supersample).mean(axis=(1, 3))
+    inside = alpha > 0
+    rgb[inside] /= alpha[inside][:, None]
+
+    rgba = np.dstack([VIEW_TRANSFORMS[view_transform](rgb.astype(np.float32)), alpha])
+    return Image.fromarray((np.clip(rgba, 0, 1) * 255 + 0.5).astype(np.uint8), "RGBA")
+
+
+def render_turntable(model: dict, frames: int = 8, size: int = 128, lighting: str = "normal") -> list:
+    """Previews at evenly spaced orientation angles around the model."""
+    return [render_preview(model, 360.0 * i / frames, size, lighting) for i in range(frames)]
+
+
+def contact_sheet(previews: list, columns: int = 6, background: tuple = (48, 48, 48, 255)) -> Image.Image:
+    """
+    Lay (label, image or list of images) previews out on one labelled sheet.
+
+    A list of images (a turntable) fills one row per model.
+    """
+    rows = [(label, images if isinstance(images, list) else [images]) for label, images in previews]
+    cell = max(img.size[0] for _, images in rows for img in images)
+    label_height = 14
+    per_row = max(len(images) for _, images in rows)
+    columns = per_row if per_row > 1 else columns
+
+    cells = []
+    for label, images in rows:
+        if per_row > 1:
+            cells.append([(label if i == 0 else "", img) for i, img in enumerate(images)])
+        else:
+            cells.append([(label, images[0])])
+    if per_row == 1:
+        flat = [c[0] for c in cells]
+        cells = [flat[i:i + columns] for i in range(0, len(flat), columns)]
+
+    sheet = Image.new("RGBA", (columns * cell, len(cells) * (cell + label_height)), background)
+    draw = ImageDraw.Draw(sheet)
+    for row, row_cells in enumerate(cells):
+        for column, (label, img) in enumerate(row_cells):
+            x, y = column * cell, row * (cell + label_height)
+            sheet.alpha_composite(img.convert("RGBA"), (x, y))
+            draw.text((x + 2, y + cell), label[:cell // 6], fill=(220, 220, 220, 255))
+    return sheet
+
+
+def preview_jobs(jobs: list, size: int = 128, frames: int = 1, sheet_path: Path = None) -> list:
+    """
+    Write a `<name>_preview.png` next to each job's sprite path and, with
+    sheet_path, a contact sheet of every model. Jobs come from
+    pipeline.load_render_jobs(). Returns the preview paths.
+    """
+    import time
+
+    written, sheet = [], []
+    for job in jobs:
+        start = time.time()
+        try:
+            model = load_glb(Path(job["model_path"]))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"WARNING: Could not preview {job['model_path']}: {e}")
+            continue
+
+        if frames > 1:
+            images = render_turntable(model, frames, size, job["lighting"])
+            preview = Image.new("RGBA", (size * frames, size))
+            for i, img in enumerate(images):
+                preview.paste(img, (i * size, 0))
+        else:
+            angle = job["orientation"] if job.get("orientation") is not None else 0
+            images = render_preview(model, angle, size, job["lighting"])
+            preview = images
+
+        preview_path = Path(job["output_path"].replace("_sprite.png", "_preview.png"))
+        preview_path.parent.mkdir(parents=True, exist_ok=True)
+        preview.save(preview_path, "PNG")
+        print(f"Preview ({len(model['faces'])} tris, {(time.time() - start) * 1000:.0f} ms): {preview_path}")
+        written.append(preview_path)
+        model_path = Path(job["model_path"])
+        # Tripo3D output is usually <asset>/model.glb, so label by folder then
+        sheet.append((model_path.parent.name if model_path.stem == "model" else model_path.stem, images))
+
+    if sheet_path and sheet:
+        Path(sheet_path).parent.mkdir(parents=True, exist_ok=True)
+        contact_sheet(sheet).save(sheet_path, "PNG")
+        print(f"Contact sheet ({len(sheet)} models): {sheet_path}")
+    return written
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Publish final assets under content-hashed, immutable file names.
+
+Every final output under apps/web/public/assets (sprites, tiles, statics,
+spins, spritesheets; not concepts, models or work directories) is copied to
+apps/web/public/hashed/<dir>/<name>.<hash>.<ext>, and a manifest maps each
+logical asset id to its URL:
+
+    {"assets": {"props/oak_tree_sprite_0": {
+        "url": "/hashed/props/oak_tree_sprite_0.1a2b3c4d5e6f.png",
+        "width": 512, "height": 512, "bytes": 48213,
+        "anchor": {"x": 0.5, "y": 0.86}, "bbox": [118, 40, 394, 441]}}}
+
+A URL never changes content, so /hashed/ is served with a far-future
+immutable Cache-Control (see next.config.ts) and only the small manifest
+needs revalidating. The anchor is the bottom centre of the opaque pixels
+(where the asset touches the ground), normalized to the image size.
+Unchanged files keep their name and are not copied again; older hashed
+files stay for clients holding an older manifest until --prune.
+
+Usage:
+    python publish.py
+    python publish.py --dry-run
+    python publish.py --prune
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image, ImageSequence
+
+from asset_registry import REPO_ROOT, content_hash, registry
+from image_utils import alpha_bbox
+
+PUBLIC_DIR = REPO_ROOT / "apps" / "web" / "public"
+SOURCE_DIR = PUBLIC_DIR / "assets"
+HASHED_DIR = PUBLIC_DIR / "hashed"
+MANIFEST_PATH = PUBLIC_DIR / "asset-manifest.json"
+
+# Intermediate outputs that stay unpublished
+EXCLUDED_DIRS = {"candidates", "work", "temp_frames", "frames"}
+EXCLUDED_SUFFIXES = ("concept.png", "clean.png", "filled_for_3d.png", ".glb", ".npz", "scales.json")
+PUBLISHED_SUFFIXES = (".png", ".gif", ".webp", ".json")
+HASH_LENGTH = 12
+
+
+def final_assets(source_dir: Path = SOURCE_DIR) -> list:
+    """Files under source_dir that the web client loads."""
+    assets = []
+    for path in sorted(source_dir.rglob("*")):
+        relative = path.relative_to(source_dir)
+        if not path.is_file() or path.name.startswith(".") or EXCLUDED_DIRS & set(relative.parts[:-1]):
+            continue
+        if path.name.endswith(EXCLUDED_SUFFIXES) or not path.name.endswith(PUBLISHED_SUFFIXES):
+            continue
+        # Council member directories hold per-member intermediates
+        if relative.parts[0] == "council" and len(relative.parts) > 2:
+            continue
+        assets.append(path)
+    return assets
+
+
+def image_info(path: Path) -> dict:
+    """Dimensions, frame count, opaque bounding box and ground anchor of an image."""
+    with Image.open(path) as img:
+        info = {"width": img.width, "height": img.height}
+        if getattr(img, "n_frames", 1) > 1:
+            info["frames"] = img.n_frames
+        # Over every frame, so a spin whose silhouette grows later is not clipped
+        bbox = alpha_bbox(ImageSequence.Iterator(img), threshold=0)
+
+    if bbox is not None:
+        left, top, right, bottom = bbox
+        info["bbox"] = [left, top, right, bottom]
+        info["anchor"] = {"x": round((left + right) / 2 / info["width"], 4), "y": round(bottom / info["height"], 4)}
+    return info
+
+
+def hashed_name(path: Path) -> str:
+    return f"{path.stem}.{content_hash(path)[:HASH_LENGTH]}{path.suffix}"
+
+
+def _copy_immutable(source: Path, target: Path) -> bool:
+    """Copy source to target unless it already exists (same name = same bytes); returns True if copied."""
+    if target.exists():
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+    with os.fdopen(fd, "wb") as f, open(source, "rb") as src:
+        shutil.copyfileobj(src, f)
+    os.replace(temp_path, target)
+    return True
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Replace path with data in one rename, so the server never reads half a file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def publish(source_dir: Path = SOURCE_DIR, hashed_dir: Path = HASHED_DIR, manifest_path: Path = MANIFEST_PATH,
+            dry_run: bool = False, prune: bool = False) -> dict:
+    """Copy final assets to hashed names and write the manifest; returns the manifest."""
+    base_url = "/" + hashed_dir.relative_to(PUBLIC_DIR).as_posix()
+    assets = final_assets(source_dir)
+    images = [path for path in assets if path.suffix != ".json"]
+    atlases = [path for path in assets if path.suffix == ".json"]
+
+    entries = {}
+    published = {}
+    copied = 0
+    for path in images:
+        relative = path.relative_to(source_dir)
+        target = hashed_dir / relative.parent / hashed_name(path)
+        if not dry_run and _copy_immutable(path, target):
+            registry().register(target, "published", parents=[path])
+            copied += 1
+        published[path] = target
+        asset_id = relative.with_suffix("").as_posix()
+        entries[asset_id] = {"url": f"{base_url}/{target.relative_to(hashed_dir).as_posix()}",
+                             "bytes": path.stat().st_size, **image_info(path)}
+
+    # Spritesheet atlases name their image; point them at the hashed sheet
+    for path in atlases:
+        atlas = json.loads(path.read_text())
+        sheet = path.parent / atlas.get("meta", {}).get("image", "")
+        if sheet not in published:
+            continue
+        atlas["meta"]["image"] = published[sheet].name
+        data = (json.dumps(atlas, indent=2) + "\n").encode()
+        relative = path.relative_to(source_dir)
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        target = hashed_dir / relative.parent / f"{path.stem}.{digest}{path.suffix}"
+        if not dry_run and not target.exists():
+            _write_atomic(target, data)
+            copied += 1
+        published[path] = target
+        entries[relative.with_suffix("").as_posix() + ".atlas"] = {
+            "url": f"{base_url}/{target.relative_to(hashed_dir).as_posix()}", "bytes": len(data),
+            "image": relative.with_suffix("").as_posix()}
+
+    manifest = {"assets": dict(sorted(entries.items()))}
+    total = sum(entry["bytes"] for entry in entries.values())
+    print(f"{len(entries)} asset(s), {total / 1024:.0f} KB, {copied} new file(s) in {hashed_dir}")
+    if dry_run:
+        return manifest
+
+    _write_atomic(manifest_path, (json.dumps(manifest, indent=2) + "\n").encode())
+    print(f"Wrote {manifest_path}")
+
+    if prune:
+        keep = set(published.values())
+        stale = [p for p in hashed_dir.rglob("*") if p.is_file() and p not in keep]
+        for path in stale:
+            path.unlink()
+        print(f"Pruned {len(stale)} unreferenced file(s)")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish assets under content-hashed names with a JSON manifest")
+    parser.add_argument("--source", type=str, default=str(SOURCE_DIR), help="Asset directory to publish")
+    parser.add_argument("--output", type=str, default=str(HASHED_DIR),
+                        help="Hashed output directory (must be inside apps/web/public)")
+    parser.add_argument("--manifest", type=str, default=str(MANIFEST_PATH), help="Manifest path")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be published without writing")
+    parser.add_argument("--prune", action="store_true", help="Delete hashed files the new manifest no longer uses")
+    args = parser.parse_args()
+
+    hashed_dir = Path(args.output).resolve()
+    if PUBLIC_DIR not in hashed_dir.parents:
+        print(f"ERROR: --output must be inside {PUBLIC_DIR} to be served")
+        sys.exit(1)
+    publish(Path(args.source).resolve(), hashed_dir, Path(args.manifest), args.dry_run, args.prune)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Relightable isometric sprites.
+
+With --render-passes, Blender renders each orientation once per light group
+(key sun, fill sun, world ambient) at unit energy and stores the linear
+results in a .npz file. Because light is additive, any lighting rig is then
+a weighted sum of those passes, so sprites can be recomposed with new
+energies in NumPy in milliseconds instead of re-rendering every model.
+"""
+
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Energies used by the isometric renderer (sun, fill, world strength)
+LIGHTING_PRESETS = {
+    "normal": {"sun": 8.0, "fill": 2.5, "ambient": 0.8},  # more contrast for buildings
+    "soft": {"sun": 5.0, "fill": 4.0, "ambient": 1.2},    # even illumination for props
+}
+
+# Minimal AgX approximation (Blender's default view transform since 4.0),
+# https://iolite-engine.com/blog_posts/minimal_agx_implementation
+_AGX_INSET = np.array([
+    [0.842479062253094, 0.0423282422610123, 0.0423756549057051],
+    [0.0784335999999992, 0.878468636469772, 0.0784336],
+    [0.0792237451477643, 0.0791661274605434, 0.879142973793104],
+], dtype=np.float32)
+_AGX_OUTSET = np.array([
+    [1.19687900512017, -0.0528968517574562, -0.0529716355144438],
+    [-0.0980208811401368, 1.15190312990417, -0.0980434501171241],
+    [-0.0990297440797205, -0.0989611768448433, 1.15107367264116],
+], dtype=np.float32)
+_AGX_MIN_EV = -12.47393
+_AGX_MAX_EV = 4.026069
+
+
+def pass_path(passes_dir: Path, sprite_path: Path) -> Path:
+    """Pass file for one orientation's sprite (e.g. town_hall_sprite_0.png)."""
+    return Path(passes_dir) / f"{Path(sprite_path).stem}.npz"
+
+
+def _srgb_encode(linear: np.ndarray) -> np.ndarray:
+    linear = np.clip(linear, 0.0, 1.0)
+    return np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+
+
+def _agx(linear: np.ndarray) -> np.ndarray:
+    val = np.maximum(linear @ _AGX_INSET, 1e-10)
+    val = (np.clip(np.log2(val), _AGX_MIN_EV, _AGX_MAX_EV) - _AGX_MIN_EV) / (_AGX_MAX_EV - _AGX_MIN_EV)
+    x2 = val * val
+    x4 = x2 * x2
+    val = (15.5 * x4 * x2 - 40.14 * x4 * val + 31.96 * x4
+           - 6.868 * x2 * val + 0.4298 * x2 + 0.1191 * val - 0.00232)
+    # Back to linear display light (2.2 reference EOTF), then sRGB encode
+    val = np.power(np.clip(val @ _AGX_OUTSET, 0.0, 1.0), 2.2)
+    return _srgb_encode(val)
+
+
+VIEW_TRANSFORMS = {
+    "agx": _agx,
+    "standard": _srgb_encode,
+}
+
+
+def compose(passes, sun: float, fill: float, ambient: float, view_transform: str = "agx") -> Image.Image:
+    """Combine unit-energy light passes with the given energies into an RGBA sprite."""
+    # Passes are premultiplied linear light, so the weighted sum is exact
+    rgb = (sun * passes["key"].astype(np.float32)
+           + fill * passes["fill"].astype(np.float32)
+           + ambient * passes["ambient"].astype(np.float32))
+    alpha = passes["alpha"].astype(np.float32)
+
+    covered = alpha > 0
+    rgb[covered] /= alpha[covered][:, None]
+
+    display = VIEW_TRANSFORMS[view_transform](rgb)
+    rgba = np.dstack([display, np.clip(alpha, 0.0, 1.0)])
+    return Image.fromarray((rgba * 255 + 0.5).astype(np.uint8), "RGBA")
+
+
+def relight(pass_files: list, output_dir: Path = None, lighting: str = None, sun: float = None,
+            fill: float = None, ambient: float = None, view_transform: str = "agx", change_tolerance: int = 0,
+            only_changed: bool = True) -> list:
+    """
+    Recompose sprites from pass files (see pass_path()).
+
+    Each pass file remembers its sprite path and lighting mode; lighting or
+    explicit energies override them and output_dir redirects the sprites.
+    Sprites within change_tolerance of the existing file are left untouched;
+    only_changed=False always writes them (e.g. masters that are downsampled
+    into scale variants next, which are compared instead).
+    """
+    from output_writer import write_if_changed
+
+    written = []
+    for npz_path in pass_files:
+        with np.load(npz_path) as passes:
+            mode = lighting or str(passes["lighting"])
+            energies = dict(LIGHTING_PRESETS[mode])
+            for key, value in (("sun", sun), ("fill", fill), ("ambient", ambient)):
+                if value is not None:
+                    energies[key] = value
+
+            sprite_path = Path(str(passes["sprite_path"]))
+            if output_dir is not None:
+                sprite_path = Path(output_dir) / sprite_path.name
+
+            sprite = compose(passes, energies["sun"], energies["fill"], energies["ambient"], view_transform)
+
+        if only_changed:
+            changed = write_if_changed(sprite, sprite_path, change_tolerance)
+        else:
+            sprite_path.parent.mkdir(parents=True, exist_ok=True)
+            sprite.save(sprite_path, "PNG")
+            changed = True
+        print(f"{'Relit' if changed else 'Unchanged'} {sprite_path} "
+              f"(sun {energies['sun']}, fill {energies['fill']}, ambient {energies['ambient']})")
+        written.append(sprite_path)
+
+    return written
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Render farm: split render batches across machines through a shared queue.
+
+The queue is a SQLite database on a filesystem every build machine
+mounts (NFS/SMB), next to a content-addressed store (content_store.py).
+Workers claim one job at a time with a lease, keep the lease alive while
+rendering, and push the job's outputs into the store; a lease that runs
+out (the node died or lost the mount) puts the job back in the queue for
+another worker. Any machine can then fetch the finished outputs from the
+store into its own checkout.
+
+Jobs are the asset daemon's job types (asset_daemon.JOB_TYPES) with
+paths relative to the repository root, so checkouts may live at
+different paths on each machine.
+
+Usage:
+    # Once, from any machine: queue every model in the rerender manifest and all avatar spins
+    python render_farm.py enqueue --db /mnt/farm/queue.db --model rerender_manifest.json --council --citizens
+    # On every build machine
+    python render_farm.py worker --db /mnt/farm/queue.db --store /mnt/farm/store --backend bpy
+    # Progress, then copy the outputs into this checkout
+    python render_farm.py status --db /mnt/farm/queue.db
+    python render_farm.py fetch --db /mnt/farm/queue.db --store /mnt/farm/store
+
+SQLite locking over network filesystems relies on working POSIX locks;
+the database uses the rollback journal (WAL needs shared memory and does
+not work over NFS) and short transactions.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from asset_daemon import JOB_TYPES, PRIORITIES, job_key
+from asset_registry import repo_relative
+from content_store import ContentStore, file_digest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    type TEXT NOT NULL,
+    params TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    outputs TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, id);
+"""
+
+
+class FarmQueue:
+    """Job queue in a SQLite file with leases (safe for many processes and machines)."""
+
+    def __init__(self, db_path: Path, timeout: float = 60.0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # isolation_level=None: autocommit, multi-statement transactions use BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=DELETE")
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def enqueue(self, job_type: str, params: dict, priority: int = PRIORITIES["bulk"]) -> bool:
+        """Add a job unless an identical one is queued or running; returns True if added."""
+        now = time.time()
+        key = job_key(job_type, params)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status FROM jobs WHERE key = ?", (key,)).fetchone()
+            if row is not None and row["status"] in ("queued", "leased"):
+                conn.execute("COMMIT")
+                return False
+            # Finished or failed before: run it again
+            conn.execute(
+                "INSERT INTO jobs (key, type, params, priority, created, updated) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET status = 'queued', priority = excluded.priority, attempts = 0, "
+                "lease_owner = NULL, lease_expires = NULL, outputs = NULL, error = NULL, updated = excluded.updated",
+                (key, job_type, json.dumps(params, sort_keys=True), priority, now, now))
+            conn.execute("COMMIT")
+        return True
+
+    def claim(self, owner: str, lease: float):
+        """Lease the most urgent queued job (re-queuing expired leases first); returns a row or None."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            expired = conn.execute(
+                "UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires = NULL, updated = ? "
+                "WHERE status = 'leased' AND lease_expires < ?", (now, now)).rowcount
+            if expired:
+                print(f"Re-queued {expired} job(s) whose lease expired")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority, id LIMIT 1").fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "updated = ? WHERE id = ?", (owner, now + lease, now, row["id"]))
+            conn.execute("COMMIT")
+        return row
+
+    def renew(self, job_id: int, owner: str, lease: float) -> bool:
+        """Extend a lease; False if it was lost (expired and claimed by another worker)."""
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated = ? WHERE id = ? AND status = 'leased' "
+                "AND lease_owner = ?", (time.time() + lease, time.time(), job_id, owner)).rowcount
+        return updated == 1
+
+    def complete(self, job_id: int, owner: str, outputs: dict) -> bool:
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = 'done', outputs = ?, error = NULL, lease_owner = NULL, "
+                "lease_expires = NULL, updated = ? WHERE id = ? AND lease_owner = ?",
+                (json.dumps(outputs, sort_keys=True), time.time(), job_id, owner)).rowcount
+        return updated == 1
+
+    def fail(self, job_id: int, owner: str, error: str, max_attempts: int) -> None:
+        """Record a failure; the job is re-queued until it has failed max_attempts times."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, error = ?, "
+                "lease_owner = NULL, lease_expires = NULL, updated = ? WHERE id = ? AND lease_owner = ?",
+                (max_attempts, error, time.time(), job_id, owner))
+
+    def counts(self) -> dict:
+        with self._connect() as conn:
+            return {row["status"]: row["n"] for row in
+                    conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+
+    def rows(self, status: str = None) -> list:
+        with self._connect() as conn:
+            if status:
+                return conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id", (status,)).fetchall()
+            return conn.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+
+
+def _output_files(result) -> list:
+    """Existing files named anywhere in a job handler's result."""
+    if isinstance(result, dict):
+        return [path for value in result.values() for path in _output_files(value)]
+    if isinstance(result, list):
+        return [path for value in result for path in _output_files(value)]
+    if isinstance(result, str) and Path(result).is_file():
+        return [Path(result)]
+    return []
+
+
+def run_worker(queue: FarmQueue, store: ContentStore, backend_name: str = "subprocess", lease: float = 300.0,
+               poll: float = 10.0, max_attempts: int = 3, exit_when_empty: bool = False) -> int:
+    """Claim, render and store jobs until interrupted (or the queue drains); returns jobs completed."""
+    from blender_backend import get_backend
+
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    # Job paths are relative to the repository root; handlers import the
+    # pipeline modules lazily, so keep them importable after the chdir
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    os.chdir(REPO_ROOT)
+    backend = get_backend(backend_name)
+    completed = 0
+    print(f"Render farm worker {owner} ({backend_name} backend, {lease:.0f}s lease)")
+    try:
+        while True:
+            row = queue.claim(owner, lease)
+            if row is None:
+                if exit_when_empty:
+                    return completed
+                time.sleep(poll)
+                continue
+
+            params = json.loads(row["params"])
+            print(f"\n=== Job {row['id']}: {row['type']} {params} (attempt {row['attempts'] + 1}) ===")
+            lost = threading.Event()
+            stop = threading.Event()
+
+            def keep_alive(job_id=row["id"]):
+                while not stop.wait(lease / 3):
+                    if not queue.renew(job_id, owner, lease):
+                        lost.set()
+                        return
+
+            heartbeat = threading.Thread(target=keep_alive, daemon=True)
+            heartbeat.start()
+            try:
+                result = JOB_TYPES[row["type"]][0](params, backend)
+                outputs = {repo_relative(path): store.put(path) for path in _output_files(result)}
+                error = None
+            except SystemExit as e:
+                error = f"Step exited with code {e.code}"
+            except Exception as e:
+                traceback.print_exc()
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                stop.set()
+                heartbeat.join()
+
+            if lost.is_set():
+                print(f"Lease on job {row['id']} was lost; another worker owns it now")
+            elif error:
+                queue.fail(row["id"], owner, error, max_attempts)
+                print(f"Job {row['id']} failed: {error}")
+            elif queue.complete(row["id"], owner, outputs):
+                completed += 1
+                print(f"Job {row['id']} done: {len(outputs)} output(s) stored")
+    finally:
+        backend.close()
+
+
+def fetch_outputs(queue: FarmQueue, store: ContentStore) -> int:
+    """Copy every finished job's outputs from the store into this checkout; returns files written."""
+    written = 0
+    for row in queue.rows("done"):
+        for relative, digest in json.loads(row["outputs"] or "{}").items():
+            destination = REPO_ROOT / relative
+            if destination.exists() and file_digest(destination) == digest:
+                continue
+            store.get(digest, destination)
+            written += 1
+    return written
+
+
+def enqueue_batch(queue: FarmQueue, model: str = None, council: bool = False, citizens: bool = False,
+                  priority: int = PRIORITIES["bulk"], backend_params: dict = None) -> int:
+    """Queue one job per model / avatar; returns how many were added."""
+    added = 0
+    params_extra = backend_params or {}
+    if model:
+        from pipeline import load_render_jobs
+
+        for job in load_render_jobs(model):
+            output_path = Path(job["output_path"])
+            added += queue.enqueue("isometric", {
+                "model": repo_relative(job["model_path"]),
+                "output_dir": repo_relative(output_path.parent),
+                "name": output_path.name[:-len("_sprite.png")],
+                "lighting": job["lighting"],
+                "orientation": job["orientation"],
+                **params_extra,
+            }, priority)
+    if council:
+        from generate_council_avatars import COUNCIL_MEMBERS
+
+        for member_id in COUNCIL_MEMBERS:
+            added += queue.enqueue("council_member", {
+                "member_id": member_id,
+                "output_dir": repo_relative(REPO_ROOT / "apps" / "web" / "public" / "assets" / "council"),
+                "rerender_only": True,
+                **params_extra,
+            }, priority)
+    if citizens:
+        candidates = REPO_ROOT / "apps" / "web" / "public" / "assets" / "citizens" / "candidates"
+        for candidate in sorted(candidates.glob("*.png")):
+            added += queue.enqueue("citizen_spin", {"avatar_id": candidate.stem, **params_extra}, priority)
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-machine render farm over a shared SQLite job queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        p.add_argument("--db", type=str, required=True, help="Queue database on the shared filesystem")
+
+    p = sub.add_parser("enqueue", help="Queue render jobs (one per model/avatar)")
+    common(p)
+    p.add_argument("--model", type=str, help="Model file, glob or JSON render manifest (as for pipeline.py)")
+    p.add_argument("--council", action="store_true", help="Re-render every council member spin")
+    p.add_argument("--citizens", action="store_true", help="Process every citizen avatar candidate")
+    p.add_argument("--priority", type=str, default="bulk", help="interactive, normal, bulk or an integer")
+    p.add_argument("--frame-budget", type=float, default=0.0, help="Target seconds per frame (see pipeline.py)")
+
+    p = sub.add_parser("worker", help="Claim and render jobs until interrupted")
+    common(p)
+    p.add_argument("--store", type=str, required=True, help="Content-addressed store on the shared filesystem")
+    p.add_argument("--backend", choices=["subprocess", "bpy"], default="subprocess")
+    p.add_argument("--lease", type=float, default=300.0,
+                   help="Lease seconds; renewed while rendering, re-queued if the worker disappears")
+    p.add_argument("--max-attempts", type=int, default=3, help="Give up on a job after this many failures")
+    p.add_argument("--exit-when-empty", action="store_true", help="Stop once no job is queued")
+
+    p = sub.add_parser("status", help="Show job counts and failures")
+    common(p)
+
+    p = sub.add_parser("fetch", help="Copy finished outputs from the store into this checkout")
+    common(p)
+    p.add_argument("--store", type=str, required=True)
+
+    args = parser.parse_args()
+    queue = FarmQueue(Path(args.db))
+
+    if args.command == "enqueue":
+        from asset_daemon import parse_priority
+
+        try:
+            priority = parse_priority(int(args.priority) if args.priority.lstrip("-").isdigit() else args.priority)
+        except ValueError as e:
+            parser.error(str(e))
+        if not (args.model or args.council or args.citizens):
+            parser.error("enqueue needs --model, --council and/or --citizens")
+        extra = {"frame_budget": args.frame_budget} if args.frame_budget else {}
+        added = enqueue_batch(queue, args.model, args.council, args.citizens, priority, extra)
+        print(f"Queued {added} job(s) in {args.db}")
+    elif args.command == "worker":
+        completed = run_worker(queue, ContentStore(Path(args.store)), args.backend, args.lease,
+                               max_attempts=args.max_attempts, exit_when_empty=args.exit_when_empty)
+        print(f"Worker finished {completed} job(s)")
+    elif args.command == "status":
+        print(json.dumps(queue.counts(), indent=2))
+        for row in queue.rows("failed"):
+            print(f"FAILED {row['id']} {row['type']} {row['params']}: {row['error']}")
+        for row in queue.rows("leased"):
+            print(f"LEASED {row['id']} {row['type']} by {row['lease_owner']} "
+                  f"(expires in {row['lease_expires'] - time.time():.0f}s)")
+    elif args.command == "fetch":
+        written = fetch_outputs(queue, ContentStore(Path(args.store)))
+        print(f"Fetched {written} file(s) into {REPO_ROOT}")
+    else:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
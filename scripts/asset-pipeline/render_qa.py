@@ -0,0 +1,184 @@
+"""
+Framing QA for rendered sprites and spin frames.
+
+The isometric camera frames a model at ortho_scale = size * 1.5 of its
+bounding box (spins use 1.8), which goes wrong quietly: a model with a
+stray far-away vertex renders tiny, a long one clips at the canvas edge,
+a failed import renders nothing. check() measures every output from its
+alpha channel, stacking same-sized images so one NumPy pass covers a whole
+batch:
+
+- coverage: fraction of pixels with alpha above ALPHA_THRESHOLD
+- margins: gap between the opaque bounding box and each canvas edge,
+  as a fraction of the canvas (0 = touching, i.e. probably clipped)
+- extent: the bounding box's larger side over the canvas size
+- centroid offset: alpha-weighted centre of mass from the canvas centre
+
+Failures ("empty", "clipped", "tiny", "off_center") are printed and listed
+in the run report's "qa" section. reframe_factor() turns a sprite's
+measurements into a new framing for pipeline.py --qa-reframe, which
+re-renders just the failed models once.
+"""
+
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import run_report
+from asset_registry import repo_relative
+
+ALPHA_THRESHOLD = 16
+THRESHOLDS = {
+    "min_coverage": 0.002,       # below this the render is as good as empty
+    "min_margin": 0.004,         # opaque pixels this close to an edge are clipped
+    "min_extent": 0.35,          # smaller than this and the model is lost on its canvas
+    "max_centroid_offset": 0.2,  # mass this far off centre (of the canvas size)
+}
+TARGET_EXTENT = 0.7              # what a re-frame aims for
+DEFAULT_FRAMING = 1.5            # ortho_scale / model size of isometric sprites
+
+# Latest result per item, so a re-rendered item replaces its earlier failure
+_checked = set()
+_failed = {}
+
+
+def measure(alphas: np.ndarray) -> dict:
+    """Metrics of a (N, H, W) stack of alpha channels, one array entry per image."""
+    _, height, width = alphas.shape
+    opaque = alphas > ALPHA_THRESHOLD
+    coverage = opaque.mean(axis=(1, 2))
+
+    rows = opaque.any(axis=2)
+    cols = opaque.any(axis=1)
+    filled = rows.any(axis=1)
+    top = rows.argmax(axis=1)
+    bottom = height - rows[:, ::-1].argmax(axis=1)
+    left = cols.argmax(axis=1)
+    right = width - cols[:, ::-1].argmax(axis=1)
+    margins = np.stack([left / width, top / height, (width - right) / width, (height - bottom) / height], axis=1)
+    extent = np.maximum((right - left) / width, (bottom - top) / height)
+
+    weights = np.where(opaque, alphas, 0).astype(np.float64)
+    mass = weights.sum(axis=(1, 2))
+    safe = np.where(mass > 0, mass, 1.0)
+    cy = (weights.sum(axis=2) * np.arange(height)).sum(axis=1) / safe
+    cx = (weights.sum(axis=1) * np.arange(width)).sum(axis=1) / safe
+    offset = np.hypot(cx / width - 0.5, cy / height - 0.5)
+
+    return {
+        "filled": filled,
+        "coverage": coverage,
+        "margins": np.where(filled[:, None], margins, 0.0),
+        "extent": np.where(filled, extent, 0.0),
+        "centroid_offset": np.where(filled, offset, 0.0),
+    }
+
+
+def failures(metrics: dict, thresholds: dict = None) -> list:
+    """Failure names for one image's (scalar) metrics."""
+    limits = {**THRESHOLDS, **(thresholds or {})}
+    if metrics["coverage"] < limits["min_coverage"]:
+        return ["empty"]
+    found = []
+    if min(metrics["margins"]) < limits["min_margin"]:
+        found.append("clipped")
+    elif metrics["extent"] < limits["min_extent"]:
+        found.append("tiny")
+    if metrics["centroid_offset"] > limits["max_centroid_offset"]:
+        found.append("off_center")
+    return found
+
+
+def _load_alphas(paths: list) -> dict:
+    """{size: (paths, (N, H, W) alpha stack)} so each size is measured in one pass."""
+    groups = {}
+    for path in paths:
+        with Image.open(path) as img:
+            alpha = np.asarray(img.convert("RGBA"))[..., 3]
+        groups.setdefault(alpha.shape, ([], []))
+        groups[alpha.shape][0].append(Path(path))
+        groups[alpha.shape][1].append(alpha)
+    return {shape: (group_paths, np.stack(stack)) for shape, (group_paths, stack) in groups.items()}
+
+
+def _record(label: str, metrics: dict, found: list) -> None:
+    _checked.add(label)
+    _failed.pop(label, None)
+    if found:
+        _failed[label] = {"failures": found, **metrics}
+        print(f"QA: {label}: {', '.join(found)} (coverage {metrics['coverage']:.3f}, "
+              f"extent {metrics['extent']:.2f}, min margin {min(metrics['margins']):.3f}, "
+              f"centroid offset {metrics['centroid_offset']:.2f})")
+    run_report.current().set("qa", {"checked": len(_checked), "failed": len(_failed), "items": dict(_failed)})
+
+
+def _scalar(metrics: dict, index: int) -> dict:
+    return {
+        "coverage": round(float(metrics["coverage"][index]), 4),
+        "margins": [round(float(m), 4) for m in metrics["margins"][index]],
+        "extent": round(float(metrics["extent"][index]), 4),
+        "centroid_offset": round(float(metrics["centroid_offset"][index]), 4),
+    }
+
+
+def check(paths: list, thresholds: dict = None) -> dict:
+    """QA each image on its own; returns {path: (metrics, failures)} for every path."""
+    results = {}
+    for group_paths, alphas in _load_alphas([p for p in paths if Path(p).exists()]).values():
+        metrics = measure(alphas)
+        for index, path in enumerate(group_paths):
+            scalar = _scalar(metrics, index)
+            found = failures(scalar, thresholds)
+            _record(repo_relative(path), scalar, found)
+            results[path] = (scalar, found)
+    return results
+
+
+def check_spin(frames: list, label: str, thresholds: dict = None) -> list:
+    """
+    QA a spin as one item: empty if any frame is, clipped by the tightest
+    margin over all frames, tiny by the widest frame, and off centre by the
+    mean centroid (a turning model swings around the centre). Returns the
+    failures.
+    """
+    frames = [p for p in frames if Path(p).exists()]
+    if not frames:
+        return []
+    combined = None
+    for _, alphas in _load_alphas(frames).values():
+        metrics = measure(alphas)
+        group = {
+            "coverage": float(metrics["coverage"].min()),
+            "margins": [float(m) for m in metrics["margins"].min(axis=0)],
+            "extent": float(metrics["extent"].max()),
+            "centroid_offset": float(metrics["centroid_offset"].mean()),
+        }
+        if combined is None:
+            combined = group
+        else:
+            combined = {
+                "coverage": min(combined["coverage"], group["coverage"]),
+                "margins": [min(a, b) for a, b in zip(combined["margins"], group["margins"])],
+                "extent": max(combined["extent"], group["extent"]),
+                "centroid_offset": max(combined["centroid_offset"], group["centroid_offset"]),
+            }
+    combined = {key: [round(m, 4) for m in value] if isinstance(value, list) else round(value, 4)
+                for key, value in combined.items()}
+    found = failures(combined, thresholds)
+    _record(label, combined, found)
+    return found
+
+
+def reframe_factor(metrics: dict, found: list, framing: float = DEFAULT_FRAMING) -> float:
+    """
+    Framing (ortho_scale / model size) that should bring a clipped or tiny
+    sprite to TARGET_EXTENT, or None if a new framing would not help
+    (empty renders, or only off centre).
+    """
+    if "clipped" in found:
+        # The visible extent understates a clipped model; widen by at least a third
+        return round(framing * max(metrics["extent"] / TARGET_EXTENT, 4 / 3), 3)
+    if "tiny" in found:
+        return round(framing * metrics["extent"] / TARGET_EXTENT, 3)
+    return None
@@ -2,36 +2,17 @@
 set -e
 
 # Assets are now stored directly in apps/web/public/assets
-ASSETS_DIR="../../apps/web/public/assets"
+# Which models get which lighting lives in rerender_manifest.json
+WORKERS="${WORKERS:-$(python3 -c 'import os; print(max(1, (os.cpu_count() or 2) // 2))')}"
+# Sprites whose pixels move by no more than this (per channel, 0-255) keep their existing file
+CHANGE_TOLERANCE="${CHANGE_TOLERANCE:-2}"
 
-echo "Re-rendering all assets with fixed lighting..."
+echo "Re-rendering all assets with fixed lighting ($WORKERS Blender worker(s))..."
 
-# Core buildings
-for model in "$ASSETS_DIR"/buildings/core/*.glb; do
-    name=$(basename "$model" .glb)
-    echo "=== Rendering $name ==="
-    python3 pipeline.py --model "$model" --name "${name}_sprite" --output-dir "$ASSETS_DIR/buildings/core"
-done
-
-# Commercial buildings
-for model in "$ASSETS_DIR"/buildings/commercial/*.glb; do
-    name=$(basename "$model" .glb)
-    echo "=== Rendering $name ==="
-    python3 pipeline.py --model "$model" --name "${name}_sprite" --output-dir "$ASSETS_DIR/buildings/commercial"
-done
-
-# Residential buildings
-for model in "$ASSETS_DIR"/buildings/residential/*.glb; do
-    name=$(basename "$model" .glb)
-    echo "=== Rendering $name ==="
-    python3 pipeline.py --model "$model" --name "${name}_sprite" --output-dir "$ASSETS_DIR/buildings/residential"
-done
-
-# Props (with soft lighting)
-for model in "$ASSETS_DIR"/props/*.glb; do
-    name=$(basename "$model" .glb)
-    echo "=== Rendering $name (soft lighting) ==="
-    python3 pipeline.py --model "$model" --name "${name}_sprite" --output-dir "$ASSETS_DIR/props" --soft-lighting
-done
+# Buildings (standard lighting) and props (soft lighting) in one batch:
+# each worker imports, renders and purges models in a single Blender process.
+# Unchanged sprites are left as they are, so git and caches only see real changes.
+# Sprites are named <model>_sprite_<angle>.png, the names apps/web loads
+python3 pipeline.py --model rerender_manifest.json --workers "$WORKERS" --change-tolerance "$CHANGE_TOLERANCE"
 
 echo "Done! Assets rendered directly to apps/web/public/assets/"
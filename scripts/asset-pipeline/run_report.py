@@ -0,0 +1,111 @@
+"""
+Run report: a JSON summary of one pipeline run.
+
+Stages record into the process-wide report from current() (like the
+logging module), and the CLI writes it with --run-report. Sections:
+
+- "renders": per Blender process, first-frame vs. steady-state frame times
+  (the first frame pays shader compilation, see blender_utils.SHADER_CACHE_DIR
+  and shader_cache_env())
+- "shader_cache": cache directory and warm-up timing
+- "api": per remote endpoint calls, waits, 429s and utilization (see api_limits)
+- anything else a stage adds with set()
+"""
+
+import json
+import statistics
+import time
+from pathlib import Path
+
+
+def frame_stats(times: list) -> dict:
+    """First-frame vs. steady-state summary of per-frame render times (seconds)."""
+    times = [float(t) for t in times]
+    if not times:
+        return {"frames": 0}
+    steady = times[1:]
+    stats = {
+        "frames": len(times),
+        "first": round(times[0], 3),
+        "steady_mean": round(statistics.mean(steady), 3) if steady else None,
+        "steady_median": round(statistics.median(steady), 3) if steady else None,
+        "total": round(sum(times), 3),
+    }
+    if steady and stats["steady_mean"]:
+        stats["first_over_steady"] = round(times[0] / statistics.mean(steady), 2)
+    return stats
+
+
+class RunReport:
+    """Collects timings and flags for one run; write() saves them as JSON."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.sections = {}
+
+    def set(self, section: str, value) -> None:
+        self.sections[section] = value
+
+    def add(self, section: str, key: str, value) -> None:
+        self.sections.setdefault(section, {})[key] = value
+
+    def add_frames(self, label: str, times: list) -> dict:
+        """Record one Blender process's frame times under "renders"."""
+        stats = frame_stats(times)
+        self.add("renders", label, stats)
+        return stats
+
+    def render_totals(self) -> dict:
+        """First-frame vs. steady-state averages over all recorded renders."""
+        renders = [r for r in self.sections.get("renders", {}).values() if r.get("frames")]
+        firsts = [r["first"] for r in renders]
+        steady = [r["steady_mean"] for r in renders if r["steady_mean"] is not None]
+        return {
+            "processes": len(renders),
+            "frames": sum(r["frames"] for r in renders),
+            "first_mean": round(statistics.mean(firsts), 3) if firsts else None,
+            "steady_mean": round(statistics.mean(steady), 3) if steady else None,
+        }
+
+    def to_dict(self) -> dict:
+        data = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "elapsed": round(time.time() - self.started, 2),
+            **self.sections,
+        }
+        if "renders" in self.sections:
+            data["render_totals"] = self.render_totals()
+        return data
+
+    def print_summary(self) -> None:
+        totals = self.render_totals()
+        if totals["processes"]:
+            steady = f"{totals['steady_mean']:.2f}s" if totals["steady_mean"] is not None else "n/a"
+            print(f"Frame times over {totals['processes']} Blender process(es): "
+                  f"first frame {totals['first_mean']:.2f}s, steady state {steady}")
+        for name, api in self.sections.get("api", {}).items():
+            utilization = f"{api['utilization']:.0%}" if api["utilization"] is not None else "n/a"
+            print(f"API {name}: {api['calls']} call(s), {api['busy_seconds']:.0f}s busy, "
+                  f"{api['wait_seconds']:.0f}s waiting, {api['throttled_429']} 429(s), utilization {utilization}")
+
+    def write(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2) + "\n")
+        print(f"Run report: {path}")
+        return path
+
+
+_current = RunReport()
+
+
+def current() -> RunReport:
+    """The report for this process."""
+    return _current
+
+
+def finish(path: Path = None) -> None:
+    """Print the summary and, with a path (--run-report), write the JSON."""
+    _current.print_summary()
+    if path:
+        _current.write(path)
@@ -0,0 +1,122 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence
+
+from image_utils import alpha_bbox, downsample, encode_spin_gif, hamming, parse_scales, phash
+
+SIZE = 48
+
+
+def _frame(box=None, color=(200, 60, 40)):
+    frame = Image.new("RGBA", (SIZE, SIZE), (0, 0, 0, 0))
+    if box is not None:
+        frame.paste((*color, 255), box)
+    return frame
+
+
+def _decoded_alphas(path, duration):
+    """Alpha masks of every displayed frame, with merged (longer) frames repeated."""
+    masks = []
+    with Image.open(path) as gif:
+        for frame in ImageSequence.Iterator(gif):
+            mask = np.asarray(frame.convert("RGBA"))[..., 3] > 0
+            masks.extend([mask] * round(frame.info.get("duration", duration) / duration))
+    return masks
+
+
+def _expected_alphas(frames):
+    box = alpha_bbox(frames)
+    if box is not None:
+        frames = [frame.crop(box) for frame in frames]
+    return [np.asarray(frame)[..., 3] > 128 for frame in frames]
+
+
+SPINS = {
+    "moving": [_frame((4 + i * 6, 10, 20 + i * 6, 30)) for i in range(4)],
+    "shrinking": [_frame((4, 4, 44, 44)), _frame((12, 12, 36, 36)), _frame((20, 20, 28, 28))],
+    "identical": [_frame((10, 10, 30, 30))] * 3 + [_frame((12, 10, 32, 30))],
+    "blank_first": [_frame(), _frame((10, 10, 30, 30)), _frame((14, 10, 34, 30))],
+    "blank_last": [_frame((10, 10, 30, 30)), _frame((14, 10, 34, 30)), _frame()],
+    "blank_between": [_frame((10, 10, 30, 30)), _frame(), _frame((10, 10, 30, 30))],
+    "blank_first_and_last": [_frame(), _frame((10, 10, 30, 30)), _frame()],
+    "all_blank": [_frame(), _frame()],
+    "single_blank": [_frame()],
+}
+
+
+@pytest.mark.parametrize("name", SPINS)
+def test_spin_gif_round_trip_keeps_alpha(tmp_path, name):
+    frames = SPINS[name]
+    path = tmp_path / f"{name}.gif"
+    result = encode_spin_gif(frames, path, duration=50)
+
+    expected = _expected_alphas(frames)
+    decoded = _decoded_alphas(path, 50)
+    assert result["size"] == expected[0].shape[::-1]
+    assert len(decoded) == len(expected)
+    for index, (got, want) in enumerate(zip(decoded, expected)):
+        assert np.array_equal(got, want), f"frame {index}"
+
+
+def test_spin_gif_without_crop_keeps_canvas(tmp_path):
+    result = encode_spin_gif(SPINS["moving"], tmp_path / "spin.gif", crop=False)
+    assert result["size"] == (SIZE, SIZE) and result["crop"] is None
+
+
+def test_downsample_uniform_colour_stays_uniform():
+    img = Image.new("RGBA", (64, 48), (120, 200, 30, 255))
+    small = np.asarray(downsample(img, (16, 12)))
+    assert small.shape == (12, 16, 4)
+    assert np.abs(small.astype(int) - (120, 200, 30, 255)).max() <= 1
+
+
+def test_downsample_transparent_stays_transparent():
+    small = np.asarray(downsample(Image.new("RGBA", (40, 40), (255, 255, 255, 0)), (7, 7)))
+    assert not small.any()
+
+
+def test_downsample_edges_do_not_pick_up_transparent_colour():
+    img = Image.new("RGBA", (2, 2), (0, 0, 0, 0))
+    img.putpixel((0, 0), (255, 255, 255, 255))
+    pixel = downsample(img, (1, 1)).getpixel((0, 0))
+    assert pixel[:3] == (255, 255, 255) and abs(pixel[3] - 64) <= 1
+
+
+def test_parse_scales_sorts_and_dedupes():
+    assert parse_scales("2, 0.5,1,1") == (0.5, 1.0, 2.0)
+
+
+@pytest.mark.parametrize("value", ["", ",", "0,1", "-1,2"])
+def test_parse_scales_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_scales(value)
+
+
+def _subject(offset=0):
+    img = Image.new("RGBA", (128, 128), (0, 0, 0, 0))
+    img.paste((180, 40, 40, 255), (20 + offset, 30, 90 + offset, 110))
+    img.paste((40, 40, 160, 255), (50, 10 + offset, 110, 50 + offset))
+    return img
+
+
+def test_phash_ignores_reencoding_and_resizing():
+    img = _subject()
+    buffer = io.BytesIO()
+    Image.alpha_composite(Image.new("RGBA", img.size, (255, 255, 255, 255)), img).convert("RGB").save(
+        buffer, "JPEG", quality=70)
+    reencoded = Image.open(io.BytesIO(buffer.getvalue()))
+    assert hamming(phash(img), phash(reencoded)) <= 4
+    assert hamming(phash(img), phash(img.resize((300, 300), Image.LANCZOS))) <= 4
+
+
+def test_phash_cutout_matches_white_background():
+    img = _subject()
+    flat = Image.alpha_composite(Image.new("RGBA", img.size, (255, 255, 255, 255)), img)
+    assert phash(img) == phash(flat)
+
+
+def test_phash_separates_different_pictures():
+    checker = Image.fromarray(((np.indices((128, 128)).sum(axis=0) // 16) % 2 * 255).astype(np.uint8), "L")
+    assert hamming(phash(_subject()), phash(checker)) > 10
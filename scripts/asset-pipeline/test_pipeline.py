@@ -0,0 +1,36 @@
+import numpy as np
+
+import asset_registry
+import output_writer
+import pipeline
+from relight import pass_path
+
+
+def _fake_pass_render(jobs, workers, frame_budget):
+    """Stand-in for the Blender workers: one centred square per orientation's light passes."""
+    seconds = {}
+    for job in jobs:
+        for sprite_path in pipeline.sprite_paths(job):
+            alpha = np.zeros((64, 64), dtype=np.float16)
+            alpha[16:48, 16:48] = 1.0
+            light = np.dstack([alpha] * 3) * np.float16(0.1)
+            np.savez_compressed(pass_path(job["passes_dir"], sprite_path), key=light, fill=light, ambient=light,
+                                alpha=alpha, sprite_path=str(sprite_path), lighting=job["lighting"])
+            seconds[str(sprite_path)] = 0.1
+    return seconds
+
+
+def test_passes_render_counts_each_sprite_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(asset_registry, "_registry", asset_registry.Registry(tmp_path / "registry.sqlite"))
+    monkeypatch.setattr(output_writer, "_counts", {"changed": 0, "unchanged": 0, "new": 0})
+    monkeypatch.setattr(pipeline, "_render_jobs_in_subprocesses", _fake_pass_render)
+    model = tmp_path / "model.glb"
+    model.write_bytes(b"glTF")
+    job = {"model_path": str(model), "output_path": str(tmp_path / "out" / "hut_sprite.png"),
+           "orientation": None, "lighting": "normal"}
+
+    pipeline.render_isometric_batch([dict(job)], passes_dir=tmp_path / "passes")
+    assert output_writer._counts == {"changed": 0, "unchanged": 0, "new": 4}
+
+    pipeline.render_isometric_batch([dict(job)], passes_dir=tmp_path / "passes")
+    assert output_writer._counts == {"changed": 0, "unchanged": 4, "new": 4}
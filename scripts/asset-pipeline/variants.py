@@ -0,0 +1,94 @@
+"""
+Concurrent concept variants.
+
+A concept round-trip to Gemini is slow, and a good concept often takes a
+few tries. generate_variants() fires N requests at once (within the
+"gemini" limits in api_limits), writes every candidate next to the usual
+output as <stem>_v1.png ... <stem>_vN.png, drops near-identical results by
+perceptual hash, and lays the rest out on one <stem>_variants.png contact
+sheet. Pick a candidate from the sheet and continue the pipeline from it.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+import run_report
+from asset_registry import registry
+from image_utils import hamming, phash
+from preview import contact_sheet
+
+# Hashes this close (of 64 bits) are the same picture re-encoded or re-sampled
+DUPLICATE_DISTANCE = 6
+THUMBNAIL_SIZE = 256
+
+
+def variant_path(output_path: Path, index: int) -> Path:
+    return output_path.with_name(f"{output_path.stem}_v{index}{output_path.suffix}")
+
+
+def _thumbnail(path: Path, size: int = THUMBNAIL_SIZE) -> Image.Image:
+    with Image.open(path) as img:
+        img = img.convert("RGBA")
+        img.thumbnail((size, size), Image.LANCZOS)
+    cell = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    cell.alpha_composite(img, ((size - img.width) // 2, (size - img.height) // 2))
+    return cell
+
+
+def _generate_one(generate, path: Path):
+    # The step functions exit on a bad response; one failed variant must not end the run
+    try:
+        return generate(path)
+    except (Exception, SystemExit) as e:
+        print(f"WARNING: Variant {path.name} failed: {e}")
+        return None
+
+
+def generate_variants(generate, output_path: Path, count: int, duplicate_distance: int = DUPLICATE_DISTANCE) -> list:
+    """
+    Run generate(path) for `count` variant paths concurrently; returns the
+    distinct candidates written. Near-duplicates (perceptual hash within
+    duplicate_distance bits of an earlier variant) are deleted.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    paths = [variant_path(output_path, i + 1) for i in range(count)]
+
+    print(f"\nGenerating {count} variant(s) of {output_path.name} concurrently")
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        results = list(pool.map(lambda path: _generate_one(generate, path), paths))
+    written = [path for path, result in zip(paths, results) if result is not None and path.exists()]
+
+    kept, hashes, duplicates = [], [], {}
+    for path in written:
+        with Image.open(path) as img:
+            digest = phash(img)
+        match = next((kept[i] for i, h in enumerate(hashes) if hamming(h, digest) <= duplicate_distance), None)
+        if match is not None:
+            duplicates[path.name] = match.name
+            print(f"  {path.name}: near-duplicate of {match.name}, removed")
+            path.unlink()
+            continue
+        kept.append(path)
+        hashes.append(digest)
+
+    sheet_path = output_path.with_name(f"{output_path.stem}_variants.png")
+    if kept:
+        contact_sheet([(path.stem, _thumbnail(path)) for path in kept], columns=min(len(kept), 4)).save(sheet_path)
+        registry().register(sheet_path, "preview", parents=kept)
+        print(f"Contact sheet ({len(kept)} variant(s)): {sheet_path}")
+
+    run_report.current().add("variants", output_path.name, {
+        "requested": count,
+        "failed": count - len(written),
+        "duplicates": duplicates,
+        "kept": [path.name for path in kept],
+        "seconds": round(time.time() - start, 2),
+    })
+    print(f"{len(kept)} distinct of {count} requested ({len(duplicates)} duplicate(s), "
+          f"{count - len(written)} failed) in {time.time() - start:.0f}s")
+    return kept